@@ -1,8 +1,10 @@
 # app/api/routes/metrics.py
 import requests
 import httpx
+import asyncio
+import time
 from collections import defaultdict
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import re
 from pprint import pprint
 from app.core.logger import app_logger
@@ -10,19 +12,84 @@ from app.core.logger import app_logger
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 
-from app.core.config import PROMETHEUS_URL, NODE_NAMES, v1_api
-from app.utils import parse_gpu_data
+from app.core.config import PROMETHEUS_URL, NODE_NAMES, PROMETHEUS_RANGE_CACHE_TTL, kube_api
+from app.utils import parse_gpu_data, parse_range_matrix, summarize_matrix, group_rows, list_gpu_pods
+from app.utils.cache import TTLCache
+from app.utils.json_codec import FastJSONResponse
 from app.db.dependencies import get_db
 from kubernetes import client, config
 from app.models.gpu import GPUUsage, Flavor, ServerGpuMapping
-from app.db.fetch_gpu import query_prometheus, sync_flavors_to_db, sync_gpu_pod_status_from_prometheus
+from app.db.fetch_gpu import query_prometheus, query_prometheus_range, sync_flavors_to_db, sync_gpu_pod_status_from_prometheus
 from app.models.k8s import PodCreation
 from app.models.user import User
 from app.db.session import SessionLocal
+from app.core.warm_pool import warm_pool
+from app.core.culling import idle_report
+from app.core.config import IDLE_CULL_ENABLED
 
 
 router = APIRouter()
 
+# Utilization series used for windowed node statistics: (query, grouping labels)
+UTILIZATION_QUERIES = {
+    "cpu": ('sum by(node) (rate(container_cpu_usage_seconds_total{container!="", image!=""}[5m]))', ("node",)),
+    "memory": ('sum by(node) (container_memory_working_set_bytes{container!="", image!=""})', ("node",)),
+    "gpu": ('avg by(Hostname, gpu) (DCGM_FI_DEV_GPU_UTIL)', ("Hostname", "gpu")),
+}
+# Number of samples requested per series, regardless of window length
+RANGE_POINTS = 240
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+range_cache = TTLCache(ttl=PROMETHEUS_RANGE_CACHE_TTL, maxsize=64)
+
+
+def parse_window(window: str) -> int:
+    """Convert a Prometheus style duration (e.g. 30m, 6h, 7d) to seconds"""
+    match = re.fullmatch(r"(\d+)([smhdw])", window.strip())
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail=f"Invalid window: {window} (expected e.g. 30m, 6h, 7d)")
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+async def fetch_range_matrix(query: str, labels: tuple, window_seconds: int):
+    """Query a range aligned on the step grid and cache the parsed matrix"""
+    step = max(15, window_seconds // RANGE_POINTS)
+    end = int(time.time()) // step * step
+    start = end - window_seconds
+    points = window_seconds // step + 1
+
+    cache_key = (query, start, end, step)
+    cached = range_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await query_prometheus_range(query, start, end, step)
+    parsed = parse_range_matrix(result, labels, start, step, points)
+    range_cache.set(cache_key, parsed)
+    return parsed
+
+
+async def get_node_utilization(window: str):
+    """Aggregate CPU, memory and GPU utilization per node over the given window."""
+    window_seconds = parse_window(window)
+    (cpu_keys, cpu_matrix), (mem_keys, mem_matrix), (gpu_keys, gpu_matrix) = await asyncio.gather(
+        *(fetch_range_matrix(query, labels, window_seconds) for query, labels in UTILIZATION_QUERIES.values())
+    )
+
+    utilization = defaultdict(lambda: {"window": window, "cpu": None, "memory": None, "gpu": None, "gpus": {}})
+
+    for (node,), stats in zip(cpu_keys, summarize_matrix(cpu_matrix)):
+        utilization[node]["cpu"] = stats
+    for (node,), stats in zip(mem_keys, summarize_matrix(mem_matrix, scale=1 / (1024**3))):
+        utilization[node]["memory"] = stats
+    for (node, gpu_id), stats in zip(gpu_keys, summarize_matrix(gpu_matrix)):
+        utilization[node]["gpus"][gpu_id] = stats
+    gpu_nodes, gpu_node_matrix = group_rows(gpu_keys, gpu_matrix)
+    for node, stats in zip(gpu_nodes, summarize_matrix(gpu_node_matrix)):
+        utilization[node]["gpu"] = stats
+
+    return utilization
+
 
 async def get_gpu_node_resources(db: Session):
     """Calculate GPU resource usage per node."""
@@ -65,7 +132,11 @@ async def get_gpu_node_resources(db: Session):
 
 
 @router.get("/node-resource")
-async def get_node_resources(db: Session = Depends(get_db)):
+async def get_node_resources(window: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Node allocatable/limit summary.
+    With `window` (e.g. 1h, 24h, 7d) each node also carries mean/p95/max utilization over that window.
+    """
     cpu_total_res = await query_prometheus('kube_node_status_allocatable{resource="cpu", unit="core"}')
     mem_total_res = await query_prometheus('kube_node_status_allocatable{resource="memory", unit="byte"}')
     cpu_used_res = await query_prometheus('sum by(node) (kube_pod_container_resource_limits{resource="cpu", unit="core"})')
@@ -78,6 +149,7 @@ async def get_node_resources(db: Session = Depends(get_db)):
 
     # Collect GPU information
     gpu_data = await get_gpu_node_resources(db)
+    utilization = await get_node_utilization(window) if window else None
 
     result = []
     for node in NODE_NAMES.split(','):
@@ -99,7 +171,7 @@ async def get_node_resources(db: Session = Depends(get_db)):
                     }
                 })
 
-        result.append({
+        node_result = {
             "node": node,
             "cpu_total": round(c_total, 2),
             "cpu_used": round(c_used, 2),
@@ -108,9 +180,12 @@ async def get_node_resources(db: Session = Depends(get_db)):
             "memory_used": round(m_used, 2),
             "memory_remaining": round(m_total - m_used, 2),
             "gpu": node_gpu_list
-        })
+        }
+        if utilization is not None:
+            node_result["utilization"] = utilization.get(node) or {"window": window, "cpu": None, "memory": None, "gpu": None, "gpus": {}}
+        result.append(node_result)
 
-    return {"nodes": result}
+    return FastJSONResponse({"nodes": result})
 
 
 
@@ -172,45 +247,24 @@ async def get_gpu_resource(db: Session = Depends(get_db)):
 
     node_list = sorted(list(node_set))
 
-    return {
+    return FastJSONResponse({
         'nodeList': node_list,
         'gpuData': gpu_data
-    }
+    })
 
 @router.post("/update-gpu-resource")
-async def update_gpu_resource(db: Session = Depends(get_db)):
+async def update_gpu_resource(
+    node: Optional[str] = None,
+    phase: Optional[str] = None,
+    refresh: bool = False,
+    db: Session = Depends(get_db)
+):
     """
     Find GPU pod from k8s api
     Return pod info using GPU and update DB
+    Pods are listed page by page with node/phase field selectors; `refresh` bypasses the cached index.
     """
-    pods = v1_api.list_pod_for_all_namespaces(watch=False)
-
-    gpu_pods = []
-    for pod in pods.items:
-        containers = pod.spec.containers
-        for container in containers:
-            resources = container.resources
-            limits = resources.limits or {}
-            # Check for NVIDIA GPU resource requests
-            for key, value in limits.items():
-                if key.startswith("nvidia.com/") and int(value) > 0:
-                    split_pod_name = pod.metadata.name.split('-')
-                    if split_pod_name[0] == 'jupyter':
-                        user_name = '.'.join(split_pod_name[1:3])
-                    elif split_pod_name[0] == 'ailabServer':
-                        continue
-                    else:
-                        user_name = None
-                    pod_info = {
-                        "pod_name": pod.metadata.name,
-                        "namespace": pod.metadata.namespace,
-                        "node_name": pod.spec.node_name,
-                        "gpu_count": int(value),
-                        "container_name": container.name,
-                        "gpu_resource_type": key,
-                        "user": user_name
-                    }
-                    gpu_pods.append(pod_info)
+    gpu_pods = await kube_api.run(list_gpu_pods, node_name=node, phase=phase, refresh=refresh)
     data = await query_prometheus('DCGM_FI_DEV_MIG_MODE')
     for _data in data:
         app_logger.debug(f"Metrics data: {_data}")
@@ -222,4 +276,16 @@ async def update_gpu_resource(db: Session = Depends(get_db)):
 async def sync_gpu_flavors():
     await sync_flavors_to_db()  # Synchronize gpu_flavor table
     await sync_gpu_pod_status_from_prometheus()  # Synchronize servers table
-    return {"message": "GPU flavors and servers synced successfully"}
\ No newline at end of file
+    return {"message": "GPU flavors and servers synced successfully"}
+
+
+@router.get("/warm-pool")
+def get_warm_pool_stats():
+    """Warm pool target size and hit/miss counts per request shape"""
+    return {"enabled": warm_pool.enabled, "pools": warm_pool.stats()}
+
+
+@router.get("/idle-servers")
+async def get_idle_servers(db: Session = Depends(get_db)):
+    """Dry-run report of the idle culling policy: activity and the action it takes for every server"""
+    return FastJSONResponse({"enabled": IDLE_CULL_ENABLED, "servers": await idle_report(db)})
@@ -10,6 +10,7 @@ import websockets.exceptions
 from app.db.dependencies import get_db
 from app.models.k8s import PodCreation
 from app.core.logger import app_logger
+from app.core.culling import activity_tracker, is_user_message, is_user_request
 
 router = APIRouter()
 
@@ -41,6 +42,8 @@ async def proxy_http_request(
     full_path: str = "",
     db: Session = Depends(get_db)
 ):
+    if is_user_request(request.method):
+        activity_tracker.touch(instance_id)
     server_address = get_server_address(db, instance_id) + ":8888"
     # print(f"DEBUG: server_address = {server_address}")
     if not server_address:
@@ -210,7 +213,7 @@ async def proxy_websocket(websocket: WebSocket, user_name: str, instance_id: str
             
             # Create tasks
             client_to_jupyter = asyncio.create_task(
-                relay_client_to_jupyter(websocket, jupyter_ws)
+                relay_client_to_jupyter(websocket, jupyter_ws, instance_id)
             )
             jupyter_to_client = asyncio.create_task(
                 relay_jupyter_to_client(websocket, jupyter_ws)
@@ -298,12 +301,14 @@ async def cleanup_websocket_resources(websocket: WebSocket, jupyter_ws, db):
     import gc
     gc.collect()
 
-async def relay_client_to_jupyter(websocket: WebSocket, jupyter_ws):
+async def relay_client_to_jupyter(websocket: WebSocket, jupyter_ws, instance_id: str = None):
     """Relay messages from client to Jupyter"""
     try:
         while True:
             try:
                 msg = await websocket.receive_text()
+                if is_user_message(msg):  # running code or typing in a terminal, not an open tab
+                    activity_tracker.touch(instance_id)
                 # Improved connection state checking for websockets library
                 try:
                     await jupyter_ws.send(msg)
@@ -1,47 +1,76 @@
-import time
+import asyncio
 import uuid
-import re
-import requests
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from kubernetes.client.rest import ApiException
+import httpx
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.db.dependencies import get_db
-from app.models.k8s import PodCreation, PVC, pvc_server_association
+from app.models.k8s import PodCreation, PVC, ProvisionJob, ServerTermination, pvc_server_association
 from app.core.logger import app_logger
 from app.models.user import User
 from app.models.gpu import ServerGpuMapping, Flavor
-from app.schemas.k8s import EntireServerResponse, MyServerResponse, PodCreateRequest, DeleteRequest, PVCDropdownResponse, PVCListResponse, DeletePVCRequest
-from app.utils import get_current_user, get_bound_pv_name, delete_pvc, delete_pod, now_kst
-from app.core.config import NAMESPACE, v1_api, DATA_OBSERVER_URL
+from app.schemas.k8s import (
+    EntireServerResponse, MyServerResponse, PodCreateRequest, DeleteRequest, PVCDropdownResponse, PVCListResponse,
+    DeletePVCRequest, ProvisionJobResponse, BulkPodCreateRequest, BulkDeleteRequest, BulkDeletePVCRequest,
+    BulkItemResult, BulkResponse,
+)
+from app.utils import get_current_user, delete_pvc, run_bounded, now_kst
+from app.core.config import NAMESPACE, BULK_CONCURRENCY, BULK_MAX_ITEMS, SHARED_DATA_PATHS
+from app.core.data_observer import data_observer, observer_path
+from app.utils.json_codec import FastJSONResponse, dumps
+from app.core.placement import GPU_REQUESTS
+from app.core.admission import AdmissionDecision, check_admission, check_bulk_admission
+from app.core.provisioning import QUEUED, TERMINAL_STATUSES, job_broker, job_payload, start_provisioning
+from app.core.termination import TERMINATING, request_termination, start_finalizer, termination_payload
 
 router = APIRouter()
 
+# Upstream headers a download passes on to the client
+DOWNLOAD_HEADERS = (
+    "content-type", "content-length", "content-range", "accept-ranges", "content-disposition", "last-modified", "etag",
+)
+
 @router.get("/browse")
-def browse_files(path: str = "/"):
+async def browse_files(
+    path: str = "/",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    format: str = "json",
+):
     """
     Endpoint that receives a path, forwards it to data-observer-service, and returns the result
+    Listings come from a short-TTL cache; concurrent browses of a path share one upstream call.
+    `limit`/`cursor` page through large directories; format=ndjson relays the observer's stream unchanged.
     """
     try:
-        # Construct external service URL
-        base_url = f"{DATA_OBSERVER_URL}/browse"
-        
-        params = {"path": "/"+"/".join(path.split('/')[2:])}
-        app_logger.debug(f"Server creation params: {params}")
-        
-        # Request to external service
-        response = requests.get(base_url, params=params, timeout=20)
-        response.raise_for_status()
-        
-        # Check if response is JSON and return
-        try:
-            return response.json()
-        except ValueError:
-            # Return as text if not JSON
-            return {"data": response.text}
-            
-    except requests.exceptions.RequestException as e:
+        params = {"path": observer_path(path)}
+        app_logger.debug(f"Browse params: {params}")
+        if format == "ndjson":
+            upstream = await data_observer.open_stream("/browse", **params, format="ndjson")
+            return StreamingResponse(
+                upstream.aiter_raw(),
+                media_type=upstream.headers.get("content-type", "application/x-ndjson"),
+                background=BackgroundTask(upstream.aclose),
+            )
+
+        paging = {key: value for key, value in {"cursor": cursor, "limit": limit}.items() if value is not None}
+        content, content_type = await data_observer.browse(params["path"], **paging)
+
+        # JSON is forwarded as-is, no decode/re-encode round trip
+        if "application/json" in content_type:
+            return Response(content=content, media_type="application/json")
+        # Return as text if not JSON
+        return FastJSONResponse({"data": content.decode("utf-8", errors="replace")})
+
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500,
             detail=f"External service call failed: {str(e)}"
@@ -52,26 +81,128 @@ def browse_files(path: str = "/"):
             detail=f"Error occurred while browsing files: {str(e)}"
         )
 
+def upstream_error(e: httpx.HTTPError) -> HTTPException:
+    """The data observer's own status and detail for its 4xx answers, 500 for anything else"""
+    if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+        try:
+            detail = e.response.json().get("detail")
+        except ValueError:
+            detail = e.response.text
+        headers = {"Content-Range": e.response.headers["content-range"]} if "content-range" in e.response.headers else None
+        return HTTPException(status_code=e.response.status_code, detail=detail, headers=headers)
+    return HTTPException(status_code=500, detail=f"External service call failed: {str(e)}")
+
+def owned_file_path(
+    path: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> str:
+    """
+    Observer-side form of `path` if it lies in one of the current user's PVC directories
+    (or in SHARED_DATA_PATHS); file contents of other users' workspaces are refused with 403.
+    """
+    target = observer_path(path)
+    user_paths = db.query(PVC.path).filter(PVC.user_id == current_user.id, PVC.path.is_not(None), PVC.path != "")
+    roots = {observer_path(root) for (root,) in user_paths} | {observer_path(root) for root in SHARED_DATA_PATHS}
+    roots.discard("/")  # a malformed entry must not open up the whole volume
+    if not any(target == root or target.startswith(f"{root}/") for root in roots):
+        raise HTTPException(status_code=403, detail="Path is not in one of your volumes")
+    return target
+
+@router.get("/download")
+async def download_file(request: Request, target: str = Depends(owned_file_path)):
+    """
+    File contents from data-observer-service, relayed chunk by chunk without buffering them here.
+    Range headers are passed through, so downloads can resume and players can seek.
+    Only files in the user's own volumes (or shared paths) can be downloaded.
+    """
+    headers = {name: request.headers[name] for name in ("range", "if-range") if name in request.headers}
+    try:
+        upstream = await data_observer.open_stream("/download", headers=headers, path=target)
+    except httpx.HTTPError as e:
+        raise upstream_error(e)
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers={name: upstream.headers[name] for name in DOWNLOAD_HEADERS if name in upstream.headers},
+        background=BackgroundTask(upstream.aclose),
+    )
+
+@router.get("/preview")
+async def preview_file(
+    target: str = Depends(owned_file_path),
+    mode: str = Query("head", pattern="^(head|tail)$"),
+    lines: int = Query(50, ge=1, le=1000),
+):
+    """
+    First or last lines of a text/CSV file, read by data-observer-service without loading the whole file.
+    Same ownership rule as /download.
+    """
+    try:
+        response = await data_observer.get("/preview", path=target, mode=mode, lines=lines)
+    except httpx.HTTPError as e:
+        raise upstream_error(e)
+    return Response(content=response.content, media_type="application/json")
+
 @router.get("/list", response_model=list[EntireServerResponse])
-def get_servers(db: Session = Depends(get_db)):
-    pods = (
+def get_servers(
+    status: Optional[str] = None,
+    tag: Optional[str] = None,
+    user: Optional[str] = None,
+    node: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Servers newest first. Without `limit` and `cursor` every matching server is returned;
+    with either, pages of `limit` (default 100) come back and the X-Next-Cursor header of a
+    page, passed as `cursor`, gets the next one.
+    X-Total-Count carries the number of servers matching the filters.
+    """
+    filters = []
+    if status:
+        filters.append(PodCreation.status == status)
+    if tag:
+        filters.append(PodCreation.tags == tag)
+    if user:
+        filters.append(PodCreation.user.has(User.name == user))
+    if node:
+        filters.append(PodCreation.gpu_mappings.any(
+            ServerGpuMapping.gpu_flavor.has(Flavor.worker_node == node.strip().lower())
+        ))
+
+    total = db.query(func.count(PodCreation.id)).filter(*filters).scalar()
+
+    query = (
         db.query(PodCreation)
-        .all()
+        .options(
+            joinedload(PodCreation.user),
+            selectinload(PodCreation.gpu_mappings).joinedload(ServerGpuMapping.gpu_flavor),
+        )
+        .filter(*filters)
     )
+    query = query.order_by(PodCreation.id.desc())
+    next_cursor = None
+    if limit is None and cursor is None:
+        pods = query.all()
+    else:
+        limit = limit or 100
+        if cursor is not None:
+            query = query.filter(PodCreation.id < cursor)
+        # Fetch one extra row to know whether another page exists
+        pods = query.limit(limit + 1).all()
+        next_cursor = pods[limit - 1].id if len(pods) > limit else None
+        pods = pods[:limit]
 
     response = []
     for pod in pods:
-        # Get GPU mapping information for this server
-        gpu_mappings = (
-            db.query(ServerGpuMapping, Flavor)
-            .join(Flavor, ServerGpuMapping.gpu_id == Flavor.id)
-            .filter(ServerGpuMapping.server_id == pod.id)
-            .all()
-        )
-        
         # Generate node information (format: worker_node [gpu_id, mig_id])
         node_info = []
-        for mapping, flavor in gpu_mappings:
+        for mapping in pod.gpu_mappings:
+            flavor = mapping.gpu_flavor
+            if flavor is None:
+                continue
             if flavor.mig_id is not None:
                 node_info.append(f"{flavor.worker_node} [{flavor.gpu_id}, {flavor.mig_id}]")
             else:
@@ -81,17 +212,21 @@ def get_servers(db: Session = Depends(get_db)):
         if not node_info:
             node_info = ["None"]
         
-        response.append(EntireServerResponse(
-            userName=pod.user.name,
-            gpu=pod.gpu,
-            cpuMem=f'{pod.cpu}/{pod.memory}',
-            createdAt=pod.request_time,
-            status=pod.status,
-            node=node_info,
-            tags=pod.tags
-        ))
-    return response
-    # return {'data': db.query(PodCreation).all()}
+        # Rows are built here from DB data, so skip pydantic re-validation
+        response.append({
+            "userName": pod.user.name,
+            "gpu": pod.gpu,
+            "cpuMem": f'{pod.cpu}/{pod.memory}',
+            "createdAt": pod.request_time,
+            "status": pod.status,
+            "node": node_info,
+            "tags": pod.tags
+        })
+
+    headers = {"X-Total-Count": str(total)}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return FastJSONResponse(response, headers=headers)
 
 @router.get("/my-server", response_model=list[MyServerResponse])
 def get_my_servers(
@@ -152,226 +287,359 @@ def delete_pvc_endpoint(
     pvc = db.query(PVC).filter(PVC.pvc_name == request.name, PVC.user_id == current_user.id).first()
     if not pvc:
         raise HTTPException(status_code=404, detail="PVC not found or not authorized")
+    pvc_path = pvc.path
     delete_pvc(pvc.pvc_name, NAMESPACE, db=db, delete_db=True, delete_pv=request.pv)
+    data_observer.invalidate_client_path(pvc_path)
     return
 
-@router.delete("/delete-server", status_code=204)
-def delete_server(
+@router.delete("/delete-server", status_code=202)
+async def delete_server(
     request: DeleteRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Mark the server Terminating and return right away.
+    A background finalizer deletes the pod, waits until it is gone and only then releases
+    its GPUs and drops the row; the termination record keeps the actual release time.
+    """
+    payload, termination_id = await run_in_threadpool(begin_termination, db, request.name, current_user.id)
+    if termination_id is not None:
+        start_finalizer(termination_id)
+    return FastJSONResponse(payload, status_code=202)
+
+def begin_termination(db: Session, pod_name: str, user_id: int) -> tuple[dict, Optional[int]]:
+    """The server's pending termination, or a new one together with the id to finalize"""
     pod = (
         db.query(PodCreation)
-        .filter(PodCreation.pod_name == request.name, PodCreation.user_id == current_user.id)
+        .filter(PodCreation.pod_name == pod_name, PodCreation.user_id == user_id)
         .first()
     )
     if not pod:
         raise HTTPException(status_code=404, detail="Server not found or not authorized")
 
-    try:
-        # 1. First, set available to 0 for GPUs connected to this server (release GPU)
-        gpu_mappings = db.query(ServerGpuMapping).filter(ServerGpuMapping.server_id == pod.id).all()
-        for mapping in gpu_mappings:
-            gpu_flavor = db.query(Flavor).filter(Flavor.id == mapping.gpu_id).first()
-            if gpu_flavor:
-                gpu_flavor.available = 0
-        db.flush()
-        
-        # 2. Delete related records from server_gpu_mapping table
-        db.query(ServerGpuMapping).filter(ServerGpuMapping.server_id == pod.id).delete()
-        db.flush()
-        
-        pod.pvcs.clear()
-        db.flush()
-
-        db.delete(pod)
-        db.flush()
-            
-        delete_pod(pod.pod_name, NAMESPACE, db=db, delete_db=False)
-        db.commit()
-        # print(f"✅ Pod for server_name={pod.name} successfully deleted in a single transaction.")
-    except Exception as e:
-        app_logger.error(f"Transaction rollback due to: {e}")
-        raise e
-    return
+    record = pending_termination(db, pod.id)
+    if record is not None:
+        return termination_payload(record), None
+    (record,) = request_termination(db, [pod])
+    return termination_payload(record), record.id
 
-@router.post("/create-pod")
-def create_pod(
-    request: PodCreateRequest,
+def pending_termination(db: Session, server_id: int) -> Optional[ServerTermination]:
+    return (
+        db.query(ServerTermination)
+        .filter(ServerTermination.server_id == server_id, ServerTermination.status == TERMINATING)
+        .first()
+    )
+
+@router.get("/terminations")
+def get_terminations(
+    limit: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    gpu_mapping = {
-        '2g.20gb': ('nvidia.com/mig-2g.20gb',1),
-        '3g.40gb': ('nvidia.com/mig-3g.40gb',1),
-        '4g.40gb': ('nvidia.com/mig-4g.40gb',1),
-        'A100 80GB': ('nvidia.com/gpu',1),
-        'A100 80GB × 2': ('nvidia.com/gpu',2)
-    }
-    pod_created=False
-    existing_pvc = True
+    """The user's recent server terminations, with request and actual release times"""
+    records = (
+        db.query(ServerTermination)
+        .filter(ServerTermination.user_id == current_user.id)
+        .order_by(ServerTermination.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return FastJSONResponse([termination_payload(record) for record in records])
+
+
+def new_provision_job(request: PodCreateRequest, user_id: int, pvc_obj: Optional[PVC]) -> tuple[ProvisionJob, Optional[int]]:
+    """Validate a create request and build its (unsaved) job and the id of the PVC to reuse"""
+    if request.gpu != 'None' and request.gpu not in GPU_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"Unknown GPU type: {request.gpu}")
     # Generate unique pod name
     name = f"{request.name.replace(' ', '-')}-{uuid.uuid4().hex[:6]}"
     pod_name = f"ailabserver-{name}"
-    print(f"request : {request}")
 
-    # Recommended alternative name for the existing pvc variable is `existing_persistent_volume_claim`.
+    pvc_id = None
     if request.pvc:
-        existing_pvc = False
         pvc_name = f"ailabserver-claim-{name}"
+    else:
+        pvc_name = request.pvc_name
+        if not pvc_obj or pvc_obj.pvc_name != pvc_name:
+            raise HTTPException(status_code=404, detail="PVC not found")
+        pvc_id = pvc_obj.id
 
-        # Create PVC manifest
-        pvc_manifest = {
-            "apiVersion": "v1",
-            "kind": "PersistentVolumeClaim",
-            "metadata": {"name": pvc_name},
-            "spec": {
-                "accessModes": ["ReadWriteMany"],
-                "resources": {"requests": {"storage": "1Gi"}},
-            }
-        }
+    job = ProvisionJob(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        pod_name=pod_name,
+        pvc_name=pvc_name,
+        image=request.image,
+        gpu=request.gpu,
+        cpu=request.cpu,
+        memory=request.memory,
+        stage=QUEUED,
+        status="Pending",
+    )
+    return job, pvc_id
 
-        try:
-            v1_api.create_namespaced_persistent_volume_claim(
-                namespace=NAMESPACE,
-                body=pvc_manifest
-            )
-            try:
-                pv_name = get_bound_pv_name(pvc_name, NAMESPACE)
-                pvc_obj = PVC(
-                    user_id=current_user.id,
-                    pvc_name=f"{pvc_name}",
-                    pv=pv_name,
-                    path=f"/nfsvolume/{NAMESPACE}-{pvc_name}-{pv_name}"
-                )
-                db.add(pvc_obj)
-                db.commit()
-                db.refresh(pvc_obj)
-            except Exception as e:
-                delete_pvc(pvc_name, NAMESPACE)
-                
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to save PVC to DB: {str(e)}"
-                )
-        except ApiException as e:
-            raise HTTPException(status_code=e.status, detail=f"PVC creation failed: {e.body}")
 
-    else:
-        pvc_name = request.pvc_name
-        # check db
-        pvc_obj = (
-            db.query(PVC)
-            .filter(PVC.id == request.pvc_id)
-            .first()
+def save_new_jobs(db: Session, jobs: list[ProvisionJob]):
+    db.add_all(jobs)
+    db.commit()
+    for job in jobs:
+        db.refresh(job)
+
+
+def check_bulk_size(count: int):
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per bulk request")
+
+
+@router.post("/create-pod", status_code=202, response_model=ProvisionJobResponse)
+async def create_pod(
+    request: PodCreateRequest,
+    queue: bool = Query(False, description="Wait for capacity instead of being rejected"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start provisioning a server and return right away with the job to follow.
+    Progress: GET /server/jobs/{job_id} (polling) or /server/jobs/{job_id}/events (SSE).
+    Requests that do not fit the free GPUs/node capacity get 503 with the earliest expected
+    availability, or with ?queue=true a job that waits until they fit.
+    """
+    pvc_obj = None
+    if not request.pvc:
+        pvc_obj = await run_in_threadpool(
+            db.query(PVC).filter(PVC.id == request.pvc_id, PVC.user_id == current_user.id).first
         )
-        if pvc_obj.pvc_name != pvc_name:
-            raise HTTPException(status_code=404, detail="PVC not found")
-    
-    # Create Pod manifest
-    cpu = ''.join(re.findall(r'\d+', request.cpu))
-    memory = ''.join(re.findall(r'\d+', request.memory)) + 'Gi'
-    pod_manifest = {
-        "apiVersion": "v1",
-        "kind": "Pod",
-        "metadata": {
-            "name": pod_name,
-            "labels": {"app": "my-server"}
-        },
-        "spec": {
-            "containers": [
-                {
-                    "name": "server-container",
-                    "image": request.image,
-                    "command": ["bash", "-lc"],
-                    "args": [
-                        "jupyter lab --ip=0.0.0.0 --port=8888 --no-browser --ServerApp.token='' --ServerApp.root_dir=/home/jovyan/workspace"
-                    ],
-                    "ports": [{"containerPort": 8888}],
-                    "volumeMounts": [
-                        {"mountPath": f"/home/jovyan/workspace", "name": "storage-volume"},
-                        {"mountPath": "/home/share", "name": "shared-volume"}
-                    ],
-                    "resources": {
-                        "limits": {
-                            "cpu": cpu,
-                            "memory": memory
-                        }
-                    },
-                }
-            ],
-            "imagePullSecrets": [
-              {"name": "harbor-secret"}  
-            ],
-            "volumes": [
-                {"name": "storage-volume", "persistentVolumeClaim": {"claimName": pvc_name}},
-                {"name": "shared-volume", "persistentVolumeClaim": {"claimName": "ailabserver-claim-shared-<hashed>"}}
-            ],
-            "restartPolicy": "Never"
-        }
-    }
-    if request.gpu!='None':
-        gpu_name, gpu_cnt = gpu_mapping[request.gpu]
-        pod_manifest['spec']['containers'][0]['resources']['limits'][gpu_name] = gpu_cnt
+    job, pvc_id = new_provision_job(request, current_user.id, pvc_obj)
+
+    decision = await check_admission(db, request)
+    if not decision.admitted:
+        if not queue:
+            return admission_rejection(decision)
+        job.detail = f"Waiting for capacity: {decision.reason}"
+    await run_in_threadpool(save_new_jobs, db, [job])
+
+    start_provisioning(job.id, request, current_user.id, pvc_id, queued=not decision.admitted)
+    return FastJSONResponse(job_payload(job), status_code=202)
+
+
+def admission_rejection(decision: AdmissionDecision) -> Response:
+    headers = {}
+    if decision.earliest_available:
+        retry_after = (decision.earliest_available - now_kst()).total_seconds()
+        headers["Retry-After"] = str(max(int(retry_after), 1))
+    return FastJSONResponse(
+        {"detail": decision.reason, "earliest_available": decision.earliest_available},
+        status_code=503,
+        headers=headers,
+    )
+
+
+def get_user_job(db: Session, job_id: str, current_user: User) -> ProvisionJob:
+    job = db.query(ProvisionJob).filter(ProvisionJob.id == job_id, ProvisionJob.user_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or not authorized")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=ProvisionJobResponse)
+def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return FastJSONResponse(job_payload(get_user_job(db, job_id, current_user)))
+
+
+def refreshed_job_payload(db: Session, job: ProvisionJob) -> dict:
+    db.refresh(job)
+    return job_payload(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Server-sent events with every stage change of the job until it finishes"""
+    job = await run_in_threadpool(get_user_job, db, job_id, current_user)
+    queue = job_broker.subscribe(job_id)
+    # Read the state after subscribing so no update can fall in between
     try:
+        snapshot = await run_in_threadpool(refreshed_job_payload, db, job)
+    except Exception:
+        job_broker.unsubscribe(job_id, queue)
+        raise
+
+    async def event_stream():
+        try:
+            payload = snapshot
+            while True:
+                yield b"data: " + dumps(payload) + b"\n\n"
+                if payload["status"] in TERMINAL_STATUSES:
+                    return
+                payload = None
+                while payload is None:
+                    try:
+                        payload = await asyncio.wait_for(queue.get(), timeout=15)
+                    except asyncio.TimeoutError:
+                        yield b": keep-alive\n\n"
+        finally:
+            job_broker.unsubscribe(job_id, queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 
-        v1_api.create_namespaced_pod(
-            namespace=NAMESPACE,
-            body=pod_manifest
+@router.post("/bulk/create-pod", status_code=202, response_model=BulkResponse)
+async def bulk_create_pods(
+    request: BulkPodCreateRequest,
+    queue: bool = Query(False, description="Queue servers that do not fit instead of rejecting them"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start one provisioning job per server, all saved in a single transaction.
+    At most BULK_CONCURRENCY of them talk to Kubernetes at a time; the rest wait as Queued.
+    Servers are admitted like /create-pod, against one capacity snapshot for the whole batch:
+    those that do not fit are Rejected, or with ?queue=true wait until they fit.
+    """
+    check_bulk_size(len(request.servers))
+    pvc_ids = {server.pvc_id for server in request.servers if not server.pvc}
+    pvcs = {
+        pvc.id: pvc
+        for pvc in await run_in_threadpool(db.query(PVC).filter(PVC.id.in_(pvc_ids), PVC.user_id == current_user.id).all)
+    } if pvc_ids else {}
+
+    results, valid = [], []
+    for server in request.servers:
+        try:
+            job, pvc_id = new_provision_job(server, current_user.id, pvcs.get(server.pvc_id))
+        except HTTPException as e:
+            results.append(BulkItemResult(name=server.name, status="Failed", detail=e.detail))
+            continue
+        valid.append((job, server, pvc_id, len(results)))
+        results.append(None)
+
+    decisions = await check_bulk_admission(db, [server for _, server, _, _ in valid])
+    accepted = []
+    for (job, server, pvc_id, index), decision in zip(valid, decisions):
+        if not decision.admitted:
+            if not queue:
+                results[index] = BulkItemResult(name=server.name, status="Rejected", detail=decision.reason)
+                continue
+            job.detail = f"Waiting for capacity: {decision.reason}"
+        accepted.append((job, server, pvc_id, not decision.admitted))
+        results[index] = BulkItemResult(name=server.name, status="Accepted", job_id=job.id)
+    await run_in_threadpool(save_new_jobs, db, [job for job, _, _, _ in accepted])
+
+    limiter = asyncio.Semaphore(BULK_CONCURRENCY)
+    # Admitted jobs first, so they do not wait for a limiter slot behind ones waiting for capacity
+    for job, server, pvc_id, queued in sorted(accepted, key=lambda item: item[3]):
+        start_provisioning(job.id, server, current_user.id, pvc_id, limiter=limiter, queued=queued)
+    return BulkResponse(results=results)
+
+
+@router.delete("/bulk/delete-server", status_code=202, response_model=BulkResponse)
+async def bulk_delete_servers(
+    request: BulkDeleteRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Mark many servers Terminating in one transaction and finalize them in the background.
+    At most BULK_CONCURRENCY pod deletions are sent to Kubernetes at a time.
+    """
+    check_bulk_size(len(request.names))
+    names = list(dict.fromkeys(request.names))
+    found, termination_ids = await run_in_threadpool(begin_bulk_termination, db, names, current_user.id)
+    if termination_ids:
+        limiter = asyncio.Semaphore(BULK_CONCURRENCY)
+        for termination_id in termination_ids:
+            start_finalizer(termination_id, limiter=limiter)
+
+    results = []
+    for name in names:
+        if name not in found:
+            results.append(BulkItemResult(name=name, status="NotFound", detail="Server not found or not authorized"))
+        else:
+            results.append(BulkItemResult(name=name, status=TERMINATING))
+    return BulkResponse(results=results)
+
+
+def begin_bulk_termination(db: Session, names: list[str], user_id: int) -> tuple[set[str], list[int]]:
+    """Names of the user's servers among names, and the ids of the terminations newly recorded for them"""
+    pods = (
+        db.query(PodCreation)
+        .filter(PodCreation.pod_name.in_(names), PodCreation.user_id == user_id)
+        .all()
+    )
+    found = {pod.pod_name for pod in pods}
+    already = {
+        server_id
+        for (server_id,) in db.query(ServerTermination.server_id).filter(
+            ServerTermination.server_id.in_([pod.id for pod in pods]), ServerTermination.status == TERMINATING
         )
-        
-        # Save Pod creation record to DB
-        pod_record = PodCreation(
-            user_id=current_user.id,
-            description=request.description,
-            # server_name=pod_name,
-            server_name=request.name,
-            pod_name=pod_name,
-            cpu=request.cpu,
-            memory=request.memory,
-            gpu=request.gpu,
-            request_time=now_kst(),
-            internal_ip='',
-            status='Creating',
-            tags='LEGEND' 
+    } if pods else set()
+    new = [pod for pod in pods if pod.id not in already]
+    if not new:
+        return found, []
+    return found, [record.id for record in request_termination(db, new)]
+
+
+@router.delete("/bulk/delete-pvc", response_model=BulkResponse)
+async def bulk_delete_pvcs(
+    request: BulkDeletePVCRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete many PVCs (and optionally their PVs) in parallel, then their rows in one statement"""
+    check_bulk_size(len(request.names))
+    names = list(dict.fromkeys(request.names))
+    owned, in_use = await run_in_threadpool(find_user_pvcs, db, names, current_user.id)
+    deletable = [name for name in names if name in owned and name not in in_use]
+
+    outcomes = await run_bounded(
+        lambda pvc_name: delete_pvc(pvc_name, NAMESPACE, delete_pv=request.pv, raise_errors=True),
+        deletable,
+    )
+    outcome_by_name = dict(zip(deletable, outcomes))
+    deleted = [name for name, outcome in outcome_by_name.items() if not isinstance(outcome, Exception)]
+    if deleted:
+        await run_in_threadpool(drop_pvc_rows, db, deleted, current_user.id)
+        for name in deleted:
+            data_observer.invalidate_client_path(owned[name])
+
+    results = []
+    for name in names:
+        if name not in owned:
+            results.append(BulkItemResult(name=name, status="NotFound", detail="PVC not found or not authorized"))
+        elif name in in_use:
+            results.append(BulkItemResult(name=name, status="Failed", detail="PVC is mounted by a server"))
+        elif isinstance(outcome_by_name[name], Exception):
+            results.append(BulkItemResult(name=name, status="Failed", detail=str(outcome_by_name[name])))
+        else:
+            results.append(BulkItemResult(name=name, status="Deleted"))
+    return BulkResponse(results=results)
+
+
+def find_user_pvcs(db: Session, names: list[str], user_id: int) -> tuple[dict[str, str], set[str]]:
+    """Paths of the user's PVCs among names, and which of them a server still mounts"""
+    owned = {
+        pvc_name: path
+        for pvc_name, path in db.query(PVC.pvc_name, PVC.path).filter(PVC.pvc_name.in_(names), PVC.user_id == user_id)
+    }
+    in_use = {
+        pvc_name
+        for (pvc_name,) in (
+            db.query(PVC.pvc_name)
+            .join(pvc_server_association, pvc_server_association.c.pvc_id == PVC.id)
+            .filter(PVC.pvc_name.in_(owned))
         )
-        
-        pod_created = True
+    }
+    return owned, in_use
 
-        db.add(pod_record)
-        db.commit()
-        db.refresh(pod_record)
-        
-        timeout = 180
-        start_time = time.time()
-        internal_ip = None
-        while time.time() - start_time < timeout:
-            pod_status = v1_api.read_namespaced_pod(name=pod_name, namespace=NAMESPACE)
-            internal_ip = pod_status.status.pod_ip
-            if internal_ip:
-                break
-            time.sleep(2)
-
-        if not internal_ip:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Pod did not receive an internal IP within timeout period"
-            )
-        pod_record.internal_ip = internal_ip
-        pod_record.status="Running"
-        pod_record.pvcs.append(pvc_obj)
-        db.commit()
-        db.refresh(pod_record)
-    except ApiException as e:
-        print(f"Pod creation failed: {e.body}")
-        raise HTTPException(status_code=e.status, detail=f"Pod creation failed: {e.body}") 
-    except Exception as e:
-        if pod_created:
-            delete_pod(pod_name, NAMESPACE, db=db, delete_db=True)
-        if not existing_pvc:
-            delete_pvc(pvc_name, NAMESPACE, db=db, delete_db=True)
-        raise e
-
-    return {"detail": "Success!"}
-    
\ No newline at end of file
+
+def drop_pvc_rows(db: Session, names: list[str], user_id: int):
+    db.query(PVC).filter(PVC.pvc_name.in_(names), PVC.user_id == user_id).delete(synchronize_session=False)
+    db.commit()
@@ -5,14 +5,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from kubernetes.client.rest import ApiException
 
-from app.schemas.k8s import PVCResponse, DeleteRequest, NFSPVCCreateRequest
-from app.models.k8s import PVC
+from app.schemas.k8s import PVCResponse, PVCUsageResponse, DeleteRequest, NFSPVCCreateRequest
+from app.models.k8s import PVC, PVCUsage
 from app.core.logger import app_logger
 from app.models.user import User
 
 from app.utils import get_current_user, delete_pvc, now_kst
 from app.db.dependencies import get_db
-from app.core.config import NAMESPACE, v1_api
+from app.core.config import NAMESPACE, kube_api
+from app.core.data_observer import data_observer
 
 
 router = APIRouter()
@@ -82,10 +83,10 @@ async def create_nfs_storage(
         }
         
         # Create PV
-        v1_api.create_persistent_volume(body=pv_manifest)
+        await kube_api.create_persistent_volume(body=pv_manifest)
         
         # Create PVC
-        v1_api.create_namespaced_persistent_volume_claim(
+        await kube_api.create_namespaced_persistent_volume_claim(
             namespace=NAMESPACE,
             body=pvc_manifest
         )
@@ -114,8 +115,8 @@ async def create_nfs_storage(
     except ApiException as e:
         # Cleanup on creation failure
         try:
-            v1_api.delete_namespaced_persistent_volume_claim(name=pvc_name, namespace=NAMESPACE)
-            v1_api.delete_persistent_volume(name=pv_name)
+            await kube_api.delete_namespaced_persistent_volume_claim(name=pvc_name, namespace=NAMESPACE)
+            await kube_api.delete_persistent_volume(name=pv_name)
         except:
             pass
         raise HTTPException(
@@ -125,8 +126,8 @@ async def create_nfs_storage(
     except Exception as e:
         # Cleanup on creation failure
         try:
-            v1_api.delete_namespaced_persistent_volume_claim(name=pvc_name, namespace=NAMESPACE)
-            v1_api.delete_persistent_volume(name=pv_name)
+            await kube_api.delete_namespaced_persistent_volume_claim(name=pvc_name, namespace=NAMESPACE)
+            await kube_api.delete_persistent_volume(name=pv_name)
         except:
             pass
         raise HTTPException(
@@ -139,6 +140,33 @@ async def get_storage_list(db: Session = Depends(get_db), current_user: User = D
     pvcs = db.query(PVC).filter(PVC.user_id == current_user.id).all()
     return pvcs
 
+@router.get("/usage", response_model=List[PVCUsageResponse])
+def get_storage_usage(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Used space of all of the user's PVCs in one call, as last measured by the scheduled
+    usage refresh (see measured_at); nothing is walked on the volume for this request.
+    """
+    rows = (
+        db.query(PVC, PVCUsage)
+        .outerjoin(PVCUsage, PVCUsage.pvc_id == PVC.id)
+        .filter(PVC.user_id == current_user.id)
+        .order_by(PVC.id)
+        .all()
+    )
+    return [
+        PVCUsageResponse(
+            pvc_id=pvc.id,
+            pvc_name=pvc.pvc_name,
+            path=pvc.path,
+            used_bytes=usage.used_bytes if usage else None,
+            file_count=usage.file_count if usage else None,
+            directory_count=usage.directory_count if usage else None,
+            measured_at=usage.measured_at if usage else None,
+            detail=usage.detail if usage else None,
+        )
+        for pvc, usage in rows
+    ]
+
 @router.delete("/storage", status_code=204)
 async def delete_storage_by_name(
     request: DeleteRequest,
@@ -152,13 +180,16 @@ async def delete_storage_by_name(
         raise HTTPException(status_code=404, detail="PVC not found or not authorized")
 
     try:
-        delete_pvc(
+        pvc_path = pvc.path
+        await kube_api.run(
+            delete_pvc,
             pvc_name=pvc.pvc_name,
             namespace=NAMESPACE,
             db=db,
             delete_db=True,
             delete_pv=True
         )
+        data_observer.invalidate_client_path(pvc_path)
         return
     except Exception as e:
         app_logger.error(f"PVC deletion failed: {e}")
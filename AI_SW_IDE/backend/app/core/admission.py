@@ -0,0 +1,217 @@
+# app/core/admission.py
+import copy
+import datetime
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import NODE_CAPACITY_TTL, TERMINATION_TIMEOUT, v1_api, kube_api
+from app.core.logger import app_logger
+from app.core.placement import GPU_REQUESTS, GpuRequest, Inventory, Placement, ranked_placements
+from app.core.warm_pool import warm_pool, request_key
+from app.models.gpu import GpuReservation, ServerGpuMapping
+from app.models.k8s import ServerTermination
+from app.schemas.k8s import PodCreateRequest
+from app.utils import iter_pods
+from app.utils.cache import TTLCache
+
+MEMORY_UNITS = {
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40,
+    "K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9, "T": 10 ** 12,
+}
+QUANTITY_PATTERN = re.compile(r"^([0-9.]+)([A-Za-z]*)$")
+
+# node -> {"cpu": free cores, "memory": free bytes}
+node_capacity_cache = TTLCache(ttl=NODE_CAPACITY_TTL, maxsize=1)
+
+
+@dataclass
+class AdmissionDecision:
+    admitted: bool
+    reason: Optional[str] = None
+    node: Optional[str] = None
+    earliest_available: Optional[datetime.datetime] = None
+    placement: Optional[Placement] = None
+
+
+def parse_cpu(quantity: str) -> float:
+    """Kubernetes CPU quantity in cores ("500m" -> 0.5)"""
+    quantity = str(quantity)
+    if quantity.endswith("m"):
+        return float(quantity[:-1]) / 1000
+    return float(quantity)
+
+
+def parse_memory(quantity: str) -> float:
+    """Kubernetes memory quantity in bytes"""
+    match = QUANTITY_PATTERN.match(str(quantity))
+    if not match:
+        return 0.0
+    value, unit = match.groups()
+    return float(value) * MEMORY_UNITS.get(unit, 1)
+
+
+def requested_resources(request: PodCreateRequest) -> tuple[float, float]:
+    """CPU cores and memory bytes of a create request, read the way build_pod_manifest does"""
+    cpu = float(''.join(re.findall(r'\d+', request.cpu)) or 0)
+    memory = float(''.join(re.findall(r'\d+', request.memory)) or 0) * MEMORY_UNITS["Gi"]
+    return cpu, memory
+
+
+def node_headroom(refresh: bool = False) -> dict[str, dict]:
+    """Allocatable minus requested CPU/memory of every schedulable, ready node (cached)"""
+    if not refresh:
+        cached = node_capacity_cache.get("nodes")
+        if cached is not None:
+            return cached
+
+    headroom = {}
+    for node in v1_api.list_node().items:
+        ready = any(c.type == "Ready" and c.status == "True" for c in (node.status.conditions or []))
+        if node.spec.unschedulable or not ready:
+            continue
+        allocatable = node.status.allocatable or {}
+        headroom[node.metadata.name] = {
+            "cpu": parse_cpu(allocatable.get("cpu", "0")),
+            "memory": parse_memory(allocatable.get("memory", "0")),
+        }
+
+    for pod in iter_pods(field_selector="status.phase!=Succeeded,status.phase!=Failed"):
+        node_name = pod.get("spec", {}).get("nodeName")
+        if node_name not in headroom:
+            continue
+        for container in pod["spec"].get("containers", []):
+            resources = container.get("resources") or {}
+            # Pods created here only set limits, which then also act as requests
+            requests = resources.get("requests") or resources.get("limits") or {}
+            headroom[node_name]["cpu"] -= parse_cpu(requests.get("cpu", "0"))
+            headroom[node_name]["memory"] -= parse_memory(requests.get("memory", "0"))
+
+    node_capacity_cache.set("nodes", headroom)
+    return headroom
+
+
+def fits(headroom: Optional[dict], node: str, cpu: float, memory: float) -> bool:
+    if headroom is None:  # capacity unknown: leave the decision to the scheduler
+        return True
+    free = headroom.get(node)
+    return free is not None and free["cpu"] >= cpu and free["memory"] >= memory
+
+
+def earliest_availability(db: Session, gpu_request: GpuRequest) -> Optional[datetime.datetime]:
+    """
+    When a matching slice is expected to free up: a lease that lapses unless bound,
+    or a server being terminated. None if nothing is known to be on its way out.
+    """
+    inventory = Inventory.from_db(db)
+    matching = [s.flavor_id for s in inventory.slices.values() if s.matches(gpu_request)]
+    if not matching:
+        return None
+
+    candidates = [
+        expires_at
+        for (expires_at,) in db.query(GpuReservation.expires_at).filter(
+            GpuReservation.flavor_id.in_(matching), GpuReservation.expires_at.is_not(None)
+        )
+    ]
+    candidates += [
+        requested_at + datetime.timedelta(seconds=TERMINATION_TIMEOUT)
+        for (requested_at,) in (
+            db.query(ServerTermination.requested_at)
+            .join(ServerGpuMapping, ServerGpuMapping.server_id == ServerTermination.server_id)
+            .filter(ServerTermination.status == "Terminating", ServerGpuMapping.gpu_id.in_(matching))
+        )
+    ]
+    return min(candidates, default=None)
+
+
+def admit(db: Session, request: PodCreateRequest, headroom: Optional[dict],
+          inventory: Optional[Inventory] = None) -> AdmissionDecision:
+    """Check a create request against the GPU inventory and node headroom, without touching Kubernetes"""
+    cpu, memory = requested_resources(request)
+
+    if request.gpu == 'None':
+        if headroom is None:
+            return AdmissionDecision(admitted=True)
+        for node in headroom:
+            if fits(headroom, node, cpu, memory):
+                return AdmissionDecision(admitted=True, node=node)
+        return AdmissionDecision(admitted=False, reason=f"No node has {cpu:g} CPU and {request.memory} memory free")
+
+    gpu_request = GPU_REQUESTS[request.gpu]
+    has_slice = False
+    for candidate in ranked_placements(inventory or Inventory.from_db(db), gpu_request):
+        has_slice = True
+        if fits(headroom, candidate.node, cpu, memory):
+            return AdmissionDecision(admitted=True, node=candidate.node, placement=candidate)
+
+    if has_slice:
+        reason = f"Nodes with a free {request.gpu} do not have {cpu:g} CPU and {request.memory} memory free"
+    else:
+        reason = f"No free {request.gpu} available"
+    return AdmissionDecision(
+        admitted=False,
+        reason=reason,
+        earliest_available=earliest_availability(db, gpu_request),
+    )
+
+
+def take_capacity(inventory: Inventory, headroom: Optional[dict], request: PodCreateRequest, decision: AdmissionDecision):
+    """Remove what an admitted request will use from a capacity snapshot"""
+    if decision.placement:
+        inventory.allocate(decision.placement.flavor_ids)
+    if headroom is not None and decision.node in headroom:
+        cpu, memory = requested_resources(request)
+        headroom[decision.node]["cpu"] -= cpu
+        headroom[decision.node]["memory"] -= memory
+
+
+async def node_headroom_or_none() -> Optional[dict]:
+    try:
+        return await kube_api.run(node_headroom)
+    except Exception as e:
+        app_logger.warning(f"Node capacity unavailable, admitting on GPU inventory only: {e}")
+        return None
+
+
+def admit_batch(db: Session, requests: list[PodCreateRequest], headroom: Optional[dict],
+                ready: Counter) -> list[AdmissionDecision]:
+    inventory = Inventory.from_db(db)
+    decisions = []
+    for request in requests:
+        key = request_key(request)
+        if request.pvc and ready[key]:
+            ready[key] -= 1  # provisioning tries the pool first
+            decisions.append(AdmissionDecision(admitted=True))
+            continue
+        decision = admit(db, request, headroom, inventory)
+        if decision.admitted:
+            take_capacity(inventory, headroom, request, decision)
+        decisions.append(decision)
+    return decisions
+
+
+async def check_bulk_admission(db: Session, requests: list[PodCreateRequest]) -> list[AdmissionDecision]:
+    """
+    Admission of a batch against one capacity snapshot. Each admitted request takes its pool pod,
+    or its slices and CPU/memory, out of the snapshot before the next one is checked, so the
+    batch cannot be admitted onto the same free capacity twice.
+    """
+    headroom = copy.deepcopy(await node_headroom_or_none())  # the cached snapshot is shared
+    ready = await warm_pool.ready_counts()
+    return await run_in_threadpool(admit_batch, db, requests, headroom, ready)
+
+
+async def check_admission(db: Session, request: PodCreateRequest) -> AdmissionDecision:
+    """
+    Capacity check of a create request. A ready pool pod of the request's shape also admits it:
+    the pod already holds its GPU and node room, and provisioning takes it before leasing anything.
+    """
+    decision = await run_in_threadpool(admit, db, request, await node_headroom_or_none())
+    if not decision.admitted and request.pvc and (await warm_pool.ready_counts())[request_key(request)]:
+        return AdmissionDecision(admitted=True)
+    return decision
@@ -3,6 +3,8 @@ import os
 from kubernetes import client, config
 from dotenv import load_dotenv
 
+from app.core.kube import RetryingApiClient, AsyncKubeApi
+
 
 load_dotenv(dotenv_path='./prod.env')
 try:
@@ -24,7 +26,14 @@ except Exception as e:
     client.Configuration.set_default(configuration)
     
     
-v1_api = client.CoreV1Api()
+K8S_QPS = float(os.getenv("K8S_QPS", "20"))
+K8S_BURST = int(os.getenv("K8S_BURST", "40"))
+K8S_MAX_RETRIES = int(os.getenv("K8S_MAX_RETRIES", "3"))
+K8S_MAX_WORKERS = int(os.getenv("K8S_MAX_WORKERS", "16"))
+
+v1_api = client.CoreV1Api(RetryingApiClient(qps=K8S_QPS, burst=K8S_BURST, max_retries=K8S_MAX_RETRIES))
+# Async code reaches the API through kube_api, never by blocking the event loop on v1_api
+kube_api = AsyncKubeApi(v1_api, max_workers=K8S_MAX_WORKERS)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://<DB_USER>:<DB_PASSWORD>@<DB_HOST>:<DB_PORT>/<DB_NAME>")
 SECRET_KEY = os.getenv("SECRET_KEY", "<YOUR_SECRET_KEY>")
@@ -37,4 +46,33 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:4000,http://127.0.0.1
 APP_PORT = int(os.getenv("APP_PORT", "8000"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 GPU_FETCH = int(os.getenv("GPU_FETCH", "30"))
-NFS_ADDRESS = os.getenv("NFS_ADDRESS", "<YOUR_NFS_SERVER_IP>")
\ No newline at end of file
+NFS_ADDRESS = os.getenv("NFS_ADDRESS", "<YOUR_NFS_SERVER_IP>")
+PROMETHEUS_RANGE_CACHE_TTL = int(os.getenv("PROMETHEUS_RANGE_CACHE_TTL", "60"))
+K8S_LIST_PAGE_SIZE = int(os.getenv("K8S_LIST_PAGE_SIZE", "500"))
+GPU_POD_INDEX_TTL = int(os.getenv("GPU_POD_INDEX_TTL", "30"))
+GPU_LEASE_SECONDS = int(os.getenv("GPU_LEASE_SECONDS", "300"))
+PROVISION_TIMEOUT = int(os.getenv("PROVISION_TIMEOUT", "180"))
+JUPYTER_READY_TIMEOUT = int(os.getenv("JUPYTER_READY_TIMEOUT", "120"))
+WARM_POOL_ENABLED = os.getenv("WARM_POOL_ENABLED", "false").lower() == "true"
+WARM_POOL_MAX_PER_KEY = int(os.getenv("WARM_POOL_MAX_PER_KEY", "2"))
+WARM_POOL_MIN_REQUESTS = int(os.getenv("WARM_POOL_MIN_REQUESTS", "3"))
+WARM_POOL_HISTORY_HOURS = int(os.getenv("WARM_POOL_HISTORY_HOURS", "72"))
+WARM_POOL_INTERVAL = int(os.getenv("WARM_POOL_INTERVAL", "60"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "100"))
+TERMINATION_TIMEOUT = int(os.getenv("TERMINATION_TIMEOUT", "120"))
+IDLE_CULL_ENABLED = os.getenv("IDLE_CULL_ENABLED", "false").lower() == "true"
+IDLE_CULL_DRY_RUN = os.getenv("IDLE_CULL_DRY_RUN", "true").lower() == "true"
+IDLE_CULL_CONNECTED = os.getenv("IDLE_CULL_CONNECTED", "false").lower() == "true"
+IDLE_TIMEOUT_HOURS = float(os.getenv("IDLE_TIMEOUT_HOURS", "72"))
+IDLE_GPU_TIMEOUT_HOURS = float(os.getenv("IDLE_GPU_TIMEOUT_HOURS", "24"))
+IDLE_CHECK_INTERVAL = int(os.getenv("IDLE_CHECK_INTERVAL", "600"))
+IDLE_POLL_CONCURRENCY = int(os.getenv("IDLE_POLL_CONCURRENCY", "16"))
+DATA_OBSERVER_TIMEOUT = float(os.getenv("DATA_OBSERVER_TIMEOUT", "20"))
+BROWSE_CACHE_TTL = int(os.getenv("BROWSE_CACHE_TTL", "10"))
+NODE_CAPACITY_TTL = int(os.getenv("NODE_CAPACITY_TTL", "15"))
+PROVISION_QUEUE_TIMEOUT = int(os.getenv("PROVISION_QUEUE_TIMEOUT", "1800"))
+# Client paths (e.g. /nfsvolume/shared) every user may download and preview from, besides their own PVCs
+SHARED_DATA_PATHS = [path for path in os.getenv("SHARED_DATA_PATHS", "").split(",") if path]
+PVC_USAGE_ENABLED = os.getenv("PVC_USAGE_ENABLED", "true").lower() == "true"
+PVC_USAGE_INTERVAL = int(os.getenv("PVC_USAGE_INTERVAL", "900"))
@@ -0,0 +1,190 @@
+# app/core/culling.py
+import asyncio
+import datetime
+import json
+import time
+from typing import Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    IDLE_CULL_DRY_RUN, IDLE_TIMEOUT_HOURS, IDLE_GPU_TIMEOUT_HOURS,
+    IDLE_CULL_CONNECTED, IDLE_POLL_CONCURRENCY,
+)
+from app.core.logger import app_logger
+from app.core.termination import request_termination, start_finalizer, TERMINATING
+from app.db.session import SessionLocal
+from app.models.k8s import PodCreation
+from app.utils import now_kst
+
+
+# Reads JupyterLab also sends on its own timers (kernel/session/contents polling)
+PASSIVE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def is_user_request(method: str) -> bool:
+    """Proxied HTTP requests that only a user action sends (saving, renaming, starting a kernel...)"""
+    return method.upper() not in PASSIVE_METHODS
+
+
+def is_user_message(message: str) -> bool:
+    """
+    Client websocket messages that only a user action sends: kernel execute_request, terminal input.
+    Heartbeats, status and completion/inspection requests from an open tab do not count.
+    """
+    if "execute_request" not in message and "stdin" not in message:
+        return False  # cheap check before parsing every relayed frame
+    try:
+        payload = json.loads(message)
+    except ValueError:
+        return False
+    if isinstance(payload, dict):
+        return (payload.get("header") or {}).get("msg_type") == "execute_request"
+    return isinstance(payload, list) and bool(payload) and payload[0] == "stdin"
+
+
+class ActivityTracker:
+    """Last time the proxy relayed user-driven traffic for each server (instance_id), kept in memory"""
+
+    def __init__(self):
+        # Until a server is seen, activity counts from process start: a restart must not make
+        # every server look idle
+        self.started = now_kst()
+        self._seen: dict[int, float] = {}
+
+    def touch(self, instance_id):
+        try:
+            self._seen[int(instance_id)] = time.time()
+        except (TypeError, ValueError):
+            pass
+
+    def last_seen(self, server_id: int) -> datetime.datetime:
+        seen = self._seen.get(server_id)
+        if seen is None:
+            return self.started
+        return datetime.datetime.fromtimestamp(seen, tz=self.started.tzinfo)
+
+    def forget(self, server_id: int):
+        self._seen.pop(server_id, None)
+
+
+activity_tracker = ActivityTracker()
+
+
+def parse_jupyter_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+async def poll_jupyter(client: httpx.AsyncClient, internal_ip: str) -> Optional[dict]:
+    """
+    Kernel activity of one Jupyter server, None if it cannot be reached.
+    The status' own last_activity is not used: it counts API calls, so this
+    polling of /api/kernels would keep every server looking active.
+    """
+    base = f"http://{internal_ip}:8888/api"
+    try:
+        status = (await client.get(f"{base}/status")).json()
+        kernels = (await client.get(f"{base}/kernels")).json() if status.get("kernels") else []
+    except (httpx.HTTPError, ValueError):
+        return None
+    activity = [parse_jupyter_time(status.get("started"))]
+    activity += [parse_jupyter_time(k.get("last_activity")) for k in kernels]
+    return {
+        "last_activity": max((a for a in activity if a), default=None),
+        "busy": any(k.get("execution_state") == "busy" for k in kernels),
+        "connections": status.get("connections", 0),
+        "kernels": len(kernels),
+    }
+
+
+def idle_threshold(server: PodCreation) -> datetime.timedelta:
+    hours = IDLE_TIMEOUT_HOURS if server.gpu in (None, "", "None") else IDLE_GPU_TIMEOUT_HOURS
+    return datetime.timedelta(hours=hours)
+
+
+async def idle_report(db: Session) -> list[dict]:
+    """
+    Activity of every dashboard server, with the action the policy would take.
+    Jupyter servers are polled concurrently, at most IDLE_POLL_CONCURRENCY at a time.
+    """
+    servers = (
+        db.query(PodCreation)
+        .filter(PodCreation.tags == "LEGEND", PodCreation.status == "Running", PodCreation.internal_ip != "")
+        .all()
+    )
+    semaphore = asyncio.Semaphore(IDLE_POLL_CONCURRENCY)
+
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        async def poll(server: PodCreation):
+            async with semaphore:
+                return await poll_jupyter(client, server.internal_ip)
+
+        polled = await asyncio.gather(*(poll(server) for server in servers))
+
+    now = now_kst()
+    report = []
+    for server, jupyter in zip(servers, polled):
+        last_activity = activity_tracker.last_seen(server.id)
+        if jupyter and jupyter["last_activity"]:
+            last_activity = max(last_activity, jupyter["last_activity"])
+        threshold = idle_threshold(server)
+
+        if jupyter is None:
+            action, reason = "keep", "Jupyter unreachable"
+        elif jupyter["busy"]:
+            action, reason = "keep", "kernel busy"
+        elif jupyter["connections"] and not IDLE_CULL_CONNECTED:
+            action, reason = "keep", "browser connected"
+        elif now - last_activity < threshold:
+            action, reason = "keep", "recently active"
+        else:
+            action, reason = "cull", f"idle longer than {threshold.total_seconds() / 3600:g}h"
+
+        report.append({
+            "server_id": server.id,
+            "pod_name": server.pod_name,
+            "user_id": server.user_id,
+            "gpu": server.gpu,
+            "last_activity": last_activity,
+            "idle_hours": round((now - last_activity).total_seconds() / 3600, 2),
+            "threshold_hours": threshold.total_seconds() / 3600,
+            "kernels": jupyter["kernels"] if jupyter else None,
+            "connections": jupyter["connections"] if jupyter else None,
+            "action": action,
+            "reason": reason,
+        })
+    return report
+
+
+async def cull_idle_servers(dry_run: bool = IDLE_CULL_DRY_RUN) -> list[dict]:
+    """Terminate servers the policy marks as idle; in dry-run mode only log them"""
+    db = SessionLocal()
+    try:
+        report = await idle_report(db)
+        idle = [entry for entry in report if entry["action"] == "cull"]
+        if not idle:
+            return report
+        names = ", ".join(entry["pod_name"] for entry in idle)
+        if dry_run:
+            app_logger.info(f"Idle culling (dry run) would terminate: {names}")
+            return report
+
+        servers = (
+            db.query(PodCreation)
+            .filter(PodCreation.id.in_([entry["server_id"] for entry in idle]), PodCreation.status != TERMINATING)
+            .all()
+        )
+        for record in request_termination(db, servers):
+            start_finalizer(record.id)
+            activity_tracker.forget(record.server_id)
+        app_logger.warning(f"Idle culling terminated: {names}")
+        return report
+    finally:
+        db.close()
+
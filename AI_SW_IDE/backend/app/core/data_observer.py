@@ -0,0 +1,108 @@
+# app/core/data_observer.py
+import asyncio
+import posixpath
+from typing import Optional
+
+import httpx
+
+from app.core.config import DATA_OBSERVER_URL, DATA_OBSERVER_TIMEOUT, BROWSE_CACHE_TTL
+from app.core.logger import app_logger
+from app.utils.cache import TTLCache
+
+
+def observer_path(path: str) -> str:
+    """
+    Path as the data observer sees it: the first segment of the client path
+    (the NFS mount point, e.g. /nfsvolume) is dropped, then the result is normalized.
+    """
+    stripped = "/" + "/".join(path.split("/")[2:])
+    return posixpath.normpath(stripped) if stripped != "/" else "/"
+
+
+class DataObserverClient:
+    """
+    Async access to the data observer over one keep-alive connection pool.
+    Directory listings are cached for BROWSE_CACHE_TTL seconds per normalized path (and page),
+    and concurrent browses of the same page share a single upstream request.
+    """
+
+    def __init__(self, base_url: str = DATA_OBSERVER_URL, ttl: float = BROWSE_CACHE_TTL):
+        self.base_url = base_url
+        self.cache = TTLCache(ttl=ttl, maxsize=1024)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        # Bumped on every invalidation so a listing fetched before it is not cached afterwards
+        self._generation = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(DATA_OBSERVER_TIMEOUT, connect=5.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, endpoint: str, **params) -> httpx.Response:
+        response = await self.client.get(endpoint, params=params)
+        response.raise_for_status()
+        return response
+
+    async def open_stream(self, endpoint: str, headers: Optional[dict] = None, **params) -> httpx.Response:
+        """
+        Response whose body has not been read yet, for relaying it chunk by chunk.
+        Upstream errors are raised before anything is relayed; the caller closes the response.
+        """
+        request = self.client.build_request("GET", endpoint, params=params, headers=headers)
+        response = await self.client.send(request, stream=True)
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        return response
+
+    async def _fetch_listing(self, key: tuple) -> tuple[bytes, str]:
+        generation = self._generation
+        path, params = key
+        response = await self.get("/browse", path=path, **dict(params))
+        listing = (response.content, response.headers.get("content-type", ""))
+        if generation == self._generation:
+            self.cache.set(key, listing)
+        return listing
+
+    async def browse(self, path: str, **params) -> tuple[bytes, str]:
+        """Raw listing body and content type for the (observer side) path; params select a page"""
+        key = (path, tuple(sorted(params.items())))
+        listing = self.cache.get(key)
+        if listing is not None:
+            return listing
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_listing(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: a client giving up must not cancel the fetch other browses are waiting on
+        return await asyncio.shield(task)
+
+    def invalidate(self, path: str):
+        """Forget the listing of a changed path, everything below it and its parent's listing"""
+        path = posixpath.normpath(path) if path != "/" else "/"
+        prefix = path.rstrip("/") + "/"
+        parent = posixpath.dirname(path)
+        self._generation += 1
+        dropped = self.cache.invalidate_where(lambda key: key[0] in (path, parent) or key[0].startswith(prefix))
+        app_logger.debug(f"Browse cache: dropped {dropped} listings for '{path}'")
+
+    def invalidate_client_path(self, path: Optional[str]):
+        """invalidate() for a path as stored on PVC rows (including the mount point)"""
+        if path:
+            self.invalidate(observer_path(path))
+
+
+data_observer = DataObserverClient()
@@ -0,0 +1,120 @@
+# app/core/kube.py
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import urllib3
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+# app.core.logger imports config, which builds the client from this module: use the logger by name
+logger = logging.getLogger("gpu_dashboard")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `qps` requests per second on average, bursts up to `burst`"""
+
+    def __init__(self, qps: float, burst: int):
+        self.qps = qps
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller has to wait before using it"""
+        if self.qps <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.qps)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.qps
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RetryingApiClient(client.ApiClient):
+    """
+    ApiClient that rate limits every request on the client side and retries transient failures
+    with exponential backoff and jitter. 429 is always retried (the server did not act on the
+    request); 5xx and connection errors only for non-POST requests, so a create is never sent twice.
+    """
+
+    def __init__(self, qps: float, burst: int, max_retries: int, backoff_base: float = 0.5,
+                 backoff_max: float = 10.0, configuration: Optional[client.Configuration] = None):
+        super().__init__(configuration)
+        self.limiter = RateLimiter(qps, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def backoff(self, attempt: int) -> float:
+        return min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def retry_delay(self, method: str, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before the next attempt, None if the error is final"""
+        if attempt >= self.max_retries:
+            return None
+        if isinstance(error, ApiException):
+            if error.status not in RETRYABLE_STATUS or (error.status != 429 and method == "POST"):
+                return None
+            retry_after = (error.headers or {}).get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+            return self.backoff(attempt)
+        if method == "POST":
+            return None
+        return self.backoff(attempt)
+
+    def call_api(self, resource_path, method, *args, **kwargs):
+        if kwargs.get("async_req"):
+            return super().call_api(resource_path, method, *args, **kwargs)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                return super().call_api(resource_path, method, *args, **kwargs)
+            except (ApiException, urllib3.exceptions.HTTPError) as e:
+                delay = self.retry_delay(method, e, attempt)
+                if delay is None:
+                    raise
+                status = getattr(e, "status", None) or type(e).__name__
+                logger.warning(f"Kubernetes {method} {resource_path} failed ({status}), retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+
+class AsyncKubeApi:
+    """
+    Async access to a CoreV1Api: `await kube_api.read_namespaced_pod(...)` runs the blocking
+    call on a dedicated, bounded executor instead of the event loop (or the shared default pool).
+    """
+
+    def __init__(self, api: client.CoreV1Api, max_workers: int):
+        self.api = api
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="k8s")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run any blocking Kubernetes helper on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self.api, name)
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+
+        return call
@@ -0,0 +1,69 @@
+# app/core/manifests.py
+import re
+from typing import Optional
+
+from app.core.placement import GPU_REQUESTS, Placement, node_affinity
+from app.schemas.k8s import PodCreateRequest
+
+
+def build_pvc_manifest(pvc_name: str) -> dict:
+    return {
+        "apiVersion": "v1",
+        "kind": "PersistentVolumeClaim",
+        "metadata": {"name": pvc_name},
+        "spec": {
+            "accessModes": ["ReadWriteMany"],
+            "resources": {"requests": {"storage": "1Gi"}},
+        }
+    }
+
+
+def build_pod_manifest(pod_name: str, pvc_name: str, request: PodCreateRequest, placement: Optional[Placement]) -> dict:
+    cpu = ''.join(re.findall(r'\d+', request.cpu))
+    memory = ''.join(re.findall(r'\d+', request.memory)) + 'Gi'
+    pod_manifest = {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": pod_name,
+            "labels": {"app": "my-server"}
+        },
+        "spec": {
+            "containers": [
+                {
+                    "name": "server-container",
+                    "image": request.image,
+                    "command": ["bash", "-lc"],
+                    "args": [
+                        "jupyter lab --ip=0.0.0.0 --port=8888 --no-browser --ServerApp.token='' --ServerApp.root_dir=/home/jovyan/workspace"
+                    ],
+                    "ports": [{"containerPort": 8888}],
+                    "volumeMounts": [
+                        {"mountPath": "/home/jovyan/workspace", "name": "storage-volume"},
+                        {"mountPath": "/home/share", "name": "shared-volume"}
+                    ],
+                    "resources": {
+                        "limits": {
+                            "cpu": cpu,
+                            "memory": memory
+                        }
+                    },
+                }
+            ],
+            "imagePullSecrets": [
+              {"name": "harbor-secret"}
+            ],
+            "volumes": [
+                {"name": "storage-volume", "persistentVolumeClaim": {"claimName": pvc_name}},
+                {"name": "shared-volume", "persistentVolumeClaim": {"claimName": "ailabserver-claim-shared-<hashed>"}}
+            ],
+            "restartPolicy": "Never"
+        }
+    }
+    if request.gpu != 'None':
+        gpu_request = GPU_REQUESTS[request.gpu]
+        pod_manifest['spec']['containers'][0]['resources']['limits'][gpu_request.resource] = gpu_request.count
+    if placement:
+        # Pin the pod to the node holding the leased slice
+        pod_manifest['spec']['affinity'] = node_affinity(placement.node)
+    return pod_manifest
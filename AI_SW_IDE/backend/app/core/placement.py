@@ -0,0 +1,239 @@
+# app/core/placement.py
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.gpu import Flavor, ServerGpuMapping, GpuReservation
+from app.utils.common import now_kst
+
+# Compute units of a whole A100 (a MIG profile "Ng.XXgb" uses N of them)
+FULL_GPU_COMPUTE = 7
+MIG_PROFILE_PATTERN = re.compile(r"^(\d+)g\.\d+gb$")
+
+
+@dataclass(frozen=True)
+class GpuRequest:
+    resource: str  # extended resource requested in the pod limits
+    count: int
+    profile: str  # inventory gpu_name (MIG profile) or model prefix (full GPU)
+    mig: bool
+
+
+# Labels offered by the UI -> what has to be allocated
+GPU_REQUESTS = {
+    '2g.20gb': GpuRequest('nvidia.com/mig-2g.20gb', 1, '2g.20gb', True),
+    '3g.40gb': GpuRequest('nvidia.com/mig-3g.40gb', 1, '3g.40gb', True),
+    '4g.40gb': GpuRequest('nvidia.com/mig-4g.40gb', 1, '4g.40gb', True),
+    'A100 80GB': GpuRequest('nvidia.com/gpu', 1, 'a100 80gb', False),
+    'A100 80GB × 2': GpuRequest('nvidia.com/gpu', 2, 'a100 80gb', False),
+}
+
+
+def mig_compute(gpu_name: str) -> Optional[int]:
+    """Compute units of a MIG profile name, None for a full GPU"""
+    match = MIG_PROFILE_PATTERN.match(gpu_name.strip().lower())
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class Slice:
+    flavor_id: int
+    node: str
+    gpu_id: int
+    mig_id: Optional[int]
+    gpu_name: str
+    free: bool = True
+
+    @property
+    def is_mig(self) -> bool:
+        return mig_compute(self.gpu_name) is not None
+
+    @property
+    def compute(self) -> int:
+        return mig_compute(self.gpu_name) or FULL_GPU_COMPUTE
+
+    @property
+    def gpu_key(self) -> tuple:
+        return (self.node, self.gpu_id)
+
+    def matches(self, request: GpuRequest) -> bool:
+        name = self.gpu_name.strip().lower()
+        if request.mig:
+            return self.is_mig and name == request.profile
+        return not self.is_mig and name.startswith(request.profile)
+
+
+@dataclass
+class Placement:
+    node: str
+    flavor_ids: list[int]
+    request: GpuRequest
+    slices: list[Slice] = field(default_factory=list)
+
+
+class Inventory:
+    """In-memory view of the gpu_flavor table used to pick concrete slices"""
+
+    def __init__(self, slices: Iterable[Slice]):
+        self.slices = {s.flavor_id: s for s in slices}
+
+    @classmethod
+    def from_db(cls, db: Session) -> "Inventory":
+        reserved = {flavor_id for (flavor_id,) in db.query(GpuReservation.flavor_id).filter(active_reservation())}
+        return cls(
+            Slice(
+                flavor_id=f.id,
+                node=f.worker_node.strip(),
+                gpu_id=f.gpu_id,
+                mig_id=f.mig_id,
+                gpu_name=f.gpu_name,
+                # available == 1 means a pod holds the slice
+                free=not f.available and f.id not in reserved,
+            )
+            for f in db.query(Flavor).all()
+        )
+
+    def free_compute_by_gpu(self) -> dict:
+        free = defaultdict(int)
+        for s in self.slices.values():
+            if s.free:
+                free[s.gpu_key] += s.compute
+        return free
+
+    def used_gpus(self) -> set:
+        return {s.gpu_key for s in self.slices.values() if not s.free}
+
+    def allocate(self, flavor_ids: Iterable[int]):
+        for flavor_id in flavor_ids:
+            self.slices[flavor_id].free = False
+
+    def release(self, flavor_ids: Iterable[int]):
+        for flavor_id in flavor_ids:
+            if flavor_id in self.slices:
+                self.slices[flavor_id].free = True
+
+    def fragmentation(self) -> float:
+        """Share of free compute stranded on GPUs that are already partly in use"""
+        free = self.free_compute_by_gpu()
+        total_free = sum(free.values())
+        if not total_free:
+            return 0.0
+        used = self.used_gpus()
+        stranded = sum(units for gpu, units in free.items() if gpu in used)
+        return stranded / total_free
+
+
+def active_reservation():
+    """Reservations that still hold their slice: bound ones and unexpired leases"""
+    return or_(GpuReservation.expires_at.is_(None), GpuReservation.expires_at > now_kst())
+
+
+def ranked_placements(inventory: Inventory, request: GpuRequest) -> Iterator[Placement]:
+    """
+    Candidate placements from best to worst fit.
+    MIG: slices whose GPU has the least free compute left come first, so partly used GPUs
+    are filled before an idle one is broken up.
+    Full GPUs: nodes with the fewest free matching GPUs that still fit the count come first,
+    keeping nodes with many idle GPUs for multi-GPU requests.
+    """
+    candidates = [s for s in inventory.slices.values() if s.free and s.matches(request)]
+    if not candidates:
+        return
+
+    if request.mig:
+        free_by_gpu = inventory.free_compute_by_gpu()
+        free_by_node = defaultdict(int)
+        for gpu_key, units in free_by_gpu.items():
+            free_by_node[gpu_key[0]] += units
+        candidates.sort(
+            key=lambda s: (
+                free_by_gpu[s.gpu_key] - s.compute,
+                free_by_node[s.node],
+                s.node, s.gpu_id, s.mig_id if s.mig_id is not None else -1,
+            ),
+        )
+        for chosen in candidates:
+            yield Placement(node=chosen.node, flavor_ids=[chosen.flavor_id], request=request, slices=[chosen])
+        return
+
+    by_node = defaultdict(list)
+    for s in candidates:
+        by_node[s.node].append(s)
+    fitting = [(node, slices) for node, slices in by_node.items() if len(slices) >= request.count]
+    for node, slices in sorted(fitting, key=lambda item: (len(item[1]), item[0])):
+        # every free matching GPU of the node, in preference order; the first `count` are the pick
+        ordered = sorted(slices, key=lambda s: s.gpu_id)
+        yield Placement(node=node, flavor_ids=[s.flavor_id for s in ordered], request=request, slices=ordered)
+
+
+def best_fit(inventory: Inventory, request: GpuRequest) -> Optional[Placement]:
+    """Best-fit bin packing: the first of ranked_placements, trimmed to the requested count"""
+    placement = next(ranked_placements(inventory, request), None)
+    if placement is None:
+        return None
+    chosen = placement.slices[:request.count]
+    return Placement(node=placement.node, flavor_ids=[s.flavor_id for s in chosen], request=request, slices=chosen)
+
+
+def first_fit(inventory: Inventory, request: GpuRequest) -> Optional[Placement]:
+    """Baseline policy (first free slice in inventory order), used by the simulator for comparison"""
+    by_node = defaultdict(list)
+    for s in sorted(inventory.slices.values(), key=lambda s: s.flavor_id):
+        if s.free and s.matches(request):
+            by_node[s.node].append(s)
+            if len(by_node[s.node]) == request.count:
+                chosen = by_node[s.node]
+                return Placement(node=s.node, flavor_ids=[c.flavor_id for c in chosen], request=request, slices=chosen)
+    return None
+
+
+POLICIES = {"best-fit": best_fit, "first-fit": first_fit}
+
+
+def node_affinity(node: str) -> dict:
+    """Pod affinity that pins the pod to the chosen worker node"""
+    return {
+        "nodeAffinity": {
+            "requiredDuringSchedulingIgnoredDuringExecution": {
+                "nodeSelectorTerms": [{
+                    "matchExpressions": [{
+                        "key": "kubernetes.io/hostname",
+                        "operator": "In",
+                        "values": [node],
+                    }]
+                }]
+            }
+        }
+    }
+
+
+def commit_placement(db: Session, placement: Placement, server_id: int):
+    """Record the chosen slices for the server and mark them as taken"""
+    for flavor_id in placement.flavor_ids:
+        db.add(ServerGpuMapping(server_id=server_id, gpu_id=flavor_id))
+    db.query(Flavor).filter(Flavor.id.in_(placement.flavor_ids)).update(
+        {Flavor.available: 1}, synchronize_session=False
+    )
+    db.commit()
+
+
+def release_placement(db: Session, server_id: int, commit: bool = True):
+    """Free every slice mapped to or reserved by the server in set-based statements"""
+    release_placements(db, [server_id], commit=commit)
+
+
+def release_placements(db: Session, server_ids: list[int], commit: bool = True):
+    """release_placement() for many servers, with the same three statements"""
+    mapped = db.query(ServerGpuMapping.gpu_id).filter(ServerGpuMapping.server_id.in_(server_ids))
+    reserved = db.query(GpuReservation.flavor_id).filter(GpuReservation.server_id.in_(server_ids))
+    db.query(Flavor).filter(
+        or_(Flavor.id.in_(mapped.scalar_subquery()), Flavor.id.in_(reserved.scalar_subquery()))
+    ).update({Flavor.available: 0}, synchronize_session=False)
+    db.query(ServerGpuMapping).filter(ServerGpuMapping.server_id.in_(server_ids)).delete(synchronize_session=False)
+    db.query(GpuReservation).filter(GpuReservation.server_id.in_(server_ids)).delete(synchronize_session=False)
+    if commit:
+        db.commit()
@@ -0,0 +1,401 @@
+# app/core/provisioning.py
+import asyncio
+import time
+from collections import defaultdict
+from typing import Optional
+
+import httpx
+from kubernetes.client.rest import ApiException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import NAMESPACE, PROVISION_TIMEOUT, PROVISION_QUEUE_TIMEOUT, JUPYTER_READY_TIMEOUT, kube_api
+from app.core.admission import check_admission
+from app.core.logger import app_logger
+from app.core.data_observer import data_observer
+from app.core.manifests import build_pod_manifest, build_pvc_manifest
+from app.core.placement import commit_placement, release_placement
+from app.core.reservation import claim_placement, bind_reservation, release_reservation
+from app.core.warm_pool import warm_pool
+from app.db.session import SessionLocal
+from app.models.k8s import PodCreation, PVC, ProvisionJob
+from app.schemas.k8s import PodCreateRequest
+from app.utils import get_bound_pv_name, delete_pvc, delete_pod, now_kst
+
+# Job stages, in order
+QUEUED = "Queued"
+PVC_BINDING = "PVCBinding"
+POD_SCHEDULING = "PodScheduling"
+IP_ASSIGNING = "IPAssigning"
+JUPYTER_STARTING = "JupyterStarting"
+READY = "Ready"
+FAILED = "Failed"
+
+TERMINAL_STATUSES = ("Succeeded", "Failed")
+POLL_INTERVAL = 2
+QUEUE_POLL_INTERVAL = 10
+
+
+class ProvisioningError(Exception):
+    pass
+
+
+class JobBroker:
+    """In-process fan-out of job updates to push (SSE) subscribers"""
+
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers[job_id].add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        self._subscribers[job_id].discard(queue)
+        if not self._subscribers[job_id]:
+            del self._subscribers[job_id]
+
+    def publish(self, job_id: str, payload: dict):
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(payload)
+
+
+job_broker = JobBroker()
+# Keep references so running jobs are not garbage collected
+running_jobs: set[asyncio.Task] = set()
+
+
+def job_payload(job: ProvisionJob) -> dict:
+    return {
+        "job_id": job.id,
+        "server_id": job.server_id,
+        "pod_name": job.pod_name,
+        "stage": job.stage,
+        "status": job.status,
+        "detail": job.detail,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# Every database step of a job runs on the thread pool: SQLAlchemy blocks on its queries, row
+# locks and commits. A step that commits reloads the job before returning, so reading its fields
+# back on the event loop does not query.
+
+def save_stage(db: Session, job: ProvisionJob, stage: str, status: str, detail: Optional[str]) -> dict:
+    job.stage = stage
+    job.status = status
+    job.detail = detail
+    job.updated_at = now_kst()
+    if status in TERMINAL_STATUSES:
+        job.finished_at = job.updated_at
+    db.commit()
+    return job_payload(job)
+
+
+async def advance(db: Session, job: ProvisionJob, stage: str, status: str = "Running", detail: Optional[str] = None):
+    """Persist the job's new stage and push it to subscribers"""
+    payload = await run_in_threadpool(save_stage, db, job, stage, status, detail)
+    job_broker.publish(job.id, payload)
+
+
+def save_job(db: Session, job: ProvisionJob):
+    db.commit()
+    db.refresh(job)
+
+
+async def run_limited(limiter: asyncio.Semaphore, coro):
+    async with limiter:
+        return await coro
+
+
+def start_provisioning(job_id: str, request: PodCreateRequest, user_id: int, pvc_id: Optional[int],
+                       limiter: Optional[asyncio.Semaphore] = None, queued: bool = False) -> asyncio.Task:
+    """
+    Run the job in the background; jobs sharing a limiter (one bulk request) run at most N at a time.
+    A queued job first waits until admission lets it through.
+    """
+    coro = run_provisioning(job_id, request, user_id, pvc_id, queued)
+    if limiter is not None:
+        coro = run_limited(limiter, coro)
+    task = asyncio.create_task(coro)
+    running_jobs.add(task)
+    task.add_done_callback(running_jobs.discard)
+    return task
+
+
+def record_pvc(db: Session, user_id: int, pvc_name: str, pv_name: str) -> PVC:
+    """PVC row of a bound claim, with the directory the NFS provisioner created for it"""
+    pvc_obj = PVC(
+        user_id=user_id,
+        pvc_name=pvc_name,
+        pv=pv_name,
+        path=f"/nfsvolume/{NAMESPACE}-{pvc_name}-{pv_name}"
+    )
+    db.add(pvc_obj)
+    db.commit()
+    db.refresh(pvc_obj)
+    data_observer.invalidate_client_path(pvc_obj.path)  # a new directory appears in the root listing
+    return pvc_obj
+
+
+async def create_pvc(db: Session, job: ProvisionJob, user_id: int) -> PVC:
+    try:
+        await kube_api.create_namespaced_persistent_volume_claim(namespace=NAMESPACE, body=build_pvc_manifest(job.pvc_name))
+    except ApiException as e:
+        raise ProvisioningError(f"PVC creation failed: {e.body}")
+    job.owns_pvc = True
+    await run_in_threadpool(save_job, db, job)
+
+    # Blocks on a watch for up to its timeout: kept off the Kubernetes executor so waits cannot starve it
+    pv_name = await asyncio.to_thread(get_bound_pv_name, job.pvc_name, NAMESPACE)
+    if not pv_name:
+        raise ProvisioningError(f"PVC '{job.pvc_name}' was not bound in time")
+    return await run_in_threadpool(record_pvc, db, user_id, job.pvc_name, pv_name)
+
+
+async def wait_for_capacity(db: Session, job: ProvisionJob, request: PodCreateRequest):
+    """Hold a queued job until the requested resources are free"""
+    deadline = time.monotonic() + PROVISION_QUEUE_TIMEOUT
+    while True:
+        decision = await check_admission(db, request)
+        if decision.admitted:
+            return
+        if time.monotonic() >= deadline:
+            raise ProvisioningError(f"No capacity within {PROVISION_QUEUE_TIMEOUT}s: {decision.reason}")
+        detail = f"Waiting for capacity: {decision.reason}"
+        if decision.earliest_available:
+            detail += f" (expected by {decision.earliest_available.isoformat()})"
+        if job.detail != detail:
+            await advance(db, job, QUEUED, status="Pending", detail=detail)
+        await asyncio.sleep(QUEUE_POLL_INTERVAL)
+
+
+async def wait_for_pod(db: Session, job: ProvisionJob, deadline: float) -> str:
+    """Follow the pod through scheduling to an IP, returning the IP"""
+    while time.monotonic() < deadline:
+        pod = await kube_api.read_namespaced_pod(name=job.pod_name, namespace=NAMESPACE)
+        if pod.status.phase in ("Failed", "Succeeded"):
+            raise ProvisioningError(f"Pod terminated early with phase {pod.status.phase}")
+        if pod.spec.node_name and job.stage == POD_SCHEDULING:
+            await advance(db, job, IP_ASSIGNING, detail=f"Scheduled on {pod.spec.node_name}")
+        if pod.status.pod_ip:
+            return pod.status.pod_ip
+        await asyncio.sleep(POLL_INTERVAL)
+    raise ProvisioningError("Pod did not receive an internal IP within timeout period")
+
+
+async def wait_for_jupyter(internal_ip: str):
+    deadline = time.monotonic() + JUPYTER_READY_TIMEOUT
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(f"http://{internal_ip}:8888/api/status")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(POLL_INTERVAL)
+    raise ProvisioningError("Jupyter did not become ready within timeout period")
+
+
+def release_job_gpu(db: Session, job: ProvisionJob, placement_leased: bool) -> Optional[int]:
+    """First half of compensate: drop the job's GPU hold; returns its server id, if one was recorded"""
+    db.rollback()
+    server_id = job.server_id
+    if placement_leased or server_id:
+        if server_id:
+            release_placement(db, server_id, commit=False)
+        release_reservation(db, job.pod_name)
+    db.refresh(job)
+    return server_id
+
+
+def delete_server_record(db: Session, job: ProvisionJob, server_id: int):
+    job.server_id = None
+    db.flush()
+    pod_record = db.get(PodCreation, server_id)
+    if pod_record:
+        pod_record.pvcs.clear()
+        db.delete(pod_record)
+    save_job(db, job)
+
+
+def delete_pvc_record(db: Session, job: ProvisionJob):
+    db.query(PVC).filter(PVC.pvc_name == job.pvc_name).delete(synchronize_session=False)
+    save_job(db, job)
+
+
+async def compensate(db: Session, job: ProvisionJob, placement_leased: bool, pod_created: bool):
+    """Undo whatever the job created before it failed"""
+    server_id = await run_in_threadpool(release_job_gpu, db, job, placement_leased)
+    if pod_created:
+        await kube_api.run(delete_pod, job.pod_name, NAMESPACE)
+    if server_id:
+        await run_in_threadpool(delete_server_record, db, job, server_id)
+    if job.owns_pvc and job.pvc_name:
+        await kube_api.run(delete_pvc, job.pvc_name, NAMESPACE)
+        await run_in_threadpool(delete_pvc_record, db, job)
+
+
+def record_warm_pool_server(db: Session, job: ProvisionJob, request: PodCreateRequest, user_id: int, handed: dict):
+    """Record a pre-started pool pod as the job's server; its fresh claim becomes the user's PVC"""
+    job.pod_name = handed["pod_name"]
+    job.pvc_name = handed["pvc_name"]
+    job.owns_pvc = True
+    pvc_obj = record_pvc(db, user_id, handed["pvc_name"], handed["pv_name"])
+    pod_record = PodCreation(
+        user_id=user_id,
+        description=request.description,
+        server_name=request.name,
+        pod_name=handed["pod_name"],
+        cpu=request.cpu,
+        memory=request.memory,
+        gpu=request.gpu,
+        request_time=now_kst(),
+        internal_ip=handed["internal_ip"],
+        status='Running',
+        tags='LEGEND'
+    )
+    pod_record.pvcs.append(pvc_obj)
+    db.add(pod_record)
+    db.commit()
+    job.server_id = pod_record.id
+    warm_pool.assign_gpu(db, handed["pod_name"], pod_record.id)
+
+
+async def finish_from_warm_pool(db: Session, job: ProvisionJob, request: PodCreateRequest, user_id: int, handed: dict):
+    await run_in_threadpool(record_warm_pool_server, db, job, request, user_id, handed)
+    await advance(db, job, READY, status="Succeeded", detail="Served from warm pool")
+    app_logger.info(f"Server '{job.pod_name}' served from warm pool (job {job.id})")
+
+
+def record_server(db: Session, job: ProvisionJob, request: PodCreateRequest, user_id: int, placement) -> PodCreation:
+    pod_record = PodCreation(
+        user_id=user_id,
+        description=request.description,
+        server_name=request.name,
+        pod_name=job.pod_name,
+        cpu=request.cpu,
+        memory=request.memory,
+        gpu=request.gpu,
+        request_time=now_kst(),
+        internal_ip='',
+        status='Creating',
+        tags='LEGEND'
+    )
+    db.add(pod_record)
+    db.commit()
+    db.refresh(pod_record)
+    job.server_id = pod_record.id
+    db.commit()
+    if placement:
+        commit_placement(db, placement, pod_record.id)
+    db.refresh(job)
+    return pod_record
+
+
+def claim_job_gpu(db: Session, job: ProvisionJob, gpu_label: str):
+    placement = claim_placement(db, gpu_label, holder=job.pod_name)
+    db.refresh(job)
+    return placement
+
+
+def mark_server_ready(db: Session, job: ProvisionJob, pod_record: PodCreation, pvc_obj: PVC, placement):
+    """Staged only: the Ready stage commits it"""
+    pod_record.status = "Running"
+    pod_record.pvcs.append(pvc_obj)
+    if placement:
+        bind_reservation(db, job.pod_name, pod_record.id, commit=False)
+
+
+async def run_provisioning(job_id: str, request: PodCreateRequest, user_id: int, pvc_id: Optional[int],
+                           queued: bool = False):
+    """
+    (capacity) -> pool pod handover, or GPU lease -> PVC bind -> pod scheduled -> IP assigned -> Jupyter ready,
+    with cleanup on failure
+    """
+    db = SessionLocal()
+    job = await run_in_threadpool(db.get, ProvisionJob, job_id)
+    placement = None
+    pod_created = False
+    try:
+        if queued:
+            await wait_for_capacity(db, job, request)
+        deadline = time.monotonic() + PROVISION_TIMEOUT
+
+        # A pool pod already holds its GPU, so it is tried before leasing one. Pool pods come
+        # with a new, empty claim: only requests for a new PVC can take one.
+        handed = await warm_pool.acquire(request, user_id) if request.pvc else None
+        if handed:
+            pod_created = True  # an unfinished handover must not leave the pod behind
+            await finish_from_warm_pool(db, job, request, user_id, handed)
+            return
+
+        # Lease the GPU next: without a slice there is no point in creating a PVC or pod
+        if request.gpu != 'None':
+            placement = await run_in_threadpool(claim_job_gpu, db, job, request.gpu)
+            if placement is None:
+                raise ProvisioningError(f"No free {request.gpu} available")
+
+        if request.pvc:
+            await advance(db, job, PVC_BINDING)
+            pvc_obj = await create_pvc(db, job, user_id)
+        else:
+            pvc_obj = await run_in_threadpool(db.get, PVC, pvc_id)
+
+        await advance(db, job, POD_SCHEDULING)
+
+        pod_manifest = build_pod_manifest(job.pod_name, job.pvc_name, request, placement)
+        try:
+            await kube_api.create_namespaced_pod(namespace=NAMESPACE, body=pod_manifest)
+        except ApiException as e:
+            raise ProvisioningError(f"Pod creation failed: {e.body}")
+        pod_created = True
+
+        pod_record = await run_in_threadpool(record_server, db, job, request, user_id, placement)
+
+        internal_ip = await wait_for_pod(db, job, deadline)
+        pod_record.internal_ip = internal_ip
+        await advance(db, job, JUPYTER_STARTING, detail=f"Pod IP {internal_ip}")
+
+        await wait_for_jupyter(internal_ip)
+        await run_in_threadpool(mark_server_ready, db, job, pod_record, pvc_obj, placement)
+        await advance(db, job, READY, status="Succeeded")
+        app_logger.info(f"Server '{job.pod_name}' provisioned (job {job.id})")
+    except Exception as e:
+        app_logger.error(f"Provisioning job {job_id} failed at {job.stage}: {e}")
+        failed_stage = job.stage
+        try:
+            await compensate(db, job, placement is not None, pod_created)
+        except Exception as cleanup_error:
+            app_logger.error(f"Cleanup of job {job_id} failed: {cleanup_error}")
+            await run_in_threadpool(db.rollback)
+        await advance(db, job, FAILED, status="Failed", detail=f"{failed_stage}: {e}")
+    finally:
+        db.close()
+
+
+async def recover_interrupted_jobs():
+    """Fail and clean up jobs a previous process left unfinished"""
+    db = SessionLocal()
+    try:
+        jobs = await run_in_threadpool(
+            lambda: [
+                (job, job.id, job.stage)
+                for job in db.query(ProvisionJob).filter(ProvisionJob.status.in_(("Pending", "Running")))
+            ]
+        )
+        for job, job_id, failed_stage in jobs:
+            try:
+                await compensate(db, job, placement_leased=True, pod_created=True)
+            except Exception as e:
+                app_logger.error(f"Cleanup of interrupted job {job_id} failed: {e}")
+                await run_in_threadpool(db.rollback)
+            await advance(db, job, FAILED, status="Failed", detail=f"{failed_stage}: interrupted by backend restart")
+        if jobs:
+            app_logger.warning(f"Marked {len(jobs)} interrupted provisioning jobs as failed")
+    finally:
+        db.close()
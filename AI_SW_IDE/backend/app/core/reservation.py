@@ -0,0 +1,176 @@
+# app/core/reservation.py
+import datetime
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import case, exists, and_, not_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.gpu import Flavor, GpuReservation
+from app.core.config import GPU_LEASE_SECONDS
+from app.core.logger import app_logger
+from app.core.placement import GPU_REQUESTS, Inventory, Placement, active_reservation, ranked_placements
+from app.utils.common import now_kst
+
+# Rounds of re-ranking when concurrent claims took every candidate between snapshot and insert
+CLAIM_ATTEMPTS = 3
+
+
+def claimable_flavors(db: Session):
+    """Free gpu_flavor rows without an active reservation"""
+    reserved = exists().where(and_(GpuReservation.flavor_id == Flavor.id, active_reservation()))
+    return db.query(Flavor).filter(Flavor.available == 0, not_(reserved))
+
+
+def _lock_slices(db: Session, flavor_ids: list[int], count: int) -> list[Flavor]:
+    """
+    Row-lock up to `count` claimable slices, honouring the preference order of flavor_ids.
+    Rows another transaction is claiming are skipped instead of waited on.
+    """
+    rank = case({flavor_id: i for i, flavor_id in enumerate(flavor_ids)}, value=Flavor.id)
+    return (
+        claimable_flavors(db)
+        .filter(Flavor.id.in_(flavor_ids))
+        .order_by(rank)
+        .limit(count)
+        .with_for_update(skip_locked=True, of=Flavor)
+        .all()
+    )
+
+
+def _insert_leases(db: Session, flavor_ids: list[int], holder: str, expires_at: datetime.datetime) -> int:
+    """INSERT ... ON CONFLICT (flavor_id) DO NOTHING; returns how many leases were actually created"""
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(GpuReservation).values([
+        {"flavor_id": flavor_id, "holder": holder, "server_id": None, "status": "Leased", "expires_at": expires_at}
+        for flavor_id in flavor_ids
+    ]).on_conflict_do_nothing(index_elements=[GpuReservation.flavor_id])
+    return db.execute(statement).rowcount
+
+
+def claim_placement(db: Session, gpu_label: str, holder: str, lease_seconds: int = GPU_LEASE_SECONDS) -> Optional[Placement]:
+    """
+    Claim concrete slices for a request with SELECT ... FOR UPDATE SKIP LOCKED.
+    Candidates are tried in best-fit order; concurrent claims skip each other's rows,
+    so parallel creations end up on different slices without a global lock.
+    The claim is a lease that expires unless bind_reservation() is called.
+
+    The row lock does not re-check the "no active reservation" condition: a lease another
+    transaction committed while this one waited can still be there. Leases are therefore
+    created with ON CONFLICT DO NOTHING, and a slice that turns out to be taken sends the
+    claim on to the next candidate (and, once all are exhausted, to a fresh ranking).
+    """
+    request = GPU_REQUESTS[gpu_label]
+    expires_at = now_kst() + datetime.timedelta(seconds=lease_seconds)
+
+    for _ in range(CLAIM_ATTEMPTS):
+        conflicted = False
+        for candidate in ranked_placements(Inventory.from_db(db), request):
+            locked = _lock_slices(db, candidate.flavor_ids, request.count)
+            if len(locked) < request.count:
+                db.rollback()  # drop partial locks, try the next candidate
+                continue
+
+            flavor_ids = [flavor.id for flavor in locked]
+            # Expired leases give their slice up; live ones make the insert below conflict
+            db.query(GpuReservation).filter(
+                GpuReservation.flavor_id.in_(flavor_ids), not_(active_reservation())
+            ).delete(synchronize_session=False)
+            if _insert_leases(db, flavor_ids, holder, expires_at) < len(flavor_ids):
+                db.rollback()  # leased concurrently since our snapshot
+                conflicted = True
+                continue
+            db.commit()
+
+            slices = [s for s in candidate.slices if s.flavor_id in flavor_ids]
+            app_logger.info(f"Leased {flavor_ids} on {candidate.node} for '{holder}' until {expires_at}")
+            return Placement(node=candidate.node, flavor_ids=flavor_ids, request=request, slices=slices)
+        if not conflicted:
+            break
+
+    app_logger.warning(f"No claimable '{gpu_label}' slice for '{holder}'")
+    return None
+
+
+def bind_reservation(db: Session, holder: str, server_id: int, commit: bool = True):
+    """Attach the lease to the created server and make it permanent"""
+    db.query(GpuReservation).filter(GpuReservation.holder == holder).update(
+        {
+            GpuReservation.server_id: server_id,
+            GpuReservation.status: "Bound",
+            GpuReservation.expires_at: None,
+        },
+        synchronize_session=False,
+    )
+    if commit:
+        db.commit()
+
+
+def release_reservation(db: Session, holder: str, commit: bool = True):
+    """Drop the lease of a request that did not produce a server"""
+    db.query(GpuReservation).filter(GpuReservation.holder == holder).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+
+
+def purge_expired_reservations(db: Session) -> int:
+    """Delete leases whose holder never bound them (crashed or timed out requests)"""
+    deleted = (
+        db.query(GpuReservation)
+        .filter(GpuReservation.expires_at.is_not(None), GpuReservation.expires_at <= now_kst())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    if deleted:
+        app_logger.info(f"Purged {deleted} expired GPU leases")
+    return deleted
+
+
+def reconcile_bound_reservations(db: Session, observed: dict[int, set[int]]) -> int:
+    """
+    Move Bound reservations onto the slices their servers actually use (`observed`: server id ->
+    gpu_flavor ids from DCGM). A lease pins a flavor, but the device plugin picks the MIG device;
+    left alone, the reserved slice would stay blocked until the server is deleted.
+    Only servers that hold reservations are touched. Leases on a slice found in use are dropped,
+    since their holder cannot get that slice anyway. Flushes, the caller commits.
+    Returns the number of reservation rows dropped or added.
+    """
+    observed = {server_id: flavor_ids for server_id, flavor_ids in observed.items() if flavor_ids}
+    if not observed:
+        return 0
+    bound = (
+        db.query(GpuReservation)
+        .filter(GpuReservation.status == "Bound", GpuReservation.server_id.in_(list(observed)))
+        .all()
+    )
+    reserved, holders = defaultdict(set), {}
+    for reservation in bound:
+        reserved[reservation.server_id].add(reservation.flavor_id)
+        holders[reservation.server_id] = reservation.holder
+    stale = [r for r in bound if r.flavor_id not in observed[r.server_id]]
+    missing = sorted(
+        (server_id, flavor_id)
+        for server_id, flavor_ids in reserved.items()
+        for flavor_id in observed[server_id] - flavor_ids
+    )
+    if not stale and not missing:
+        return 0
+
+    for reservation in stale:
+        db.delete(reservation)
+    db.flush()
+    for server_id, flavor_id in missing:
+        current = db.query(GpuReservation).filter(GpuReservation.flavor_id == flavor_id).first()
+        if current is not None:
+            if current.status == "Bound":
+                app_logger.warning(f"Slice {flavor_id} used by server {server_id} is bound to server {current.server_id}")
+                continue
+            db.delete(current)
+            db.flush()
+        db.add(GpuReservation(
+            flavor_id=flavor_id, server_id=server_id, holder=holders[server_id], status="Bound", expires_at=None,
+        ))
+    db.flush()
+    app_logger.info(f"Reconciled GPU reservations: dropped {len(stale)} on unused slices, bound {len(missing)} slices in use")
+    return len(stale) + len(missing)
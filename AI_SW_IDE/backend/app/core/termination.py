@@ -0,0 +1,236 @@
+# app/core/termination.py
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from kubernetes import watch
+from kubernetes.client import V1DeleteOptions
+from kubernetes.client.rest import ApiException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import NAMESPACE, TERMINATION_TIMEOUT, v1_api, kube_api
+from app.core.logger import app_logger
+from app.core.placement import release_placements
+from app.db.session import SessionLocal
+from app.models.k8s import PodCreation, ProvisionJob, ServerTermination, pvc_server_association
+from app.utils import delete_pod, now_kst
+
+TERMINATING = "Terminating"
+TERMINATED = "Terminated"
+FAILED = "Failed"
+
+# Keep references so running finalizers are not garbage collected
+running_finalizers: set[asyncio.Task] = set()
+
+
+class PodRemovalWatcher:
+    """
+    Resolves waiters once their pod is gone from the API server.
+    All waiters of a namespace share one pod watch stream, running in a daemon
+    thread only while somebody is waiting. Waiters are asyncio futures, so a
+    pending termination does not hold a worker thread.
+    """
+
+    # Seconds before the watch is re-established (and idle streams wind down)
+    STREAM_TIMEOUT = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = defaultdict(lambda: defaultdict(list))  # namespace -> pod_name -> [(loop, future)]
+        self._streams: dict[str, threading.Thread] = {}
+
+    async def wait(self, pod_name: str, namespace: str, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            self._waiters[namespace][pod_name].append(waiter)
+            self._ensure_stream(namespace)
+        try:
+            # The pod may have disappeared before the stream saw it
+            try:
+                await kube_api.read_namespaced_pod(name=pod_name, namespace=namespace)
+            except ApiException as e:
+                if e.status == 404:
+                    return True
+                raise
+            try:
+                await asyncio.wait_for(future, timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        finally:
+            with self._lock:
+                waiters = self._waiters[namespace]
+                waiters[pod_name].remove(waiter)
+                if not waiters[pod_name]:
+                    del waiters[pod_name]
+
+    def _ensure_stream(self, namespace: str):
+        stream = self._streams.get(namespace)
+        if stream is None or not stream.is_alive():
+            stream = threading.Thread(target=self._run, args=(namespace,), name=f"pod-watch-{namespace}", daemon=True)
+            self._streams[namespace] = stream
+            stream.start()
+
+    def _has_waiters(self, namespace: str) -> bool:
+        with self._lock:
+            if self._waiters[namespace]:
+                return True
+            self._streams.pop(namespace, None)
+            return False
+
+    def _resolve(self, namespace: str, pod_name: str):
+        with self._lock:
+            for loop, future in self._waiters[namespace].get(pod_name, ()):
+                loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(True))
+
+    def _run(self, namespace: str):
+        while self._has_waiters(namespace):
+            stream = watch.Watch()
+            try:
+                for event in stream.stream(
+                    v1_api.list_namespaced_pod,
+                    namespace=namespace,
+                    timeout_seconds=self.STREAM_TIMEOUT,
+                ):
+                    if event["type"] == "DELETED":
+                        self._resolve(namespace, event["object"].metadata.name)
+                    if not self._waiters[namespace]:
+                        stream.stop()
+            except Exception as e:
+                app_logger.warning(f"Pod watch on '{namespace}' interrupted: {e}")
+                time.sleep(1)
+
+
+pod_removal_watcher = PodRemovalWatcher()
+
+
+def remove_server_records(db: Session, server_ids: list[int]):
+    """Release the servers' GPUs and delete their rows and PVC links, without committing"""
+    release_placements(db, server_ids, commit=False)
+    db.query(ProvisionJob).filter(ProvisionJob.server_id.in_(server_ids)).update(
+        {ProvisionJob.server_id: None}, synchronize_session=False
+    )
+    db.execute(pvc_server_association.delete().where(pvc_server_association.c.server_id.in_(server_ids)))
+    db.query(PodCreation).filter(PodCreation.id.in_(server_ids)).delete(synchronize_session=False)
+
+
+def termination_payload(record: ServerTermination) -> dict:
+    return {
+        "server_id": record.server_id,
+        "pod_name": record.pod_name,
+        "status": record.status,
+        "detail": record.detail,
+        "requested_at": record.requested_at,
+        "terminated_at": record.terminated_at,
+    }
+
+
+def request_termination(db: Session, servers: list[PodCreation]) -> list[ServerTermination]:
+    """Mark the servers Terminating (one UPDATE) and open a termination record for each"""
+    server_ids = [server.id for server in servers]
+    db.query(PodCreation).filter(PodCreation.id.in_(server_ids)).update(
+        {PodCreation.status: TERMINATING}, synchronize_session=False
+    )
+    records = [
+        ServerTermination(server_id=server.id, user_id=server.user_id, pod_name=server.pod_name, gpu=server.gpu)
+        for server in servers
+    ]
+    db.add_all(records)
+    db.commit()
+    return records
+
+
+def start_finalizer(termination_id: int, limiter: Optional[asyncio.Semaphore] = None) -> asyncio.Task:
+    task = asyncio.create_task(finalize_termination(termination_id, limiter))
+    running_finalizers.add(task)
+    task.add_done_callback(running_finalizers.discard)
+    return task
+
+
+async def delete_and_wait(pod_name: str, limiter: Optional[asyncio.Semaphore]) -> bool:
+    """Delete the pod and wait for it to go; escalate to a forced delete once the grace period ran out"""
+    if limiter is not None:
+        async with limiter:
+            await kube_api.run(delete_pod, pod_name, NAMESPACE, raise_errors=True)
+    else:
+        await kube_api.run(delete_pod, pod_name, NAMESPACE, raise_errors=True)
+    if await pod_removal_watcher.wait(pod_name, NAMESPACE, TERMINATION_TIMEOUT):
+        return True
+
+    app_logger.warning(f"Pod '{pod_name}' still present after {TERMINATION_TIMEOUT}s, forcing deletion")
+    try:
+        await kube_api.delete_namespaced_pod(
+            name=pod_name,
+            namespace=NAMESPACE,
+            body=V1DeleteOptions(grace_period_seconds=0),
+        )
+    except ApiException as e:
+        if e.status != 404:
+            raise
+    return await pod_removal_watcher.wait(pod_name, NAMESPACE, TERMINATION_TIMEOUT)
+
+
+def complete_termination(db: Session, record: ServerTermination, pod_name: str, removed: bool):
+    if not removed:
+        record.status = FAILED
+        record.detail = "Pod was not removed within timeout period"
+        db.commit()
+        app_logger.error(f"Termination of '{pod_name}' did not finish")
+        return
+
+    remove_server_records(db, [record.server_id])
+    record.status = TERMINATED
+    record.terminated_at = now_kst()
+    db.commit()
+    app_logger.info(f"Server '{pod_name}' terminated at {record.terminated_at}")
+
+
+def fail_termination(db: Session, record: ServerTermination, detail: str):
+    db.rollback()
+    record.status = FAILED
+    record.detail = detail
+    db.commit()
+
+
+async def finalize_termination(termination_id: int, limiter: Optional[asyncio.Semaphore] = None):
+    """
+    Wait for the pod to disappear, then release its GPUs and drop the server row.
+    Database steps run on the thread pool, the wait itself does not hold a thread.
+    """
+    db = SessionLocal()
+    try:
+        record = await run_in_threadpool(db.get, ServerTermination, termination_id)
+        pod_name = record.pod_name
+        try:
+            removed = await delete_and_wait(pod_name, limiter)
+            await run_in_threadpool(complete_termination, db, record, pod_name, removed)
+        except Exception as e:
+            await run_in_threadpool(fail_termination, db, record, str(e))
+            app_logger.error(f"Termination of '{pod_name}' failed: {e}")
+    finally:
+        db.close()
+
+
+def pending_termination_ids(db: Session) -> list[int]:
+    return [
+        termination_id
+        for (termination_id,) in db.query(ServerTermination.id).filter(ServerTermination.status == TERMINATING)
+    ]
+
+
+async def recover_terminations():
+    """Resume finalizers a previous process left running"""
+    db = SessionLocal()
+    try:
+        pending = await run_in_threadpool(pending_termination_ids, db)
+    finally:
+        db.close()
+    for termination_id in pending:
+        start_finalizer(termination_id)
+    if pending:
+        app_logger.info(f"Resumed {len(pending)} pending server terminations")
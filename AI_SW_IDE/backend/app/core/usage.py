@@ -0,0 +1,74 @@
+# app/core/usage.py
+from collections import defaultdict
+
+import httpx
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.data_observer import data_observer, observer_path
+from app.core.logger import app_logger
+from app.db.session import SessionLocal
+from app.models.k8s import PVC, PVCUsage
+from app.utils import now_kst
+
+# Paths per data observer request (its /usage accepts up to 200)
+USAGE_BATCH = 100
+
+
+def pvc_ids_by_observer_path(db: Session) -> dict[str, list[int]]:
+    pvc_ids_by_path = defaultdict(list)
+    for pvc_id, path in db.query(PVC.id, PVC.path).filter(PVC.path.is_not(None), PVC.path != ""):
+        pvc_ids_by_path[observer_path(path)].append(pvc_id)
+    return pvc_ids_by_path
+
+
+def store_usage(db: Session, pvc_ids_by_path: dict[str, list[int]], entries: list[tuple]) -> int:
+    """Write (path, usage entry, measured_at) results to the PVCs' usage rows"""
+    usage_rows = {row.pvc_id: row for row in db.query(PVCUsage)}
+    measured = 0
+    for path, entry, measured_at in entries:
+        for pvc_id in pvc_ids_by_path[path]:
+            row = usage_rows.get(pvc_id)
+            if row is None:
+                row = usage_rows[pvc_id] = PVCUsage(pvc_id=pvc_id)
+                db.add(row)
+            if not entry["indexed"]:
+                # Keep the last figures, just say why they were not updated
+                row.detail = "Path not indexed yet"
+                continue
+            row.used_bytes = entry["size"]
+            row.file_count = entry["files"]
+            row.directory_count = entry["directories"]
+            row.measured_at = measured_at
+            # Files growing in place are only counted once the observer's background rescan ran
+            row.detail = "Rescan pending, recent writes may be missing" if entry.get("stale") else None
+            measured += 1
+    db.commit()
+    return measured
+
+
+async def refresh_pvc_usage() -> int:
+    """
+    Store used bytes and file/directory counts of every PVC with a path.
+    The data observer sums them from its file index, so no volume is walked here.
+    Database reads and writes run on the thread pool. Returns the number of PVCs measured.
+    """
+    db = SessionLocal()
+    try:
+        pvc_ids_by_path = await run_in_threadpool(pvc_ids_by_observer_path, db)
+        paths = list(pvc_ids_by_path)
+
+        entries = []
+        for start in range(0, len(paths), USAGE_BATCH):
+            batch = paths[start:start + USAGE_BATCH]
+            try:
+                response = await data_observer.get("/usage", path=batch)
+            except httpx.HTTPError as e:
+                app_logger.warning(f"PVC usage refresh failed: {e}")
+                break
+            measured_at = now_kst()
+            # Entries come back in request order
+            entries.extend((path, entry, measured_at) for path, entry in zip(batch, response.json()["usage"]))
+        return await run_in_threadpool(store_usage, db, pvc_ids_by_path, entries)
+    finally:
+        db.close()
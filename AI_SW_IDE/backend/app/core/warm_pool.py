@@ -0,0 +1,327 @@
+# app/core/warm_pool.py
+import asyncio
+import datetime
+import hashlib
+import uuid
+from collections import Counter, defaultdict
+from typing import Optional
+
+import httpx
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    NAMESPACE, kube_api, WARM_POOL_ENABLED, WARM_POOL_MAX_PER_KEY, WARM_POOL_MIN_REQUESTS, WARM_POOL_HISTORY_HOURS,
+)
+from app.core.logger import app_logger
+from app.core.manifests import build_pod_manifest, build_pvc_manifest
+from app.core.reservation import claim_placement, bind_reservation, release_reservation
+from app.db.session import SessionLocal
+from app.models.gpu import Flavor, ServerGpuMapping, GpuReservation
+from app.models.k8s import ProvisionJob
+from app.schemas.k8s import PodCreateRequest
+from app.utils import iter_pods, delete_pvc, get_bound_pv_name, now_kst
+
+POD_PREFIX = "ailabserver-warm-"
+POOL_LABEL = "ailab/pool"
+KEY_LABEL = "ailab/pool-key"
+# Claim (and its PV) created for a pool pod; it becomes the user's PVC at handover
+PVC_ANNOTATION = "ailab/pool-pvc"
+PV_ANNOTATION = "ailab/pool-pv"
+# Requests arriving within one bucket each need their own pre-started pod
+DEMAND_BUCKET_MINUTES = 15
+
+
+def pool_key(image: str, gpu: str, cpu: str, memory: str) -> str:
+    """Label-safe key of a request shape"""
+    return hashlib.sha1(f"{image}|{gpu}|{cpu}|{memory}".encode()).hexdigest()[:16]
+
+
+def request_key(request: PodCreateRequest) -> str:
+    return pool_key(request.image, request.gpu, request.cpu, request.memory)
+
+
+def can_hand_over(pod: dict) -> bool:
+    """Running with an IP, and created with a claim of its own (Jupyter readiness is probed at handover)"""
+    status = pod.get("status", {})
+    annotations = pod["metadata"].get("annotations") or {}
+    return (
+        status.get("phase") == "Running" and bool(status.get("podIP"))
+        and PVC_ANNOTATION in annotations and PV_ANNOTATION in annotations
+    )
+
+
+def build_warm_pod_manifest(pod_name: str, pvc_name: str, pv_name: str, key: str, request: PodCreateRequest,
+                            placement) -> dict:
+    """
+    Regular server pod on a claim of its own. Volumes cannot be swapped on a running pod, so the
+    pool never mounts anything a user could reach other users' data through: the pod's new,
+    empty claim is handed over with it instead.
+    """
+    manifest = build_pod_manifest(pod_name, pvc_name, request, placement)
+    manifest["metadata"]["labels"] = {"app": "warm-pool", POOL_LABEL: "warm", KEY_LABEL: key}
+    manifest["metadata"]["annotations"] = {PVC_ANNOTATION: pvc_name, PV_ANNOTATION: pv_name}
+    return manifest
+
+
+def lease_pool_gpu(db: Session, gpu_label: str, pod_name: str):
+    """Claim slices for a pool pod and hold them until a user is assigned; no server owns them yet"""
+    placement = claim_placement(db, gpu_label, holder=pod_name)
+    if placement is not None:
+        bind_reservation(db, pod_name, server_id=None)
+    return placement
+
+
+def release_orphaned_leases(db: Session, live_pods: set[str]) -> int:
+    """
+    Drop the GPU holds of pool pods that are gone without remove_pod (eviction, node loss, manual
+    delete). Pool holds are the only bound reservations without a server; a handed-over pod's
+    hold gets its server in assign_gpu, and until then the (assigned) pod is still live. Only
+    reconcile creates pool pods, and it calls this before creating any, so none is half-made.
+    """
+    query = db.query(GpuReservation).filter(
+        GpuReservation.holder.like(f"{POD_PREFIX}%"),
+        GpuReservation.server_id.is_(None),
+        GpuReservation.expires_at.is_(None),
+    )
+    if live_pods:
+        query = query.filter(GpuReservation.holder.not_in(live_pods))
+    released = query.delete(synchronize_session=False)
+    db.commit()
+    return released
+
+
+async def jupyter_ready(internal_ip: str) -> bool:
+    try:
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            response = await client.get(f"http://{internal_ip}:8888/api/status")
+        return response.status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+class WarmPoolManager:
+    """
+    Keeps pre-started Jupyter pods for frequently requested shapes (image, gpu, cpu, memory)
+    and hands them to matching provisioning jobs, skipping scheduling and startup.
+    """
+
+    def __init__(self, enabled: bool = WARM_POOL_ENABLED):
+        self.enabled = enabled
+        self.shapes: dict[str, dict] = {}
+        self.targets: dict[str, int] = {}
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        # Held while pods change hands (acquire) or leave the pool (reconcile), so a pod listed
+        # as warm is still warm when it is removed
+        self._lock = asyncio.Lock()
+        self._reconcile_lock = asyncio.Lock()
+
+    def compute_targets(self, db: Session) -> dict[str, int]:
+        """Pool size per key: peak arrivals per bucket over the history window, capped"""
+        since = now_kst() - datetime.timedelta(hours=WARM_POOL_HISTORY_HOURS)
+        rows = (
+            db.query(ProvisionJob.image, ProvisionJob.gpu, ProvisionJob.cpu, ProvisionJob.memory, ProvisionJob.created_at)
+            .filter(ProvisionJob.created_at >= since, ProvisionJob.image.is_not(None))
+            .all()
+        )
+        totals = Counter()
+        buckets = defaultdict(Counter)
+        for image, gpu, cpu, memory, created_at in rows:
+            key = pool_key(image, gpu, cpu, memory)
+            self.shapes[key] = {"image": image, "gpu": gpu, "cpu": cpu, "memory": memory}
+            totals[key] += 1
+            bucket = int(created_at.timestamp() // (DEMAND_BUCKET_MINUTES * 60))
+            buckets[key][bucket] += 1
+        return {
+            key: min(WARM_POOL_MAX_PER_KEY, max(buckets[key].values()))
+            for key, total in totals.items()
+            if total >= WARM_POOL_MIN_REQUESTS
+        }
+
+    async def list_pool_pods(self, state: Optional[str] = "warm") -> list[dict]:
+        """Pool pods in one state, or in any state (warm or assigned) for None"""
+        selector = POOL_LABEL if state is None else f"{POOL_LABEL}={state}"
+        pods = await kube_api.run(lambda: list(iter_pods(label_selector=selector)))
+        return [pod for pod in pods if pod["metadata"].get("namespace") == NAMESPACE]
+
+    async def create_pod(self, db: Session, key: str) -> Optional[str]:
+        shape = self.shapes[key]
+        suffix = uuid.uuid4().hex[:10]
+        pod_name = f"{POD_PREFIX}{suffix}"
+        pvc_name = f"ailabserver-claim-warm-{suffix}"
+        request = PodCreateRequest(name=pod_name, description="warm pool", pvc=True, **shape)
+        placement = None
+        if shape["gpu"] != 'None':
+            placement = await run_in_threadpool(lease_pool_gpu, db, shape["gpu"], pod_name)
+            if placement is None:
+                return None  # do not take a GPU away from real requests
+        pvc_created = False
+        try:
+            await kube_api.create_namespaced_persistent_volume_claim(namespace=NAMESPACE, body=build_pvc_manifest(pvc_name))
+            pvc_created = True
+            pv_name = await asyncio.to_thread(get_bound_pv_name, pvc_name, NAMESPACE)
+            if not pv_name:
+                raise RuntimeError(f"PVC '{pvc_name}' was not bound in time")
+            manifest = build_warm_pod_manifest(pod_name, pvc_name, pv_name, key, request, placement)
+            await kube_api.create_namespaced_pod(namespace=NAMESPACE, body=manifest)
+        except Exception as e:
+            app_logger.error(f"Warm pool pod creation failed for key {key}: {e}")
+            await run_in_threadpool(release_reservation, db, pod_name)
+            if pvc_created:
+                await kube_api.run(delete_pvc, pvc_name, NAMESPACE)
+            return None
+        return pod_name
+
+    async def remove_pod(self, db: Session, pod: dict) -> bool:
+        """
+        Delete a pool pod, its claim and its GPU reservation, unless it was handed over since it
+        was listed: the pod is re-read and deleted on that resourceVersion only.
+        """
+        pod_name = pod["metadata"]["name"]
+        try:
+            current = await kube_api.read_namespaced_pod(name=pod_name, namespace=NAMESPACE)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            current = None
+        if current is not None:
+            if (current.metadata.labels or {}).get(POOL_LABEL) != "warm":
+                app_logger.warning(f"Warm pool pod '{pod_name}' was handed over, not removing it")
+                return False
+            options = client.V1DeleteOptions(
+                preconditions=client.V1Preconditions(resource_version=current.metadata.resource_version)
+            )
+            try:
+                await kube_api.delete_namespaced_pod(name=pod_name, namespace=NAMESPACE, body=options)
+            except ApiException as e:
+                if e.status == 409:  # changed after the read: possibly handed over
+                    app_logger.warning(f"Warm pool pod '{pod_name}' changed while being removed, keeping it")
+                    return False
+                if e.status != 404:
+                    raise
+        pvc_name = (pod["metadata"].get("annotations") or {}).get(PVC_ANNOTATION)
+        if pvc_name:
+            await kube_api.run(delete_pvc, pvc_name, NAMESPACE)
+        await run_in_threadpool(release_reservation, db, pod_name)
+        return True
+
+    async def reconcile(self):
+        """Create missing pool pods and delete surplus or dead ones"""
+        if not self.enabled:
+            return
+        async with self._reconcile_lock:
+            db = SessionLocal()
+            try:
+                self.targets = await run_in_threadpool(self.compute_targets, db)
+                # Listing and removing under the handover lock: acquire cannot take a pod
+                # in between that is then deleted as surplus
+                async with self._lock:
+                    pods = await self.list_pool_pods(state=None)
+                    released = await run_in_threadpool(
+                        release_orphaned_leases, db, {pod["metadata"]["name"] for pod in pods}
+                    )
+                    if released:
+                        app_logger.warning(f"Released {released} GPU holds of vanished warm pool pods")
+
+                    by_key = defaultdict(list)
+                    for pod in pods:
+                        if pod["metadata"].get("labels", {}).get(POOL_LABEL) != "warm":
+                            continue
+                        if pod.get("status", {}).get("phase") in ("Failed", "Succeeded"):
+                            await self.remove_pod(db, pod)
+                            continue
+                        by_key[pod["metadata"].get("labels", {}).get(KEY_LABEL)].append(pod)
+
+                    for key, key_pods in by_key.items():
+                        surplus = len(key_pods) - self.targets.get(key, 0)
+                        # newest pods are the least likely to be ready, drop those first
+                        key_pods.sort(key=lambda p: p["metadata"].get("creationTimestamp", ""), reverse=True)
+                        for pod in key_pods[:max(surplus, 0)]:
+                            if await self.remove_pod(db, pod):
+                                app_logger.info(f"Warm pool pod '{pod['metadata']['name']}' removed (key {key})")
+                            key_pods.remove(pod)  # removed, or no longer in the pool
+
+                # Creating waits for PVC binds, so handovers are not held up meanwhile
+                for key, target in self.targets.items():
+                    for _ in range(target - len(by_key.get(key, []))):
+                        pod_name = await self.create_pod(db, key)
+                        if pod_name:
+                            app_logger.info(f"Warm pool pod '{pod_name}' started for key {key}")
+            finally:
+                db.close()
+
+    async def ready_counts(self) -> Counter:
+        """Pool pods per key that could be handed over now; admission counts them as capacity"""
+        if not self.enabled:
+            return Counter()
+        pods = await self.list_pool_pods()
+        return Counter(pod["metadata"].get("labels", {}).get(KEY_LABEL) for pod in pods if can_hand_over(pod))
+
+    async def acquire(self, request: PodCreateRequest, user_id: int) -> Optional[dict]:
+        """
+        Hand a ready pool pod of the request's shape, with the name and PV of its claim, to a
+        request for a new PVC; None on a miss. The label patch carries the observed
+        resourceVersion, so two jobs racing for the same pod cannot both win it (the loser
+        gets 409 and moves on).
+        """
+        if not self.enabled:
+            return None
+        key = request_key(request)
+        async with self._lock:
+            pods = await self.list_pool_pods()
+            pods = [p for p in pods if p["metadata"].get("labels", {}).get(KEY_LABEL) == key and can_hand_over(p)]
+            pods.sort(key=lambda p: p["metadata"].get("creationTimestamp", ""))
+            for pod in pods:
+                internal_ip = pod["status"]["podIP"]
+                annotations = pod["metadata"]["annotations"]
+                if not await jupyter_ready(internal_ip):
+                    continue
+                body = {"metadata": {
+                    "resourceVersion": pod["metadata"]["resourceVersion"],
+                    "labels": {"app": "my-server", POOL_LABEL: "assigned"},
+                    "annotations": {"ailab/user-id": str(user_id)},
+                }}
+                try:
+                    await kube_api.patch_namespaced_pod(pod["metadata"]["name"], NAMESPACE, body)
+                except ApiException as e:
+                    if e.status == 409:
+                        continue
+                    raise
+                self.hits[key] += 1
+                return {
+                    "pod_name": pod["metadata"]["name"],
+                    "internal_ip": internal_ip,
+                    "pvc_name": annotations[PVC_ANNOTATION],
+                    "pv_name": annotations[PV_ANNOTATION],
+                }
+        self.misses[key] += 1
+        return None
+
+    def assign_gpu(self, db: Session, pod_name: str, server_id: int):
+        """Move the pool pod's reserved slices onto the server it now backs"""
+        flavor_ids = [flavor_id for (flavor_id,) in db.query(GpuReservation.flavor_id).filter(GpuReservation.holder == pod_name)]
+        for flavor_id in flavor_ids:
+            db.add(ServerGpuMapping(server_id=server_id, gpu_id=flavor_id))
+        if flavor_ids:
+            db.query(Flavor).filter(Flavor.id.in_(flavor_ids)).update({Flavor.available: 1}, synchronize_session=False)
+        bind_reservation(db, pod_name, server_id, commit=False)
+        db.commit()
+
+    def stats(self) -> list[dict]:
+        keys = set(self.targets) | set(self.hits) | set(self.misses)
+        return [
+            {
+                "key": key,
+                **self.shapes.get(key, {}),
+                "target": self.targets.get(key, 0),
+                "hits": self.hits[key],
+                "misses": self.misses[key],
+            }
+            for key in sorted(keys)
+        ]
+
+
+warm_pool = WarmPoolManager()
@@ -6,19 +6,32 @@ from collections import Counter
 from sqlalchemy.orm import Session
 from app.models.gpu import Flavor, ServerGpuMapping
 from app.db.session import SessionLocal
-from app.core.config import PROMETHEUS_URL, v1_api
+from app.core.config import PROMETHEUS_URL, kube_api
 from app.models.k8s import PodCreation
 from app.models.user import User
 from app.core.logger import app_logger
+from app.core.reservation import reconcile_bound_reservations
+from app.utils.json_codec import loads
 
 url = f"http://{PROMETHEUS_URL}/api/v1/query"
+range_url = f"http://{PROMETHEUS_URL}/api/v1/query_range"
 
 async def query_prometheus(query: str):
     async with httpx.AsyncClient() as client_http:
         response = await client_http.get(url+'?query='+query)
     if response.status_code != 200:
         raise Exception(f"Prometheus query failed: {response.text}")
-    result = response.json()
+    result = loads(response.content)
+    return result.get("data", {}).get("result", [])
+
+async def query_prometheus_range(query: str, start: float, end: float, step: int):
+    """Run a range query and return the raw matrix result"""
+    params = {"query": query, "start": start, "end": end, "step": step}
+    async with httpx.AsyncClient(timeout=30.0) as client_http:
+        response = await client_http.get(range_url, params=params)
+    if response.status_code != 200:
+        raise Exception(f"Prometheus range query failed: {response.text}")
+    result = loads(response.content)
     return result.get("data", {}).get("result", [])
 
 async def fetch_gpu_status_from_prometheus():
@@ -55,7 +68,7 @@ async def get_cpu_memory_from_k8s(pod_name, namespace=None):
             # set to default if namespace not given
             namespace = "default"
         
-        pod = v1_api.read_namespaced_pod(name=pod_name, namespace=namespace)
+        pod = await kube_api.read_namespaced_pod(name=pod_name, namespace=namespace)
         container = pod.spec.containers[0]  # assume the first container
         
         limits = container.resources.limits or {}
@@ -75,7 +88,7 @@ async def get_pod_internal_ip(pod_name, namespace=None):
         if namespace is None:
             namespace = "default"
         
-        pod = v1_api.read_namespaced_pod(name=pod_name, namespace=namespace)
+        pod = await kube_api.read_namespaced_pod(name=pod_name, namespace=namespace)
         internal_ip = pod.status.pod_ip
         
         return internal_ip
@@ -199,6 +212,7 @@ async def sync_gpu_pod_status_from_prometheus():
             db.delete(server)
 
         # 5. Process currently running Pods (existing logic)
+        observed_slices = defaultdict(set)  # server id -> gpu_flavor ids DCGM reports in use
         for pod_name, gpu_names in pod_gpu_map.items():
             app_logger.debug(f"pod_name: {pod_name} gpu_names: {gpu_names}")
             
@@ -316,6 +330,7 @@ async def sync_gpu_pod_status_from_prometheus():
                     gpu_flavor = query.first()
                     
                     if gpu_flavor:
+                        observed_slices[server.id].add(gpu_flavor.id)
                         # Check for duplicates
                         existing_mapping = db.query(ServerGpuMapping).filter(
                             ServerGpuMapping.server_id == server.id,
@@ -332,6 +347,8 @@ async def sync_gpu_pod_status_from_prometheus():
                             db.add(mapping)
                             mapping_count += 1
 
+        # 6. Reservations follow the devices actually assigned
+        reconcile_bound_reservations(db, observed_slices)
 
         db.commit()
     except Exception as e:
@@ -2,6 +2,7 @@
 from fastapi import FastAPI, Request
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 import logging
 import uvicorn
@@ -13,10 +14,20 @@ from app.api.routes.proxy import proxy_kernelspecs, proxy_static_files, proxy_nb
 import csv
 from app.models import user, gpu, k8s
 from app.db.session import SessionLocal
-from app.core.config import CORS_ORIGINS, APP_PORT, GPU_FETCH
+from app.core.config import (
+    CORS_ORIGINS, APP_PORT, GPU_FETCH, WARM_POOL_INTERVAL, IDLE_CULL_ENABLED, IDLE_CHECK_INTERVAL,
+    PVC_USAGE_ENABLED, PVC_USAGE_INTERVAL,
+)
 from app.db.init_database import init_users_from_csv, init_flavors_from_csv
 from app.db.fetch_gpu import sync_flavors_to_db, sync_gpu_pod_status_from_prometheus
 from app.core.logger import app_logger
+from app.core.reservation import purge_expired_reservations
+from app.core.provisioning import recover_interrupted_jobs
+from app.core.termination import recover_terminations
+from app.core.culling import cull_idle_servers
+from app.core.usage import refresh_pvc_usage
+from app.core.data_observer import data_observer
+from app.core.warm_pool import warm_pool
 
 async def scheduled_sync_gpu_flavors():
     """GPU flavor synchronization task that runs every 30 seconds"""
@@ -25,6 +36,35 @@ async def scheduled_sync_gpu_flavors():
         await sync_gpu_pod_status_from_prometheus()  # Synchronize servers table
     except Exception as e:
         app_logger.error(f"GPU sync error: {e}")
+    db = SessionLocal()
+    try:
+        await run_in_threadpool(purge_expired_reservations, db)  # Drop GPU leases nobody bound
+    except Exception as e:
+        app_logger.error(f"GPU lease purge error: {e}")
+    finally:
+        db.close()
+
+async def scheduled_reconcile_warm_pool():
+    """Keep the pre-started pod pool at its demand-based size"""
+    try:
+        await warm_pool.reconcile()
+    except Exception as e:
+        app_logger.error(f"Warm pool reconcile error: {e}")
+
+async def scheduled_cull_idle_servers():
+    """Terminate (or, in dry-run mode, report) servers idle past their threshold"""
+    try:
+        await cull_idle_servers()
+    except Exception as e:
+        app_logger.error(f"Idle culling error: {e}")
+
+async def scheduled_refresh_pvc_usage():
+    """Store per-PVC storage usage from the data observer's file index"""
+    try:
+        measured = await refresh_pvc_usage()
+        app_logger.debug(f"PVC usage refreshed for {measured} PVCs")
+    except Exception as e:
+        app_logger.error(f"PVC usage refresh error: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -32,6 +72,8 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     init_users_from_csv("./app/db/default_users.csv")
     init_flavors_from_csv("./app/db/default_gpu_flavors.csv")
+    await recover_interrupted_jobs()
+    await recover_terminations()
     
     # Start APScheduler
     scheduler = AsyncIOScheduler()
@@ -42,6 +84,30 @@ async def lifespan(app: FastAPI):
         id="sync_gpu_flavors",
         replace_existing=True
     )
+    if warm_pool.enabled:
+        scheduler.add_job(
+            scheduled_reconcile_warm_pool,
+            "interval",
+            seconds=WARM_POOL_INTERVAL,
+            id="reconcile_warm_pool",
+            replace_existing=True
+        )
+    if IDLE_CULL_ENABLED:
+        scheduler.add_job(
+            scheduled_cull_idle_servers,
+            "interval",
+            seconds=IDLE_CHECK_INTERVAL,
+            id="cull_idle_servers",
+            replace_existing=True
+        )
+    if PVC_USAGE_ENABLED:
+        scheduler.add_job(
+            scheduled_refresh_pvc_usage,
+            "interval",
+            seconds=PVC_USAGE_INTERVAL,
+            id="refresh_pvc_usage",
+            replace_existing=True
+        )
     scheduler.start()
     app_logger.info(f"GPU sync scheduler started ({GPU_FETCH}s interval)")
     
@@ -50,6 +116,7 @@ async def lifespan(app: FastAPI):
     # Cleanup scheduler on app shutdown
     scheduler.shutdown()
     app_logger.info("GPU sync scheduler stopped")
+    await data_observer.aclose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -66,6 +133,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 app.include_router(api_router)
@@ -37,4 +37,16 @@ class ServerGpuMapping(Base):
     # set relationship
     server = relationship("PodCreation", foreign_keys=[server_id])
     gpu_flavor = relationship("Flavor", foreign_keys=[gpu_id])
-    
+
+
+class GpuReservation(Base):
+    __tablename__ = "gpu_reservation"
+
+    id = Column(Integer, primary_key=True, index=True)
+    flavor_id = Column(Integer, ForeignKey("gpu_flavor.id", ondelete="CASCADE"), nullable=False, unique=True)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=True, index=True)
+    holder = Column(String, nullable=False, index=True)  # pod name of the request holding the lease
+    status = Column(String, nullable=False, default="Leased")  # Leased -> Bound
+    expires_at = Column(DateTime(timezone=True), nullable=True)  # NULL once bound to a running server
+
+    gpu_flavor = relationship("Flavor", foreign_keys=[flavor_id])
@@ -1,5 +1,5 @@
 # app/models/pod_creation.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Table, Boolean
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -33,6 +33,7 @@ class PodCreation(Base):
     tags = Column(String, nullable=True)
 
     pvcs = relationship("PVC", secondary=pvc_server_association, back_populates="servers")
+    gpu_mappings = relationship("ServerGpuMapping", viewonly=True)
 
 
 class PVC(Base):
@@ -48,5 +49,57 @@ class PVC(Base):
     created_at = Column(DateTime(timezone=True), default=now_kst)
 
     servers = relationship("PodCreation", secondary=pvc_server_association, back_populates="pvcs")
-    
-    
\ No newline at end of file
+
+
+class ProvisionJob(Base):
+    __tablename__ = "provision_jobs"
+
+    id = Column(String, primary_key=True, index=True)  # uuid hex
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=True)
+
+    pod_name = Column(String, nullable=False)
+    pvc_name = Column(String, nullable=True)
+    owns_pvc = Column(Boolean, nullable=False, default=False)  # PVC created by this job (removed on failure)
+
+    # Requested shape, also the request history the warm pool is sized from
+    image = Column(String, nullable=True)
+    gpu = Column(String, nullable=True)
+    cpu = Column(String, nullable=True)
+    memory = Column(String, nullable=True)
+
+    stage = Column(String, nullable=False, default="Queued")
+    status = Column(String, nullable=False, default="Pending")  # Pending / Running / Succeeded / Failed
+    detail = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=now_kst)
+    updated_at = Column(DateTime(timezone=True), default=now_kst, onupdate=now_kst)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ServerTermination(Base):
+    __tablename__ = "server_terminations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: the server row is removed once the pod is gone, this record stays for accounting
+    server_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    pod_name = Column(String, nullable=False)
+    gpu = Column(String, nullable=True)
+
+    status = Column(String, nullable=False, default="Terminating")  # Terminating / Terminated / Failed
+    detail = Column(String, nullable=True)
+    requested_at = Column(DateTime(timezone=True), default=now_kst)
+    terminated_at = Column(DateTime(timezone=True), nullable=True)  # pod actually gone, GPUs released
+
+
+class PVCUsage(Base):
+    """Latest measured usage of a PVC's volume, refreshed on a schedule from the data observer's index"""
+    __tablename__ = "pvc_usage"
+
+    pvc_id = Column(Integer, ForeignKey("pvcs.id", ondelete="CASCADE"), primary_key=True)
+    # Null until the volume was measured once
+    used_bytes = Column(BigInteger, nullable=True)
+    file_count = Column(Integer, nullable=True)
+    directory_count = Column(Integer, nullable=True)
+    measured_at = Column(DateTime(timezone=True), nullable=True)
+    detail = Column(String, nullable=True)  # why the last refresh could not measure it, or why its figures may lag
@@ -14,6 +14,17 @@ class PodCreateRequest(BaseModel):
     pvc_id: Optional[int] = None
     pvc_name: Optional[str] = None
 
+class ProvisionJobResponse(BaseModel):
+    job_id: str
+    server_id: Optional[int] = None
+    pod_name: str
+    stage: str
+    status: str
+    detail: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class NFSPVCCreateRequest(BaseModel):
     nfs_path: str
     pvc_name: str
@@ -58,6 +69,30 @@ class DeleteRequest(BaseModel):
 class DeletePVCRequest(BaseModel):
     name: str
     pv: Optional[bool] = False
+
+
+class BulkPodCreateRequest(BaseModel):
+    servers: List[PodCreateRequest]
+
+
+class BulkDeleteRequest(BaseModel):
+    names: List[str]
+
+
+class BulkDeletePVCRequest(BaseModel):
+    names: List[str]
+    pv: Optional[bool] = False
+
+
+class BulkItemResult(BaseModel):
+    name: str
+    status: str  # Accepted / Rejected / Terminating / Deleted / NotFound / Failed
+    detail: Optional[str] = None
+    job_id: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
     
 
 class PVCResponse(BaseModel):
@@ -79,3 +114,13 @@ class PVCDropdownResponse(BaseModel):
 
 class PVCListResponse(BaseModel):
     pvcs: list[PVCDropdownResponse]
+
+class PVCUsageResponse(BaseModel):
+    pvc_id: int
+    pvc_name: str
+    path: Optional[str] = None
+    used_bytes: Optional[int] = None  # None until the first measurement
+    file_count: Optional[int] = None
+    directory_count: Optional[int] = None
+    measured_at: Optional[datetime] = None
+    detail: Optional[str] = None
@@ -1,8 +1,8 @@
 # utils/__init__.py
 from .auth import hash_password, create_access_token, verify_password, decode_refresh_token, get_current_user
-from .k8s import get_bound_pv_name, delete_pvc, delete_pod
+from .k8s import get_bound_pv_name, delete_pvc, delete_pod, iter_pods, list_gpu_pods, run_bounded
 from .common import now_kst
-from .prometheus import parse_gpu_data
+from .prometheus import parse_gpu_data, parse_range_matrix, summarize_matrix, group_rows
 
 __all__ = [
     "hash_password",
@@ -13,6 +13,12 @@ __all__ = [
     "get_bound_pv_name",
     "delete_pvc",
     "delete_pod",
+    "iter_pods",
+    "list_gpu_pods",
+    "run_bounded",
     "now_kst",
-    "parse_gpu_data"
+    "parse_gpu_data",
+    "parse_range_matrix",
+    "summarize_matrix",
+    "group_rows",
 ]
\ No newline at end of file
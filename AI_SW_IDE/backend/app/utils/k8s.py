@@ -1,25 +1,205 @@
 import time
+import json
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Iterable, Iterator, Optional
 
+from kubernetes import watch
 from kubernetes.client.rest import ApiException
 from sqlalchemy.orm import Session
 
 from app.models.k8s import PVC, PodCreation
 from app.core.logger import app_logger
-from app.core.config import v1_api
+from app.core.config import v1_api, kube_api, K8S_LIST_PAGE_SIZE, GPU_POD_INDEX_TTL, BULK_CONCURRENCY
+from app.utils.cache import TTLCache
 
+GPU_RESOURCE_PREFIX = "nvidia.com/"
 
-def get_bound_pv_name(pvc_name: str, namespace: str, timeout: int = 30):
-    for _ in range(timeout):
-        pvc = v1_api.read_namespaced_persistent_volume_claim(name=pvc_name, namespace=namespace)
-        if pvc.status.phase == "Bound":
-            return pvc.spec.volume_name
-        time.sleep(1)
-    return None 
+# (node, phase) -> list of GPU pod summaries
+gpu_pod_index = TTLCache(ttl=GPU_POD_INDEX_TTL, maxsize=128)
+
+
+def build_field_selector(node_name: Optional[str] = None, phase: Optional[str] = None) -> Optional[str]:
+    selectors = []
+    if node_name:
+        selectors.append(f"spec.nodeName={node_name}")
+    if phase:
+        selectors.append(f"status.phase={phase}")
+    return ",".join(selectors) or None
+
+
+def iter_pods(field_selector: Optional[str] = None, label_selector: Optional[str] = None,
+              page_size: int = K8S_LIST_PAGE_SIZE) -> Iterator[dict]:
+    """
+    Yield pods of all namespaces as plain dicts, one page (limit/_continue) at a time.
+    Raw JSON is used instead of the client models so a page is cheap to decode and
+    dropped as soon as it has been consumed.
+    """
+    _continue = None
+    while True:
+        kwargs = {"limit": page_size, "_preload_content": False}
+        if field_selector:
+            kwargs["field_selector"] = field_selector
+        if label_selector:
+            kwargs["label_selector"] = label_selector
+        if _continue:
+            kwargs["_continue"] = _continue
+        response = v1_api.list_pod_for_all_namespaces(**kwargs)
+        page = json.loads(response.data)
+        yield from page.get("items", [])
+        _continue = page.get("metadata", {}).get("continue")
+        if not _continue:
+            break
+
+
+def extract_gpu_pods(pod: dict) -> list[dict]:
+    """Return one entry per container of the pod that has an NVIDIA resource limit"""
+    gpu_pods = []
+    metadata = pod.get("metadata", {})
+    spec = pod.get("spec", {})
+    for container in spec.get("containers", []):
+        limits = (container.get("resources") or {}).get("limits") or {}
+        for key, value in limits.items():
+            if not key.startswith(GPU_RESOURCE_PREFIX) or int(value) <= 0:
+                continue
+            split_pod_name = metadata["name"].split('-')
+            if split_pod_name[0] == 'jupyter':
+                user_name = '.'.join(split_pod_name[1:3])
+            elif split_pod_name[0] == 'ailabServer':
+                continue
+            else:
+                user_name = None
+            gpu_pods.append({
+                "pod_name": metadata["name"],
+                "namespace": metadata.get("namespace"),
+                "node_name": spec.get("nodeName"),
+                "gpu_count": int(value),
+                "container_name": container.get("name"),
+                "gpu_resource_type": key,
+                "user": user_name
+            })
+    return gpu_pods
+
+
+def list_gpu_pods(node_name: Optional[str] = None, phase: Optional[str] = None, refresh: bool = False) -> list[dict]:
+    """GPU pods filtered server-side by node/phase; results are cached for GPU_POD_INDEX_TTL seconds"""
+    cache_key = (node_name, phase)
+    if not refresh:
+        cached = gpu_pod_index.get(cache_key)
+        if cached is not None:
+            return cached
+
+    gpu_pods = []
+    for pod in iter_pods(field_selector=build_field_selector(node_name, phase)):
+        gpu_pods.extend(extract_gpu_pods(pod))
+    gpu_pod_index.set(cache_key, gpu_pods)
+    return gpu_pods
+
+
+class PVCBindWatcher:
+    """
+    Resolves waiters as soon as their PVC reports Bound.
+    All waiters of a namespace share one watch stream, which runs in a daemon
+    thread only while somebody is waiting.
+    """
+
+    # Seconds before the watch is re-established (and idle streams wind down)
+    STREAM_TIMEOUT = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = defaultdict(lambda: defaultdict(list))  # namespace -> pvc_name -> [waiter]
+        self._streams: dict[str, threading.Thread] = {}
+
+    def wait(self, pvc_name: str, namespace: str, timeout: float) -> Optional[str]:
+        waiter = {"event": threading.Event(), "volume_name": None}
+        with self._lock:
+            self._waiters[namespace][pvc_name].append(waiter)
+            self._ensure_stream(namespace)
+        try:
+            # The claim may have been bound before the stream saw it
+            pvc = v1_api.read_namespaced_persistent_volume_claim(name=pvc_name, namespace=namespace)
+            if pvc.status.phase == "Bound":
+                return pvc.spec.volume_name
+            if waiter["event"].wait(timeout):
+                return waiter["volume_name"]
+            return None
+        finally:
+            with self._lock:
+                waiters = self._waiters[namespace]
+                waiters[pvc_name].remove(waiter)
+                if not waiters[pvc_name]:
+                    del waiters[pvc_name]
+
+    def _ensure_stream(self, namespace: str):
+        stream = self._streams.get(namespace)
+        if stream is None or not stream.is_alive():
+            stream = threading.Thread(target=self._run, args=(namespace,), name=f"pvc-watch-{namespace}", daemon=True)
+            self._streams[namespace] = stream
+            stream.start()
+
+    def _has_waiters(self, namespace: str) -> bool:
+        with self._lock:
+            if self._waiters[namespace]:
+                return True
+            self._streams.pop(namespace, None)
+            return False
+
+    def _resolve(self, namespace: str, pvc_name: str, volume_name: str):
+        with self._lock:
+            for waiter in self._waiters[namespace].get(pvc_name, ()):
+                waiter["volume_name"] = volume_name
+                waiter["event"].set()
+
+    def _run(self, namespace: str):
+        while self._has_waiters(namespace):
+            stream = watch.Watch()
+            try:
+                for event in stream.stream(
+                    v1_api.list_namespaced_persistent_volume_claim,
+                    namespace=namespace,
+                    timeout_seconds=self.STREAM_TIMEOUT,
+                ):
+                    pvc = event["object"]
+                    if pvc.status and pvc.status.phase == "Bound":
+                        self._resolve(namespace, pvc.metadata.name, pvc.spec.volume_name)
+                    if not self._waiters[namespace]:
+                        stream.stop()
+            except Exception as e:
+                app_logger.warning(f"PVC watch on '{namespace}' interrupted: {e}")
+                time.sleep(1)
+
+
+pvc_bind_watcher = PVCBindWatcher()
+
+
+def get_bound_pv_name(pvc_name: str, namespace: str, timeout: int = 30, db: Session = None):
+    """
+    Name of the PV bound to the claim, waiting up to `timeout` seconds for the bind.
+    With a DB session the PV recorded on the PVC row is used without asking Kubernetes.
+    """
+    if db is not None:
+        pvc_record = db.query(PVC).filter(PVC.pvc_name == pvc_name).first()
+        if pvc_record and pvc_record.pv:
+            return pvc_record.pv
+    try:
+        if timeout <= 0:
+            pvc = v1_api.read_namespaced_persistent_volume_claim(name=pvc_name, namespace=namespace)
+            return pvc.spec.volume_name if pvc.status.phase == "Bound" else None
+        return pvc_bind_watcher.wait(pvc_name, namespace, timeout)
+    except ApiException as e:
+        if e.status == 404:
+            return None
+        raise
   
-def delete_pvc(pvc_name: str, namespace: str, db: Session = None, delete_db: bool = False, delete_pv: bool = True):
+def delete_pvc(pvc_name: str, namespace: str, db: Session = None, delete_db: bool = False, delete_pv: bool = True,
+               raise_errors: bool = False):
+    bound_pv_name = None
     if delete_pv:
         try:
-            bound_pv_name = get_bound_pv_name(pvc_name, namespace)
+            # A claim being deleted will not get bound anymore: no waiting
+            bound_pv_name = get_bound_pv_name(pvc_name, namespace, timeout=0, db=db)
             if bound_pv_name:
                 app_logger.info(f"Found bound PV: {bound_pv_name}")
             else:
@@ -35,6 +215,8 @@ def delete_pvc(pvc_name: str, namespace: str, db: Session = None, delete_db: boo
         app_logger.info(f"PVC '{pvc_name}' deleted from Kubernetes")
     except ApiException as e:
         app_logger.error(f"Failed to delete PVC from Kubernetes: {e}")
+        if raise_errors and e.status != 404:
+            raise
 
     if delete_pv and bound_pv_name:
         try:
@@ -55,7 +237,7 @@ def delete_pvc(pvc_name: str, namespace: str, db: Session = None, delete_db: boo
         except Exception as e:
             app_logger.error(f"Error while deleting PVC from DB: {e}")
             
-def delete_pod(pod_name: str, namespace: str, db: Session = None, delete_db: bool = False):
+def delete_pod(pod_name: str, namespace: str, db: Session = None, delete_db: bool = False, raise_errors: bool = False):
     try:
         v1_api.delete_namespaced_pod(
             name=pod_name,
@@ -64,6 +246,8 @@ def delete_pod(pod_name: str, namespace: str, db: Session = None, delete_db: boo
         app_logger.info(f"Pod '{pod_name}' deleted from Kubernetes")
     except ApiException as e:
         app_logger.error(f"Failed to delete Pod from Kubernetes: {e}")
+        if raise_errors and e.status != 404:  # already gone counts as deleted
+            raise
 
     if delete_db and db is not None:
         try:
@@ -76,4 +260,17 @@ def delete_pod(pod_name: str, namespace: str, db: Session = None, delete_db: boo
                 app_logger.warning(f"No Pod record found in DB with name: {pod_name}")
         except Exception as e:
             app_logger.error(f"Error while deleting Pod from DB: {e}")
-            
+
+
+async def run_bounded(func: Callable[[Any], Any], items: Iterable[Any], limit: int = BULK_CONCURRENCY) -> list:
+    """
+    Run a blocking Kubernetes call for every item on the Kubernetes executor, at most `limit` at a time.
+    Results keep the order of items; a failed call yields its exception instead of a result.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await kube_api.run(func, item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
@@ -1,5 +1,7 @@
+import warnings
 from collections import defaultdict
 
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.models.k8s import PodCreation
@@ -40,3 +42,62 @@ def parse_gpu_data(raw_data: list[dict], db: Session):
             result[node][gpu_id] = [slot_info]  # non-MIG: single slot
 
     return result
+
+
+def parse_range_matrix(result: list[dict], labels: tuple[str, ...], start: float, step: int, points: int):
+    """
+    Align a Prometheus matrix result on a common step grid.
+
+    Returns the label tuple of every series and a (series x points) float array
+    where missing samples are NaN.
+    """
+    keys = []
+    matrix = np.full((len(result), points), np.nan)
+    for row, series in enumerate(result):
+        keys.append(tuple(series["metric"].get(label, "") for label in labels))
+        samples = np.asarray(series.get("values", []), dtype=float)
+        if samples.size == 0:
+            continue
+        idx = np.rint((samples[:, 0] - start) / step).astype(int)
+        valid = (idx >= 0) & (idx < points)
+        matrix[row, idx[valid]] = samples[valid, 1]
+    return keys, matrix
+
+
+def summarize_matrix(matrix: np.ndarray, scale: float = 1.0) -> list[dict]:
+    """Mean / p95 / max of every row of an aligned matrix (NaN samples ignored)"""
+    if matrix.size == 0:
+        return []
+    with warnings.catch_warnings():
+        # all-NaN rows (series without samples in the window) yield NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        stats = np.vstack((
+            np.nanmean(matrix, axis=1),
+            np.nanpercentile(matrix, 95, axis=1),
+            np.nanmax(matrix, axis=1),
+        )) * scale
+    stats = np.round(stats, 2)
+    return [
+        {
+            name: (None if np.isnan(value) else float(value))
+            for name, value in zip(("mean", "p95", "max"), column)
+        }
+        for column in stats.T
+    ]
+
+
+def group_rows(keys: list[tuple], matrix: np.ndarray, position: int = 0):
+    """Average rows that share keys[position] per time step (e.g. all GPUs of a node)"""
+    groups = sorted({key[position] for key in keys})
+    if not groups:
+        return [], np.empty((0, matrix.shape[1]))
+    index = {group: i for i, group in enumerate(groups)}
+    inverse = np.fromiter((index[key[position]] for key in keys), dtype=int, count=len(keys))
+    present = ~np.isnan(matrix)
+    sums = np.zeros((len(groups), matrix.shape[1]))
+    counts = np.zeros((len(groups), matrix.shape[1]))
+    np.add.at(sums, inverse, np.where(present, matrix, 0.0))
+    np.add.at(counts, inverse, present)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grouped = np.where(counts > 0, sums / counts, np.nan)
+    return groups, grouped
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compare the stdlib json path with app.utils.json_codec on realistic payloads.
+
+    python benchmarks/bench_json.py --nodes 32 --gpus 8 --points 240
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import timeit
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.json_codec import ORJSON_AVAILABLE, dumps, loads
+from app.schemas.k8s import EntireServerResponse
+
+MIG_PROFILES = ["1g.10gb", "2g.20gb", "3g.40gb", "4g.40gb"]
+
+
+def dcgm_labels(node: int, gpu: int, mig_id: int, rng: random.Random) -> dict:
+    labels = {
+        "__name__": "DCGM_FI_DEV_MIG_MODE",
+        "DCGM_FI_DRIVER_VERSION": "535.129.03",
+        "Hostname": f"k8s-worker-{node}",
+        "UUID": f"GPU-{uuid.UUID(int=rng.getrandbits(128))}",
+        "container": "nvidia-dcgm-exporter",
+        "device": f"nvidia{gpu}",
+        "endpoint": "gpu-metrics",
+        "gpu": str(gpu),
+        "instance": f"10.0.{node}.{gpu + 10}:9400",
+        "job": "nvidia-dcgm-exporter",
+        "modelName": "NVIDIA A100 80GB PCIe",
+        "namespace": "gpu-operator",
+        "pci_bus_id": f"00000000:{gpu + 0x17:02X}:00.0",
+        "pod": f"nvidia-dcgm-exporter-{uuid.UUID(int=rng.getrandbits(128)).hex[:5]}",
+        "service": "nvidia-dcgm-exporter",
+    }
+    if mig_id >= 0:
+        labels["GPU_I_PROFILE"] = rng.choice(MIG_PROFILES)
+        labels["GPU_I_ID"] = str(mig_id)
+    if rng.random() < 0.6:
+        labels["exported_pod"] = f"ailabserver-user{rng.randint(1, 500)}-{uuid.UUID(int=rng.getrandbits(128)).hex[:6]}"
+        labels["exported_namespace"] = "gpu-dashboard"
+        labels["exported_container"] = "server-container"
+    return labels
+
+
+def prometheus_payload(nodes: int, gpus: int, points: int, rng: random.Random) -> bytes:
+    """Instant vector (points == 0) or range matrix of DCGM series"""
+    now = 1_700_000_000
+    result = []
+    for node in range(nodes):
+        for gpu in range(gpus):
+            for mig_id in ([0, 1, 2] if gpu % 2 == 0 else [-1]):
+                series = {"metric": dcgm_labels(node, gpu, mig_id, rng)}
+                if points:
+                    series["values"] = [[now - 15 * i, str(rng.randint(0, 100))] for i in range(points)]
+                else:
+                    series["value"] = [now, str(rng.randint(0, 1))]
+                result.append(series)
+    result_type = "matrix" if points else "vector"
+    return json.dumps({"status": "success", "data": {"resultType": result_type, "result": result}}).encode()
+
+
+def server_rows(count: int, rng: random.Random) -> list[dict]:
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=9)))
+    return [
+        {
+            "userName": f"user{rng.randint(1, 500)}",
+            "gpu": rng.choice(MIG_PROFILES + ["A100 80GB"]),
+            "cpuMem": f"{rng.choice([4, 8, 16])}/{rng.choice([16, 32, 64])}Gi",
+            "createdAt": base + datetime.timedelta(minutes=i),
+            "status": rng.choice(["Running", "Creating", "Terminated"]),
+            "node": [f"k8s-worker-{rng.randint(0, 31)} [{rng.randint(0, 7)}, {rng.randint(0, 6)}]"],
+            "tags": "LEGEND",
+        }
+        for i in range(count)
+    ]
+
+
+def stdlib_encode_validated(rows: list[dict]) -> bytes:
+    """What FastAPI does for response_model + JSONResponse"""
+    models = [EntireServerResponse(**row) for row in rows]
+    return json.dumps([m.model_dump(mode="json") for m in models]).encode()
+
+
+def report(name: str, baseline, fast, repeat: int):
+    base_t = min(timeit.repeat(baseline, number=1, repeat=repeat))
+    fast_t = min(timeit.repeat(fast, number=1, repeat=repeat))
+    print(f"{name:<34} stdlib {base_t * 1000:9.2f} ms   codec {fast_t * 1000:9.2f} ms   x{base_t / fast_t:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON codec benchmark")
+    parser.add_argument("--nodes", type=int, default=32)
+    parser.add_argument("--gpus", type=int, default=8)
+    parser.add_argument("--points", type=int, default=240, help="Samples per series in the range payload")
+    parser.add_argument("--servers", type=int, default=5000, help="Rows in the /server/list payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    instant = prometheus_payload(args.nodes, args.gpus, 0, rng)
+    matrix = prometheus_payload(args.nodes, args.gpus, args.points, rng)
+    rows = server_rows(args.servers, rng)
+
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+    print(f"instant payload {len(instant) / 1024:.0f} KiB, range payload {len(matrix) / 1024 / 1024:.1f} MiB, {len(rows)} server rows\n")
+    report("decode DCGM instant vector", lambda: json.loads(instant), lambda: loads(instant), args.repeat)
+    report("decode DCGM range matrix", lambda: json.loads(matrix), lambda: loads(matrix), args.repeat)
+    report("encode /server/list", lambda: stdlib_encode_validated(rows), lambda: dumps(rows), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
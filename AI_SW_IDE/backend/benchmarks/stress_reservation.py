@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrent GPU slice claiming against a real PostgreSQL database.
+
+Seeds synthetic MIG slices, lets N threads claim them in parallel through
+claim_placement() and checks that no slice was handed out twice.
+Before that, the stale-snapshot interleaving is replayed: a claim whose lock step still
+sees a slice as free after another transaction committed a lease on it must not take it over.
+Use a scratch database: the tables are created if missing and every free
+2g.20gb slice in it takes part in the run.
+
+    python benchmarks/stress_reservation.py --database-url postgresql://user:pw@host/scratch --workers 1,2,4,8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test for SKIP LOCKED GPU reservations")
+    parser.add_argument("--database-url", required=True, help="PostgreSQL URL of a scratch database")
+    parser.add_argument("--slices", type=int, default=400, help="Synthetic 2g.20gb slices to seed")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated thread counts (keep below the connection pool size)")
+    args = parser.parse_args()
+
+    # app.db.session reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # The app modules come first: they import every model, registering all tables with Base
+    from app.core import reservation
+    from app.core.reservation import claim_placement
+    from app.db.session import Base, SessionLocal, engine
+    from app.models.gpu import Flavor, GpuReservation
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seeded = [
+        Flavor(gpu_name="2g.20gb", available=0, worker_node=f"stress-node-{i // 21}", gpu_id=(i // 3) % 7, mig_id=i % 3)
+        for i in range(args.slices)
+    ]
+    db.add_all(seeded)
+    db.commit()
+    seeded_ids = [f.id for f in seeded]
+    db.close()
+    engine.pool.dispose()
+
+    def interleaving_check() -> bool:
+        """
+        T1 commits a lease; T2's lock query was evaluated on a snapshot from before that commit,
+        so it locks T1's slice anyway. T2 must notice the live lease and claim another slice.
+        """
+        first, second = SessionLocal(), SessionLocal()
+        lock_slices = reservation._lock_slices
+        try:
+            leased = claim_placement(first, "2g.20gb", holder="stress-interleave-1")
+            calls = []
+
+            def lock_as_of_old_snapshot(db, flavor_ids, count):
+                calls.append(flavor_ids)
+                if len(calls) == 1:  # first lock: T1's slice still looks free
+                    return db.query(Flavor).filter(Flavor.id.in_(leased.flavor_ids)).with_for_update(of=Flavor).all()
+                return lock_slices(db, flavor_ids, count)
+
+            reservation._lock_slices = lock_as_of_old_snapshot
+            second_placement = claim_placement(second, "2g.20gb", holder="stress-interleave-2")
+            holders = {
+                r.flavor_id: r.holder
+                for r in first.query(GpuReservation).filter(GpuReservation.flavor_id.in_(leased.flavor_ids))
+            }
+            return (
+                second_placement is not None
+                and not set(second_placement.flavor_ids) & set(leased.flavor_ids)
+                and all(holder == "stress-interleave-1" for holder in holders.values())
+            )
+        finally:
+            reservation._lock_slices = lock_slices
+            first.rollback()
+            first.query(GpuReservation).filter(GpuReservation.holder.like("stress-interleave-%")).delete(synchronize_session=False)
+            first.commit()
+            first.close()
+            second.close()
+
+    def worker(index: int, run: str, claimed: list, errors: list):
+        session = SessionLocal()
+        try:
+            i = 0
+            while True:
+                placement = claim_placement(session, "2g.20gb", holder=f"stress-{run}-{index}-{i}")
+                if placement is None:
+                    return
+                claimed.extend(placement.flavor_ids)
+                i += 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    print(f"Seeded {len(seeded_ids)} slices")
+    print(f"Stale-snapshot interleaving: {'ok' if interleaving_check() else 'DOUBLE-BOOKED'}\n")
+    print(f"{'workers':>8} {'claims':>8} {'seconds':>9} {'claims/s':>10} {'double-booked':>14}")
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            cleanup = SessionLocal()
+            cleanup.query(GpuReservation).filter(GpuReservation.flavor_id.in_(seeded_ids)).delete(synchronize_session=False)
+            cleanup.commit()
+            cleanup.close()
+
+            claimed, errors = [], []
+            threads = [threading.Thread(target=worker, args=(i, str(workers), claimed, errors)) for i in range(workers)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            doubles = sum(1 for count in Counter(claimed).values() if count > 1)
+            print(f"{workers:>8} {len(claimed):>8} {elapsed:>9.2f} {len(claimed) / elapsed:>10.1f} {doubles:>14}")
+            for e in errors:
+                print(f"    worker error: {e}")
+    finally:
+        cleanup = SessionLocal()
+        cleanup.query(GpuReservation).filter(GpuReservation.flavor_id.in_(seeded_ids)).delete(synchronize_session=False)
+        cleanup.query(Flavor).filter(Flavor.id.in_(seeded_ids)).delete(synchronize_session=False)
+        cleanup.commit()
+        cleanup.close()
+
+
+if __name__ == "__main__":
+    main()
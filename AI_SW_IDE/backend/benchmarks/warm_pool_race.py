@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Warm pool handover racing reconcile, against an in-memory stand-in for the Kubernetes API.
+
+reconcile lists the pool and then removes surplus pods; a job acquiring one of those pods in
+between must keep it (pod, claim and GPU hold). Also checks that reconcile releases the GPU
+hold of a pool pod that vanished without remove_pod, but not the hold of a pod just handed over.
+Use a scratch database: the tables are created if missing.
+
+    python benchmarks/warm_pool_race.py --database-url sqlite:////tmp/warm_pool_race.db
+"""
+import argparse
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+SHAPE = {"image": "jupyter", "gpu": "2g.20gb", "cpu": "4", "memory": "16"}
+
+
+class FakeCluster:
+    """Pods as dicts, with the resourceVersion checks of patch and delete"""
+
+    def __init__(self, key: str, pool_label: str, key_label: str, pvc_annotation: str, pv_annotation: str):
+        self.pods = {}
+        self.deleted_pvcs = []
+        self.on_list = None
+        for i, state in enumerate(["warm", "warm", "assigned"]):
+            name = f"ailabserver-warm-race{i}"
+            self.pods[name] = {
+                "metadata": {
+                    "name": name,
+                    "namespace": None,
+                    "resourceVersion": "1",
+                    "creationTimestamp": f"2026-01-01T00:00:0{i}Z",
+                    "labels": {pool_label: state, key_label: key},
+                    "annotations": {pvc_annotation: f"ailabserver-claim-warm-race{i}", pv_annotation: f"pv-{i}"},
+                },
+                "status": {"phase": "Running", "podIP": f"10.0.0.{i}"},
+            }
+
+    def iter_pods(self, label_selector: str):
+        name, _, value = label_selector.partition("=")
+        pods = [
+            pod for pod in self.pods.values()
+            if name in pod["metadata"]["labels"] and (not value or pod["metadata"]["labels"][name] == value)
+        ]
+        if self.on_list and not value:  # reconcile lists every state
+            self.on_list()
+        return [dict(pod) for pod in pods]
+
+    async def run(self, func, *args, **kwargs):
+        result = func(*args, **kwargs)
+        await asyncio.sleep(0.01)  # let other tasks run, as a real API round trip would
+        return result
+
+    def delete_pvc(self, pvc_name, namespace):
+        self.deleted_pvcs.append(pvc_name)
+
+    async def read_namespaced_pod(self, name, namespace):
+        from kubernetes.client.rest import ApiException
+        await asyncio.sleep(0.01)
+        if name not in self.pods:
+            raise ApiException(status=404)
+        meta = self.pods[name]["metadata"]
+        return SimpleNamespace(metadata=SimpleNamespace(labels=dict(meta["labels"]), resource_version=meta["resourceVersion"]))
+
+    async def delete_namespaced_pod(self, name, namespace, body):
+        from kubernetes.client.rest import ApiException
+        await asyncio.sleep(0.01)
+        if name not in self.pods:
+            raise ApiException(status=404)
+        if body.preconditions.resource_version != self.pods[name]["metadata"]["resourceVersion"]:
+            raise ApiException(status=409)
+        del self.pods[name]
+
+    async def patch_namespaced_pod(self, name, namespace, body):
+        from kubernetes.client.rest import ApiException
+        await asyncio.sleep(0.01)
+        if name not in self.pods:
+            raise ApiException(status=404)
+        meta = self.pods[name]["metadata"]
+        if body["metadata"]["resourceVersion"] != meta["resourceVersion"]:
+            raise ApiException(status=409)
+        meta["labels"].update(body["metadata"]["labels"])
+        meta["annotations"].update(body["metadata"]["annotations"])
+        meta["resourceVersion"] = str(int(meta["resourceVersion"]) + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm pool acquire vs. reconcile race check")
+    parser.add_argument("--database-url", default="sqlite:////tmp/warm_pool_race.db", help="URL of a scratch database")
+    args = parser.parse_args()
+
+    # app.db.session reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # The app modules come first: they import every model, registering all tables with Base
+    from app.core import warm_pool as pool_module
+    from app.db.session import Base, SessionLocal, engine
+    from app.models.gpu import Flavor, GpuReservation
+    from app.schemas.k8s import PodCreateRequest
+
+    key = pool_module.pool_key(**SHAPE)
+    cluster = FakeCluster(key, pool_module.POOL_LABEL, pool_module.KEY_LABEL, pool_module.PVC_ANNOTATION, pool_module.PV_ANNOTATION)
+    for pod in cluster.pods.values():
+        pod["metadata"]["namespace"] = pool_module.NAMESPACE
+    holders = list(cluster.pods) + ["ailabserver-warm-vanished"]
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    flavors = [Flavor(gpu_name="2g.20gb", available=0, worker_node="race-node", gpu_id=0, mig_id=i) for i in range(len(holders))]
+    db.add_all(flavors)
+    db.flush()
+    db.add_all(
+        GpuReservation(flavor_id=flavor.id, holder=holder, status="Bound", expires_at=None)
+        for flavor, holder in zip(flavors, holders)
+    )
+    db.commit()
+
+    manager = pool_module.WarmPoolManager(enabled=True)
+    manager.shapes[key] = SHAPE
+    manager.compute_targets = lambda session: {key: 0}  # every warm pod is surplus
+    request = PodCreateRequest(name="race", pvc=True, **SHAPE)
+    handed = []
+
+    async def jupyter_ready(internal_ip):
+        return True
+
+    async def scenario():
+        # A job asks for a pod right after reconcile has listed the pool
+        cluster.on_list = lambda: handed.append(asyncio.ensure_future(manager.acquire(request, user_id=1)))
+        await manager.reconcile()
+        return await handed[0] if handed else None
+
+    originals = (pool_module.kube_api, pool_module.iter_pods, pool_module.delete_pvc, pool_module.jupyter_ready)
+    pool_module.kube_api, pool_module.iter_pods = cluster, cluster.iter_pods
+    pool_module.delete_pvc, pool_module.jupyter_ready = cluster.delete_pvc, jupyter_ready
+    try:
+        result = asyncio.run(scenario())
+        db.expire_all()
+        held = {holder for (holder,) in db.query(GpuReservation.holder).filter(GpuReservation.holder.in_(holders))}
+    finally:
+        pool_module.kube_api, pool_module.iter_pods, pool_module.delete_pvc, pool_module.jupyter_ready = originals
+        db.query(GpuReservation).filter(GpuReservation.holder.in_(holders)).delete(synchronize_session=False)
+        db.query(Flavor).filter(Flavor.id.in_([f.id for f in flavors])).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+    checks = {"acquire ran during reconcile": bool(handed)}
+    if result:
+        name = result["pod_name"]
+        checks["handed-over pod kept"] = name in cluster.pods
+        checks["handed-over claim kept"] = result["pvc_name"] not in cluster.deleted_pvcs
+        checks["handed-over GPU hold kept"] = name in held
+    checks["surplus warm pods removed"] = not any(
+        pod["metadata"]["labels"][pool_module.POOL_LABEL] == "warm" for pod in cluster.pods.values()
+    )
+    checks["assigned pod's GPU hold kept"] = "ailabserver-warm-race2" in held
+    checks["vanished pod's GPU hold released"] = "ailabserver-warm-vanished" not in held
+
+    print(f"acquire returned: {result['pod_name'] if result else None}")
+    for name, ok in checks.items():
+        print(f"{name:<36} {'ok' if ok else 'FAILED'}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
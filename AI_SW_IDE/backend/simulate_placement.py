@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Offline replay of GPU server requests against the placement policies.
+
+Trace CSV columns: arrival (seconds), duration (seconds), gpu (label as sent by the UI)
+
+    python simulate_placement.py --trace trace.csv --db
+    python simulate_placement.py --synthetic 2000 --nodes 3 --gpus-per-node 4 --mig-gpus 2
+"""
+import argparse
+import csv
+import heapq
+import os
+import random
+import sys
+from collections import Counter
+
+# Add current path to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.placement import GPU_REQUESTS, POLICIES, Inventory, Slice
+
+# MIG partitions of an A100 80GB used for synthetic inventories (7 compute units each)
+MIG_LAYOUTS = [
+    ["3g.40gb", "2g.20gb", "2g.20gb"],
+    ["4g.40gb", "3g.40gb"],
+]
+
+
+def synthetic_inventory(nodes: int, gpus_per_node: int, mig_gpus: int) -> list[Slice]:
+    slices = []
+    flavor_id = 0
+    for n in range(nodes):
+        node = f"worker{n + 1}"
+        for gpu_id in range(gpus_per_node):
+            if gpu_id < mig_gpus:
+                layout = MIG_LAYOUTS[gpu_id % len(MIG_LAYOUTS)]
+                for mig_id, profile in enumerate(layout):
+                    flavor_id += 1
+                    slices.append(Slice(flavor_id, node, gpu_id, mig_id, profile))
+            else:
+                flavor_id += 1
+                slices.append(Slice(flavor_id, node, gpu_id, None, "a100 80gb pcie"))
+    return slices
+
+
+def db_inventory() -> list[Slice]:
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        inventory = Inventory.from_db(db)
+        for s in inventory.slices.values():
+            s.free = True  # replay starts from an empty cluster
+        return list(inventory.slices.values())
+    finally:
+        db.close()
+
+
+def load_trace(path: str) -> list[tuple[float, float, str]]:
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        return [
+            (float(row['arrival']), float(row['duration']), row['gpu'])
+            for row in csv.DictReader(csvfile)
+        ]
+
+
+def synthetic_trace(count: int, seed: int, mean_gap: float, mean_duration: float) -> list[tuple[float, float, str]]:
+    rng = random.Random(seed)
+    labels = list(GPU_REQUESTS)
+    weights = [4, 3, 2, 2, 1][:len(labels)]
+    trace = []
+    now = 0.0
+    for _ in range(count):
+        now += rng.expovariate(1 / mean_gap)
+        trace.append((now, rng.expovariate(1 / mean_duration), rng.choices(labels, weights)[0]))
+    return trace
+
+
+def replay(slices: list[Slice], trace: list[tuple[float, float, str]], policy) -> dict:
+    inventory = Inventory(Slice(**vars(s)) for s in slices)
+    running = []  # heap of (end_time, seq, flavor_ids)
+    accepted = Counter()
+    requested = Counter()
+    fragmentation = []
+
+    for seq, (arrival, duration, label) in enumerate(sorted(trace)):
+        while running and running[0][0] <= arrival:
+            _, _, flavor_ids = heapq.heappop(running)
+            inventory.release(flavor_ids)
+
+        requested[label] += 1
+        placement = policy(inventory, GPU_REQUESTS[label])
+        if placement:
+            inventory.allocate(placement.flavor_ids)
+            heapq.heappush(running, (arrival + duration, seq, placement.flavor_ids))
+            accepted[label] += 1
+        fragmentation.append(inventory.fragmentation())
+
+    total = sum(requested.values())
+    return {
+        "requests": total,
+        "acceptance_rate": sum(accepted.values()) / total if total else 0.0,
+        "mean_fragmentation": sum(fragmentation) / len(fragmentation) if fragmentation else 0.0,
+        "peak_fragmentation": max(fragmentation, default=0.0),
+        "per_label": {label: (accepted[label], requested[label]) for label in requested},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay GPU request traces against placement policies")
+    parser.add_argument("--trace", help="CSV trace with arrival,duration,gpu columns")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate a synthetic trace with N requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mean-gap", type=float, default=60.0, help="Mean seconds between synthetic arrivals")
+    parser.add_argument("--mean-duration", type=float, default=3600.0, help="Mean synthetic server lifetime")
+    parser.add_argument("--db", action="store_true", help="Use the gpu_flavor table as inventory")
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--gpus-per-node", type=int, default=4)
+    parser.add_argument("--mig-gpus", type=int, default=2, help="MIG-partitioned GPUs per node")
+    parser.add_argument("--policy", choices=list(POLICIES), action="append")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    elif args.synthetic:
+        trace = synthetic_trace(args.synthetic, args.seed, args.mean_gap, args.mean_duration)
+    else:
+        parser.error("either --trace or --synthetic is required")
+
+    slices = db_inventory() if args.db else synthetic_inventory(args.nodes, args.gpus_per_node, args.mig_gpus)
+    print(f"Inventory: {len(slices)} slices, trace: {len(trace)} requests")
+
+    for name in args.policy or list(POLICIES):
+        report = replay(slices, trace, POLICIES[name])
+        print(f"\n=== {name} ===")
+        print(f"acceptance rate    : {report['acceptance_rate']:.1%}")
+        print(f"mean fragmentation : {report['mean_fragmentation']:.1%}")
+        print(f"peak fragmentation : {report['peak_fragmentation']:.1%}")
+        for label, (ok, total) in sorted(report["per_label"].items()):
+            print(f"  {label:<16} {ok}/{total}")
+
+
+if __name__ == "__main__":
+    main()
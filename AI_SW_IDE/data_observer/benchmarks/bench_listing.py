@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Compare the pathlib listing/size walk the data observer used to do with the os.scandir engine,
+serial and on the parallel walker, on a synthetic tree.
+
+    python benchmarks/bench_listing.py --files 100000 --per-dir 200
+    python benchmarks/bench_listing.py --root /nfsvolume/some/dir      # existing tree, e.g. on NFS
+
+With strace installed, stat-family syscalls of each engine are counted as well (--strace).
+A local disk hides what the parallel walker is for; --latency adds a simulated NFS round trip
+to every directory listing of the scandir engines.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STATE_DIR", tempfile.gettempdir())
+
+STAT_SYSCALLS = "stat,lstat,fstat,newfstatat,statx"
+
+
+def build_tree(root: Path, files: int, per_dir: int):
+    """`files` small files, `per_dir` per directory, directories nested two levels deep"""
+    dirs = max(files // per_dir, 1)
+    for d in range(dirs):
+        directory = root / f"group{d % 10}" / f"dir{d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for f in range(per_dir):
+            (directory / f"file{f}.txt").write_bytes(b"x" * (f % 512))
+
+
+def legacy_listing(root: Path) -> int:
+    """What /browse did before: Path.stat + is_dir per entry, rglob + is_file + stat per file"""
+    total = 0
+    for item in root.iterdir():
+        item.stat()
+        if item.is_dir():
+            for sub in item.rglob('*'):
+                if sub.is_file():
+                    total += sub.stat().st_size
+        else:
+            total += item.stat().st_size
+    return total
+
+
+def scandir_listing(root: Path, width: int = 1) -> int:
+    import main
+
+    total = 0
+    with os.scandir(root) as entries:
+        for entry in entries:
+            info = main.get_entry_info(entry)
+            if info.type == "directory":
+                total += main.walker.walk(entry.path, budget=3600, width=width).size
+            else:
+                total += info.size
+    return total
+
+
+def parallel_listing(root: Path) -> int:
+    import main
+
+    return scandir_listing(root, width=main.WALK_WORKERS)
+
+
+def add_latency(seconds: float):
+    import walker
+
+    scan = walker.scan_directory
+
+    def slow_scan(path):
+        time.sleep(seconds)
+        return scan(path)
+
+    walker.scan_directory = slow_scan
+
+
+ENGINES = {"legacy": legacy_listing, "scandir": scandir_listing, "parallel": parallel_listing}
+
+
+def count_syscalls(engine: str, root: Path) -> str:
+    """Re-run one engine under strace and return its stat-family syscall count"""
+    result = subprocess.run(
+        ["strace", "-f", "-c", "-e", f"trace={STAT_SYSCALLS}", sys.executable, __file__,
+         "--root", str(root), "--engine", engine, "--repeat", "1"],
+        capture_output=True, text=True,
+    )
+    for line in result.stderr.splitlines():
+        if line.strip().endswith("total"):
+            return line.split()[2]
+    return "?"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--per-dir", type=int, default=200)
+    parser.add_argument("--root", help="benchmark an existing tree instead of a synthetic one")
+    parser.add_argument("--engine", choices=sorted(ENGINES), help="run a single engine (used by --strace)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--strace", action="store_true", help="count stat syscalls with strace")
+    parser.add_argument("--latency", type=float, default=0, help="simulated ms per directory listing (scandir engines)")
+    args = parser.parse_args()
+    if args.latency:
+        add_latency(args.latency / 1000)
+
+    tmp = None
+    if args.root:
+        root = Path(args.root)
+    else:
+        tmp = tempfile.mkdtemp(prefix="bench-listing-")
+        root = Path(tmp)
+        started = time.perf_counter()
+        build_tree(root, args.files, args.per_dir)
+        print(f"Built {args.files} files in {time.perf_counter() - started:.1f}s under {root}")
+
+    try:
+        for name in [args.engine] if args.engine else sorted(ENGINES):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                total = ENGINES[name](root)
+                timings.append(time.perf_counter() - started)
+            line = f"{name:8} best {min(timings) * 1000:8.1f} ms  total {total} bytes"
+            if args.strace and not args.engine:
+                if shutil.which("strace"):
+                    line += f"  stat syscalls {count_syscalls(name, root)}"
+                else:
+                    line += "  stat syscalls n/a (strace not installed)"
+            print(line)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
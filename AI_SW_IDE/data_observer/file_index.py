@@ -0,0 +1,291 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ext TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+CREATE INDEX IF NOT EXISTS files_size ON files(size);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    ino INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rescans (
+    path TEXT PRIMARY KEY,
+    rescanned_at REAL NOT NULL
+);
+"""
+
+
+def child_path(parent: str, name: str) -> str:
+    return f"/{name}" if parent == "/" else f"{parent}/{name}"
+
+
+def subtree_range(path: str) -> tuple:
+    """Bounds of every key strictly below `path` ('0' sorts right after '/')"""
+    prefix = "" if path == "/" else path
+    return f"{prefix}/", f"{prefix}0"
+
+
+def file_extension(name: str) -> Optional[str]:
+    name_parts = name.rsplit('.', 1)
+    return name_parts[1].lower() if len(name_parts) > 1 else None
+
+
+class FileIndex:
+    """
+    On-disk SQLite index of every file under `root` (path, size, mtime, extension), refreshed
+    by a background thread. Paths are stored relative to the root, as /browse shows them.
+
+    A refresh re-lists only directories whose (inode, mtime) changed since the last pass and
+    descends into the known subdirectories of the rest; every `full_rescan` seconds all
+    directories are re-listed to also catch files rewritten in place. Paths asked for by
+    usage() are re-listed in full on their own once that is more than `usage_rescan` seconds ago.
+    """
+
+    def __init__(self, root: str, db_path: str, interval: float = 600, full_rescan: float = 86400,
+                 usage_rescan: float = 3600):
+        self.root = root.rstrip("/") or "/"
+        self.db_path = db_path
+        self.interval = interval
+        self.full_rescan = full_rescan
+        self.usage_rescan = usage_rescan
+        self.indexing = False
+        self.last_refresh: Optional[float] = None
+        self.last_full_refresh = 0.0
+        self.last_stats: dict = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._rescans: Dict[str, Future] = {}
+        self._rescan_lock = threading.Lock()
+        self._rescan_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-index-rescan")
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with closing(self.connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="file-index", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._rescan_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh(full=time.time() - self.last_full_refresh > self.full_rescan)
+            except Exception as e:
+                print(f"File index refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+    def refresh(self, full: bool = False) -> dict:
+        """One indexing pass; returns counts of listed and skipped directories"""
+        started = time.time()
+        stats = {"listed": 0, "unchanged": 0, "files": 0, "full": full}
+        self.indexing = True
+        conn = self.connect()
+        try:
+            self._walk(conn, "/", full, stats)
+        finally:
+            conn.close()
+            self.indexing = False
+
+        self.last_refresh = time.time()
+        if full:
+            self.last_full_refresh = self.last_refresh
+        stats["seconds"] = round(self.last_refresh - started, 3)
+        self.last_stats = stats
+        return stats
+
+    def rescan(self, path: str) -> dict:
+        """Re-list every directory below `path`, catching files rewritten in place there"""
+        stats = {"listed": 0, "unchanged": 0, "files": 0, "full": True}
+        conn = self.connect()
+        try:
+            self._walk(conn, path, True, stats)
+            if not self._stop.is_set():
+                conn.execute("INSERT OR REPLACE INTO rescans VALUES (?, ?)", (path, time.time()))
+                conn.commit()
+        finally:
+            conn.close()
+        return stats
+
+    def schedule_rescan(self, path: str) -> Future:
+        """Rescan a path in the background (one rescan per path at a time)"""
+        with self._rescan_lock:
+            future = self._rescans.get(path)
+            if future is None:
+                future = self._rescan_executor.submit(self._run_rescan, path)
+                self._rescans[path] = future
+            return future
+
+    def _run_rescan(self, path: str):
+        try:
+            self.rescan(path)
+        except Exception as e:
+            print(f"File index rescan of {path} failed: {e}")
+        finally:
+            with self._rescan_lock:
+                self._rescans.pop(path, None)
+
+    def _walk(self, conn: sqlite3.Connection, start: str, full: bool, stats: dict):
+        """Index the tree below `start`; unless `full`, directories whose (inode, mtime) did not change are skipped"""
+        known = {}
+        children = defaultdict(list)
+        for row in conn.execute("SELECT path, parent, ino, mtime_ns FROM dirs"):
+            known[row["path"]] = (row["ino"], row["mtime_ns"])
+            children[row["parent"]].append(row["path"])
+
+        queue = [start]
+        while queue and not self._stop.is_set():
+            rel = queue.pop()
+            try:
+                st = os.stat(self.root + (rel if rel != "/" else ""))
+            except OSError:
+                self._forget(conn, rel)
+                continue
+            if not full and known.get(rel) == (st.st_ino, st.st_mtime_ns):
+                stats["unchanged"] += 1
+                queue.extend(children[rel])
+                continue
+
+            subdirs = self._relist(conn, rel, st, stats)
+            if subdirs is None:  # unreadable this time: keep what is indexed
+                queue.extend(children[rel])
+                continue
+            for gone in set(children[rel]) - set(subdirs):
+                self._forget(conn, gone)
+            queue.extend(subdirs)
+            if stats["listed"] % 500 == 0:
+                conn.commit()
+        conn.commit()
+
+    def _relist(self, conn: sqlite3.Connection, rel: str, st: os.stat_result, stats: dict) -> Optional[List[str]]:
+        """Replace the rows of one directory's files, returning its subdirectories (None if unreadable)"""
+        rows, subdirs = [], []
+        try:
+            with os.scandir(self.root + (rel if rel != "/" else "")) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(child_path(rel, entry.name))
+                        elif entry.is_file(follow_symlinks=False):
+                            file_st = entry.stat(follow_symlinks=False)
+                            rows.append((child_path(rel, entry.name), rel, entry.name,
+                                         file_extension(entry.name), file_st.st_size, file_st.st_mtime))
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+
+        conn.execute("DELETE FROM files WHERE dir = ?", (rel,))
+        conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+        parent = None if rel == "/" else (rel.rsplit("/", 1)[0] or "/")
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)", (rel, parent, st.st_ino, st.st_mtime_ns))
+        stats["listed"] += 1
+        stats["files"] += len(rows)
+        return subdirs
+
+    def _forget(self, conn: sqlite3.Connection, rel: str):
+        """Drop a vanished directory and everything indexed below it"""
+        low, high = subtree_range(rel)
+        conn.execute("DELETE FROM files WHERE dir = ? OR (path >= ? AND path < ?)", (rel, low, high))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (rel, low, high))
+
+    def _query(self, where: List[str], params: list, order: str, limit: int) -> List[dict]:
+        sql = "SELECT path, name, ext, size, mtime FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        with closing(self.connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, [*params, limit])]
+
+    @staticmethod
+    def _scope(path: str, ext: Optional[str]) -> tuple:
+        where, params = [], []
+        if path and path != "/":
+            low, high = subtree_range(path.rstrip("/"))
+            where.append("path >= ? AND path < ?")
+            params += [low, high]
+        if ext:
+            where.append("ext = ?")
+            params.append(ext.lower().lstrip("."))
+        return where, params
+
+    def search(self, pattern: Optional[str] = None, ext: Optional[str] = None, path: str = "/",
+               limit: int = 100, ignore_case: bool = True) -> List[dict]:
+        """Files whose name matches a glob (*, ?, [...]) and/or has the extension, below `path`"""
+        where, params = self._scope(path, ext)
+        if pattern:
+            where.append("lower(name) GLOB ?" if ignore_case else "name GLOB ?")
+            params.append(pattern.lower() if ignore_case else pattern)
+        return self._query(where, params, "path", limit)
+
+    def largest(self, path: str = "/", ext: Optional[str] = None, limit: int = 20) -> List[dict]:
+        where, params = self._scope(path, ext)
+        return self._query(where, params, "size DESC", limit)
+
+    def usage(self, paths: List[str]) -> List[dict]:
+        """
+        Indexed bytes, files and directories below each path, without touching the filesystem.
+        Sizes are as of `rescanned_at`, the last time the path was re-listed in full; a path whose
+        rescan is older than `usage_rescan` is `stale` and gets rescanned in the background.
+        """
+        result = []
+        now = time.time()
+        with closing(self.connect()) as conn:
+            for path in paths:
+                low, high = subtree_range(path)
+                size, files = conn.execute(
+                    "SELECT coalesce(sum(size), 0), count(*) FROM files WHERE path >= ? AND path < ?", (low, high)
+                ).fetchone()
+                directories = conn.execute(
+                    "SELECT count(*) FROM dirs WHERE path >= ? AND path < ?", (low, high)
+                ).fetchone()[0]
+                indexed = conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone() is not None
+                row = conn.execute("SELECT rescanned_at FROM rescans WHERE path = ?", (path,)).fetchone()
+                rescanned_at = max(row[0] if row else 0.0, self.last_full_refresh) or None
+                stale = rescanned_at is None or now - rescanned_at > self.usage_rescan
+                if stale:
+                    self.schedule_rescan(path)
+                result.append({"path": path, "size": size, "files": files, "directories": directories,
+                               "indexed": indexed, "rescanned_at": rescanned_at, "stale": stale})
+        return result
+
+    def status(self) -> dict:
+        with closing(self.connect()) as conn:
+            files, total_size = conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM files").fetchone()
+            directories = conn.execute("SELECT count(*) FROM dirs").fetchone()[0]
+        return {
+            "indexing": self.indexing,
+            "last_refresh": self.last_refresh,
+            "last_pass": self.last_stats,
+            "files": files,
+            "directories": directories,
+            "total_size": total_size,
+        }
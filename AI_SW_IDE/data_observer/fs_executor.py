@@ -0,0 +1,178 @@
+import asyncio
+import functools
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+
+class FilesystemTimeout(Exception):
+    """A filesystem call did not finish in time; its thread may still be waiting on the mount"""
+
+
+class FilesystemBusy(Exception):
+    """Too many filesystem calls are already waiting for a thread"""
+
+
+class FilesystemExecutor:
+    """
+    Dedicated thread pool for everything that touches the NFS mount, so a hung mount ties up
+    these threads only, not the event loop and not the requests that never reach the volume.
+
+    Each call waits at most its timeout, time in the queue included. A call still queued when
+    it times out is dropped; one already running keeps its thread until the mount answers and
+    is counted as blocked meanwhile. At most `max_queue` calls wait for a thread, further ones
+    are rejected right away instead of piling up behind a stuck mount.
+    """
+
+    def __init__(self, workers: int, timeout: float, max_queue: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fs")
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._queued = 0
+        self._running = {}  # call id -> (started, deadline)
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _call(self, call_id: int, timeout: float, func: Callable, args: tuple, kwargs: dict):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running[call_id] = (started, started + timeout)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                del self._running[call_id]
+                self.completed += 1
+
+    def _drop(self, future: Future):
+        if future.cancel():  # never started: it no longer waits in the queue
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run `func` on the pool; FilesystemTimeout after `timeout` seconds, FilesystemBusy if the queue is full"""
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise FilesystemBusy(f"{self._queued} filesystem calls already waiting")
+            self._queued += 1
+        future = self._executor.submit(self._call, next(self._ids), timeout, func, args, kwargs)
+        # Shielded so a timeout does not try to cancel a call that is already running
+        waiter = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            self._drop(future)
+            waiter.add_done_callback(lambda f: f.cancelled() or f.exception())  # result is abandoned
+            with self._lock:
+                self.timeouts += 1
+            raise FilesystemTimeout(f"No answer from the filesystem within {timeout:g}s")
+        except asyncio.CancelledError:
+            self._drop(future)
+            raise
+
+    async def iterate(self, iterator: Iterator, timeout: Optional[float] = None) -> AsyncIterator:
+        """Drive a blocking iterator (a file being streamed, a listing) one item per call on the pool"""
+        done = object()
+        while True:
+            item = await self.run(next, iterator, done, timeout=timeout)
+            if item is done:
+                return
+            yield item
+
+    def offload(self, budget_param: Optional[str] = None):
+        """
+        Decorator turning a sync endpoint into an async one that runs on the pool. The signature is
+        kept for FastAPI; `budget_param` names a query parameter (seconds) added to the timeout.
+        """
+        def decorator(func: Callable):
+            @functools.wraps(func)
+            async def endpoint(*args, **kwargs):
+                timeout = self.timeout + ((kwargs.get(budget_param) or 0) if budget_param else 0)
+                return await self.run(functools.partial(func, *args, **kwargs), timeout=timeout)
+            return endpoint
+        return decorator
+
+    def stats(self) -> dict:
+        """Saturation of the pool: busy and blocked (past their timeout) threads, and the queue"""
+        now = time.monotonic()
+        with self._lock:
+            running = list(self._running.values())
+            queued = self._queued
+        return {
+            "workers": self.workers,
+            "busy": len(running),
+            "blocked": sum(1 for _, deadline in running if deadline < now),
+            "queued": queued,
+            "max_queue": self.max_queue,
+            "oldest_call_seconds": round(now - min(started for started, _ in running), 3) if running else 0,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+
+class MountProbe:
+    """
+    Checks that the mount answers from its own thread every `interval` seconds, so health checks
+    read the last result instead of touching a mount that may hang. A probe stuck on the mount
+    shows up as a result older than `stale_after`.
+    """
+
+    def __init__(self, path: str, interval: float = 5, stale_after: float = 30):
+        self.path = path
+        self.interval = interval
+        self.stale_after = stale_after
+        self.accessible: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mount-probe", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self) -> bool:
+        started = time.monotonic()
+        accessible = os.path.exists(self.path) and os.access(self.path, os.R_OK)
+        self.duration = time.monotonic() - started
+        self.accessible = accessible
+        self.checked_at = time.time()
+        return accessible
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Mount probe failed: {e}")
+                self.accessible = False
+                self.checked_at = time.time()
+            self._stop.wait(self.interval)
+
+    def status(self) -> dict:
+        age = time.time() - self.checked_at if self.checked_at else None
+        stale = age is None or age > self.stale_after
+        return {
+            "accessible": bool(self.accessible) and not stale,
+            "stale": stale,
+            "checked_at": datetime.fromtimestamp(self.checked_at) if self.checked_at else None,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "probe_seconds": round(self.duration, 3) if self.duration is not None else None,
+        }
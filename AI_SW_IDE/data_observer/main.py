@@ -1,12 +1,26 @@
+import base64
+import bisect
+import hashlib
+import json
 import os
 import stat
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+from email.utils import formatdate
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from file_index import FileIndex
+from fs_executor import FilesystemBusy, FilesystemExecutor, FilesystemTimeout, MountProbe
+from response_cache import ResponseCache, conditional_response, make_entry, stat_validator
+from size_index import DirSizeIndex
+from walker import TreeWalker, WalkResult
+
 
 app = FastAPI(
     title="Data Observer API",
@@ -16,6 +30,76 @@ app = FastAPI(
 
 # NFS volume mount point
 NFS_ROOT = os.getenv("NFS_ROOT", "/home/jovyan")
+# Symlinks are resolved before access and must not lead outside this directory
+NFS_REAL_ROOT = os.path.realpath(NFS_ROOT)
+# Writable location for the observer's own state (the NFS volume is mounted read-only)
+STATE_DIR = os.getenv("STATE_DIR", "/var/lib/data-observer")
+SIZE_INDEX_TTL = float(os.getenv("SIZE_INDEX_TTL", "300"))
+# How long a listing waits for directory sizes before returning approximate ones
+SIZE_INDEX_WAIT = float(os.getenv("SIZE_INDEX_WAIT", "2"))
+BROWSE_MAX_LIMIT = int(os.getenv("BROWSE_MAX_LIMIT", "5000"))
+# Directories listed concurrently by a size walk, and the default time budget of one walk
+WALK_WORKERS = int(os.getenv("WALK_WORKERS", "8"))
+WALK_BUDGET = float(os.getenv("WALK_BUDGET", "10"))
+# Extensions listed in the /info histogram
+INFO_MAX_EXTENSIONS = int(os.getenv("INFO_MAX_EXTENSIONS", "50"))
+# Serialized /browse and /info responses kept for conditional requests
+response_cache = ResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "30")),
+)
+# Every request that touches the volume runs on this pool; seconds a call may take, and how many may wait
+fs_executor = FilesystemExecutor(
+    workers=int(os.getenv("FS_WORKERS", "16")),
+    timeout=float(os.getenv("FS_TIMEOUT", "30")),
+    max_queue=int(os.getenv("FS_MAX_QUEUE", "64")),
+)
+mount_probe = MountProbe(
+    NFS_ROOT,
+    interval=float(os.getenv("HEALTH_PROBE_INTERVAL", "5")),
+    stale_after=float(os.getenv("HEALTH_PROBE_STALE", "30")),
+)
+FILE_INDEX_ENABLED = os.getenv("FILE_INDEX_ENABLED", "true").lower() == "true"
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+# Most bytes a preview reads, however long its lines are
+PREVIEW_MAX_BYTES = int(os.getenv("PREVIEW_MAX_BYTES", str(256 * 1024)))
+
+size_index = DirSizeIndex(
+    state_path=os.path.join(STATE_DIR, "size_index.json"),
+    ttl=SIZE_INDEX_TTL,
+    workers=int(os.getenv("SIZE_INDEX_WORKERS", "2")),
+)
+
+walker = TreeWalker(workers=WALK_WORKERS)
+
+file_index = FileIndex(
+    root=NFS_ROOT,
+    db_path=os.path.join(STATE_DIR, "file_index.sqlite3"),
+    interval=float(os.getenv("FILE_INDEX_INTERVAL", "600")),
+    full_rescan=float(os.getenv("FILE_INDEX_FULL_RESCAN", "86400")),
+    usage_rescan=float(os.getenv("FILE_INDEX_USAGE_RESCAN", "3600")),
+) if FILE_INDEX_ENABLED else None
+
+@app.on_event("startup")
+def start_background_threads():
+    mount_probe.start()
+    if file_index:
+        file_index.start()
+
+@app.on_event("shutdown")
+def save_size_index():
+    size_index.shutdown()
+    mount_probe.stop()
+    if file_index:
+        file_index.stop()
+
+@app.exception_handler(FilesystemTimeout)
+def filesystem_timeout_handler(request: Request, exc: FilesystemTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.exception_handler(FilesystemBusy)
+def filesystem_busy_handler(request: Request, exc: FilesystemBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 class FileInfo(BaseModel):
     name: str
@@ -23,15 +107,17 @@ class FileInfo(BaseModel):
     extension: Optional[str] = None  # File extension (None for directories)
     size: int  # bytes
     size_human: str  # human readable size
+    size_approximate: bool = False  # stale index entry or a walk cut short by its time budget
     modified: datetime
     permissions: str
 
 class DirectoryResponse(BaseModel):
     path: str
-    total_items: int
-    total_size: int
+    total_items: int  # entries in the directory, also when only one page is returned
+    total_size: int  # files among the returned items
     total_size_human: str
     items: List[FileInfo]
+    next_cursor: Optional[str] = None  # pass as `cursor` for the next page, None on the last one
 
 def get_human_readable_size(size_bytes: int) -> str:
     """Convert bytes to human-readable format"""
@@ -46,75 +132,124 @@ def get_human_readable_size(size_bytes: int) -> str:
     
     return f"{size_bytes:.1f}{size_names[i]}"
 
-def get_file_info(file_path: Path, calculate_dir_size: bool = False) -> FileInfo:
-    """Get file/directory information"""
-    try:
-        stat_info = file_path.stat()
-        
-        # Determine file type
-        file_type = "directory" if file_path.is_dir() else "file"
-        
-        # Calculate size
-        if file_type == "file":
-            size = stat_info.st_size
-        elif file_type == "directory" and calculate_dir_size:
-            # Calculate size of all files in directory
-            size = calculate_directory_size(file_path)
-        else:
-            # Directory but not calculating size
-            size = 0
-        
-        # Extract extension
-        extension = None
-        if file_type == "file":
-            name_parts = file_path.name.rsplit('.', 1)
-            if len(name_parts) > 1:
-                extension = name_parts[1]
-        
-        # Permission information
-        mode = stat_info.st_mode
-        permissions = stat.filemode(mode)
-        
-        # Modified time
-        modified = datetime.fromtimestamp(stat_info.st_mtime)
-        
-        return FileInfo(
-            name=file_path.name,
-            type=file_type,
-            extension=extension,
-            size=size,
-            size_human=get_human_readable_size(size),
-            modified=modified,
-            permissions=permissions
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unable to get file information: {str(e)}")
-
-def vscode_sort(items: List[FileInfo]) -> List[FileInfo]:
-    """VSCode-style sorting: directories first, then files sorted by name"""
-    directories = [item for item in items if item.type == "directory"]
-    files = [item for item in items if item.type == "file"]
+def build_file_info(name: str, stat_info: os.stat_result, size: Optional[int] = None,
+                    approximate: bool = False) -> FileInfo:
+    """FileInfo from an already fetched stat; `size` overrides the stat size for directories"""
+    is_dir = stat.S_ISDIR(stat_info.st_mode)
+    if size is None:
+        size = 0 if is_dir else stat_info.st_size
     
-    # Sort each by name (case-insensitive)
-    directories.sort(key=lambda x: x.name.lower())
-    files.sort(key=lambda x: x.name.lower())
+    # Extract extension
+    extension = None
+    if not is_dir:
+        name_parts = name.rsplit('.', 1)
+        if len(name_parts) > 1:
+            extension = name_parts[1]
     
-    # Directories first, then files
-    return directories + files
+    return FileInfo(
+        name=name,
+        type="directory" if is_dir else "file",
+        extension=extension,
+        size=size,
+        size_human=get_human_readable_size(size),
+        size_approximate=approximate,
+        modified=datetime.fromtimestamp(stat_info.st_mtime),
+        permissions=stat.filemode(stat_info.st_mode)
+    )
+
+def get_entry_info(entry: os.DirEntry, calculate_dir_size: bool = False) -> FileInfo:
+    """
+    FileInfo of a scandir entry. DirEntry caches its stat and knows its type from the
+    directory listing, so each entry costs at most one stat; directory sizes come from the size index.
+    """
+    stat_info = entry.stat()
+    # Symlinked directories are not sized: their target may lie outside NFS_ROOT
+    if calculate_dir_size and entry.is_dir(follow_symlinks=False):
+        size, approximate = size_index.lookup(entry.path, stat_info)
+        return build_file_info(entry.name, stat_info, size or 0, approximate)
+    return build_file_info(entry.name, stat_info)
+
+# Sort keys always end with the exact name, so the order is total and a cursor can resume after any entry.
+# The name-based keys only need what scandir already returned; size/modified need each entry's stat.
+ENTRY_SORT_KEYS = {
+    "vscode": lambda entry: (0 if entry.is_dir() else 1, entry.name.lower(), entry.name),  # directories first
+    "name": lambda entry: (entry.name.lower(), entry.name),
+    "type": lambda entry: ("directory" if entry.is_dir() else "file", entry.name.lower(), entry.name),
+}
+INFO_SORT_KEYS = {
+    "size": lambda info: (info.size, info.name.lower(), info.name),
+    "modified": lambda info: (info.modified.timestamp(), info.name.lower(), info.name),
+}
 
-def calculate_directory_size(directory_path: Path) -> int:
-    """Calculate total size of directory (including subdirectories)"""
-    total_size = 0
+def encode_cursor(sort_by: str, key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_by, key]).encode()).decode()
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple:
     try:
-        for item in directory_path.rglob('*'):
-            if item.is_file():
-                try:
-                    total_size += item.stat().st_size
-                except (OSError, PermissionError):
-                    continue
-    except (OSError, PermissionError):
-        pass
-    return total_size
+        cursor_sort_by, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort_by != sort_by:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+    return tuple(key)
+
+def paginate(keys: list, cursor: Optional[str], limit: Optional[int], sort_by: str) -> tuple:
+    """Index range of the page within `keys` (sorted) and the cursor of the page after it"""
+    start = bisect.bisect_right(keys, decode_cursor(cursor, sort_by)) if cursor else 0
+    end = len(keys) if limit is None else min(start + limit, len(keys))
+    next_cursor = encode_cursor(sort_by, keys[end - 1]) if end < len(keys) else None
+    return start, end, next_cursor
+
+def collect_infos(entries: list, calculate_dir_size: bool) -> List[FileInfo]:
+    """FileInfo of each entry; entries that vanish or cannot be read are skipped"""
+    if calculate_dir_size:
+        # Start size refreshes for the subdirectories and give small ones time to finish exactly
+        subdirs = [entry for entry in entries if entry.is_dir(follow_symlinks=False)]
+        for entry in subdirs:
+            size_index.lookup(entry.path, entry.stat())
+        size_index.wait([entry.path for entry in subdirs], SIZE_INDEX_WAIT)
+    
+    items = []
+    for entry in entries:
+        try:
+            items.append(get_entry_info(entry, calculate_dir_size))
+        except Exception as e:
+            print(f"Failed to get file information: {entry.name}, error: {e}")
+    return items
+
+def stream_directory(full_path: Path, display_path: str, include_hidden: bool, calculate_dir_size: bool):
+    """
+    NDJSON lines, one FileInfo per entry in directory order as scandir yields it, then a
+    summary line of type "summary". Directory sizes are never waited for here.
+    """
+    total_items = total_size = 0
+    with os.scandir(full_path) as entries:
+        for entry in entries:
+            if not include_hidden and entry.name.startswith('.'):
+                continue
+            try:
+                info = get_entry_info(entry, calculate_dir_size)
+            except Exception as e:
+                print(f"Failed to get file information: {entry.name}, error: {e}")
+                continue
+            total_items += 1
+            if info.type == "file":
+                total_size += info.size
+            yield info.model_dump_json() + "\n"
+    yield json.dumps({
+        "type": "summary",
+        "path": display_path,
+        "total_items": total_items,
+        "total_size": total_size,
+        "total_size_human": get_human_readable_size(total_size),
+    }) + "\n"
+
+def calculate_directory_size(directory_path: Path, budget: float = WALK_BUDGET) -> WalkResult:
+    """
+    Total size of directory (including subdirectories), walked in parallel.
+    Partial totals with complete=False once `budget` seconds have passed.
+    """
+    return walker.walk(str(directory_path), budget)
 
 @app.get("/")
 def root():
@@ -124,16 +259,12 @@ def root():
         "nfs_root": NFS_ROOT
     }
 
-@app.get("/browse", response_model=DirectoryResponse)
-def browse_directory(
-    path: str = Query("/", description="Path to browse (relative to NFS root)"),
-    include_hidden: bool = Query(False, description="Include hidden files"),
-    sort_by: str = Query("vscode", description="Sort criteria: vscode, name, size, modified, type"),
-    calculate_dir_size: bool = Query(True, description="Whether to calculate actual directory size (may take time)")
-):
-    """Return directory contents of the specified path"""
-    
-    # Path normalization and security validation
+def resolve_path(path: str) -> Tuple[str, Path, os.stat_result]:
+    """
+    Validated path (without leading /), its symlink-free location below NFS_ROOT and its stat.
+    Users can create symlinks on the volume, so a path whose resolved target lies outside
+    NFS_ROOT (service account token, /proc, STATE_DIR...) is refused.
+    """
     if path.startswith("/"):
         path = path[1:]  # Remove leading /
     
@@ -141,116 +272,411 @@ def browse_directory(
     if ".." in path:
         raise HTTPException(status_code=400, detail="Access to parent directory is not allowed")
     
-    full_path = Path(NFS_ROOT) / path
-    
-    # Check if path exists
-    if not full_path.exists():
+    full_path = Path(os.path.realpath(os.path.join(NFS_REAL_ROOT, path)))
+    if os.path.commonpath([NFS_REAL_ROOT, full_path]) != NFS_REAL_ROOT:
+        raise HTTPException(status_code=403, detail="Path leads outside the NFS root")
+    try:
+        stat_info = os.stat(full_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Path not found: {path}")
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="No permission to access path")
+    return path, full_path, stat_info
+
+@app.get("/browse", response_model=DirectoryResponse)
+@fs_executor.offload()
+def browse_directory(
+    request: Request,
+    path: str = Query("/", description="Path to browse (relative to NFS root)"),
+    include_hidden: bool = Query(False, description="Include hidden files"),
+    sort_by: str = Query("vscode", description="Sort criteria: vscode, name, size, modified, type"),
+    calculate_dir_size: bool = Query(True, description="Whether to calculate actual directory size (may take time)"),
+    limit: Optional[int] = Query(None, ge=1, le=BROWSE_MAX_LIMIT, description="Page size (all entries if omitted)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    format: str = Query("json", description="json, or ndjson to stream entries unsorted as they are read")
+):
+    """
+    Return directory contents of the specified path.
+    With `limit`, entries come in pages that resume after the last key of the previous page,
+    so only the entries of the page are statted (except when sorting by size or modified).
+    Responses carry an ETag; a repeated request for an unchanged directory costs one stat.
+    """
+    path, full_path, stat_info = resolve_path(path)
     
     # Check if it's a directory
-    if not full_path.is_dir():
+    if not stat.S_ISDIR(stat_info.st_mode):
         raise HTTPException(status_code=400, detail=f"Specified path is not a directory: {path}")
     
+    display_path = f"/{path}" if path else "/"
+    if format == "ndjson":
+        return StreamingResponse(
+            fs_executor.iterate(stream_directory(full_path, display_path, include_hidden, calculate_dir_size)),
+            media_type="application/x-ndjson"
+        )
+    
+    cache_key = ("browse", str(full_path), include_hidden, sort_by, calculate_dir_size, limit, cursor)
+    validator = stat_validator(stat_info, size_index.generation if calculate_dir_size else None)
+    cached = response_cache.get(cache_key, validator)
+    if cached is not None:
+        return conditional_response(request, cached)
+    
     try:
-        # Collect directory items
-        items = []
-        total_size = 0
+        with os.scandir(full_path) as entries:
+            children = [entry for entry in entries if include_hidden or not entry.name.startswith('.')]
         
-        for item in full_path.iterdir():
-            # Handle hidden files
-            if not include_hidden and item.name.startswith('.'):
-                continue
-            
-            try:
-                file_info = get_file_info(item, calculate_dir_size)
-                items.append(file_info)
-                
-                # Accumulate size for files
-                if file_info.type == "file":
-                    total_size += file_info.size
-                    
-            except Exception as e:
-                print(f"Failed to get file information: {item.name}, error: {e}")
-                continue
-        
-        # Sort
-        if sort_by == "vscode":
-            items = vscode_sort(items)
+        if sort_by in INFO_SORT_KEYS:
+            # Ordering needs every entry's stat (and directory size)
+            all_items = sorted(collect_infos(children, calculate_dir_size), key=INFO_SORT_KEYS[sort_by])
+            start, end, next_cursor = paginate(
+                [INFO_SORT_KEYS[sort_by](item) for item in all_items], cursor, limit, sort_by
+            )
+            items = all_items[start:end]
         else:
-            sort_key_map = {
-                "name": lambda x: x.name.lower(),
-                "size": lambda x: x.size,
-                "modified": lambda x: x.modified,
-                "type": lambda x: (x.type, x.name.lower())  # Directories first, then by name
-            }
-            
-            if sort_by in sort_key_map:
-                items.sort(key=sort_key_map[sort_by])
+            sort_by = sort_by if sort_by in ENTRY_SORT_KEYS else "vscode"
+            children.sort(key=ENTRY_SORT_KEYS[sort_by])
+            start, end, next_cursor = paginate(
+                [ENTRY_SORT_KEYS[sort_by](entry) for entry in children], cursor, limit, sort_by
+            )
+            items = collect_infos(children[start:end], calculate_dir_size)
         
-        return DirectoryResponse(
-            path=f"/{path}" if path else "/",
-            total_items=len(items),
+        total_size = sum(item.size for item in items if item.type == "file")
+        listing = DirectoryResponse(
+            path=display_path,
+            total_items=len(children),
             total_size=total_size,
             total_size_human=get_human_readable_size(total_size),
-            items=items
+            items=items,
+            next_cursor=next_cursor
         )
+        entry = make_entry(validator, listing.model_dump_json().encode())
+        if not any(item.size_approximate for item in items):  # sizes still settling are not kept
+            response_cache.set(cache_key, entry)
+        return conditional_response(request, entry)
         
+    except HTTPException:
+        raise
     except PermissionError:
         raise HTTPException(status_code=403, detail="No permission to access directory")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unable to read directory: {str(e)}")
 
+def walk_statistics(walk: WalkResult) -> dict:
+    """Per-extension file counts and bytes (largest first, INFO_MAX_EXTENSIONS of them) and the mtime range"""
+    extensions = sorted(walk.extensions.items(), key=lambda item: (-item[1][1], item[0] or ""))
+    return {
+        "extensions": [
+            {"extension": extension, "files": files, "size": size, "size_human": get_human_readable_size(size)}
+            for extension, (files, size) in extensions[:INFO_MAX_EXTENSIONS]
+        ],
+        "extension_count": len(extensions),
+        "newest_modified": datetime.fromtimestamp(walk.newest_mtime) if walk.newest_mtime is not None else None,
+        "oldest_modified": datetime.fromtimestamp(walk.oldest_mtime) if walk.oldest_mtime is not None else None,
+    }
+
 @app.get("/info")
-def get_path_info(path: str = Query("/", description="Path to query information for")):
-    """Return detailed information for a specific path"""
-    
-    # Path normalization and security validation
-    if path.startswith("/"):
-        path = path[1:]
-    
-    if ".." in path:
-        raise HTTPException(status_code=400, detail="Access to parent directory is not allowed")
-    
-    full_path = Path(NFS_ROOT) / path
-    
-    if not full_path.exists():
-        raise HTTPException(status_code=404, detail=f"Path not found: {path}")
+@fs_executor.offload(budget_param="timeout")
+def get_path_info(
+    request: Request,
+    path: str = Query("/", description="Path to query information for"),
+    timeout: float = Query(WALK_BUDGET, gt=0, le=300, description="Seconds a size walk may take before partial totals are returned")
+):
+    """
+    Return detailed information for a specific path (with an ETag, see /browse).
+    Directories are walked once for their size, file/directory counts, extension histogram and mtime range.
+    """
+    path, full_path, stat_info = resolve_path(path)
+    cache_key = ("info", str(full_path), timeout)
+    validator = stat_validator(stat_info)
+    cached = response_cache.get(cache_key, validator)
+    if cached is not None:
+        return conditional_response(request, cached)
     
     try:
-        file_info = get_file_info(full_path, True)  # Always calculate directory size for /info endpoint
-        
-        # Calculate number of child items and total size for directories
         additional_info = {}
-        if full_path.is_dir():
-            try:
-                child_count = len(list(full_path.iterdir()))
-                dir_size = calculate_directory_size(full_path)
+        if stat.S_ISDIR(stat_info.st_mode):
+            # One walk gives the size, the counts and the statistics below
+            walk = calculate_directory_size(full_path, timeout)
+            file_info = build_file_info(full_path.name, stat_info, walk.size, not walk.complete)
+            if walk.children is None:
+                additional_info["error"] = "No permission to access subdirectories"
+            else:
                 additional_info.update({
-                    "child_count": child_count,
-                    "directory_size": dir_size,
-                    "directory_size_human": get_human_readable_size(dir_size)
+                    "child_count": walk.children,
+                    "directory_size": walk.size,
+                    "directory_size_human": get_human_readable_size(walk.size),
+                    "directory_size_approximate": not walk.complete,
+                    "file_count": walk.files,
+                    "directory_count": walk.directories,
+                    **walk_statistics(walk)
                 })
-            except PermissionError:
-                additional_info["error"] = "No permission to access subdirectories"
+        else:
+            file_info = build_file_info(full_path.name, stat_info)
         
-        return {
+        info = {
             "path": f"/{path}" if path else "/",
             "info": file_info,
             **additional_info
         }
+        entry = make_entry(validator, json.dumps(jsonable_encoder(info)).encode())
+        if not (file_info.size_approximate or additional_info.get("directory_size_approximate")):  # partial walks are not kept
+            response_cache.set(cache_key, entry)
+        return conditional_response(request, entry)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unable to get file information: {str(e)}")
 
+def indexed_file(row: dict) -> dict:
+    return {
+        "path": row["path"],
+        "name": row["name"],
+        "extension": row["ext"],
+        "size": row["size"],
+        "size_human": get_human_readable_size(row["size"]),
+        "modified": datetime.fromtimestamp(row["mtime"]),
+    }
+
+def index_scope(path: str) -> str:
+    """Validated search scope in index form (/dir/sub)"""
+    if ".." in path:
+        raise HTTPException(status_code=400, detail="Access to parent directory is not allowed")
+    if file_index is None:
+        raise HTTPException(status_code=503, detail="File index is disabled")
+    return "/" + path.strip("/")
+
+def index_response(rows: List[dict]) -> dict:
+    return {
+        "results": [indexed_file(row) for row in rows],
+        "count": len(rows),
+        "indexed_at": datetime.fromtimestamp(file_index.last_refresh) if file_index.last_refresh else None,
+        "indexing": file_index.indexing,
+    }
+
+@app.get("/search")
+def search_files(
+    pattern: Optional[str] = Query(None, description="Name glob, e.g. *.csv or model_??.pt"),
+    ext: Optional[str] = Query(None, description="File extension without the dot"),
+    path: str = Query("/", description="Only search below this path"),
+    ignore_case: bool = Query(True, description="Case-insensitive name matching"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Find files by name and extension from the file index, without touching the filesystem"""
+    scope = index_scope(path)
+    return index_response(file_index.search(pattern, ext, scope, limit, ignore_case))
+
+@app.get("/largest")
+def largest_files(
+    path: str = Query("/", description="Only consider files below this path"),
+    ext: Optional[str] = Query(None, description="File extension without the dot"),
+    limit: int = Query(20, ge=1, le=1000)
+):
+    """Largest files from the file index"""
+    scope = index_scope(path)
+    return index_response(file_index.largest(scope, ext, limit))
+
+@app.get("/usage")
+def path_usage(path: List[str] = Query(..., description="Paths to total (repeatable, up to 200)")):
+    """
+    Bytes, file and directory counts below each path, summed from the file index.
+    `indexed` is false for paths the indexer has not reached (yet).
+    Files growing in place do not change their directory's mtime, so sizes are only as recent
+    as `rescanned_at`. A `stale` path (rescanned more than FILE_INDEX_USAGE_RESCAN seconds ago)
+    is rescanned in the background and up to date on a later request.
+    """
+    if len(path) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 paths per request")
+    scopes = [index_scope(p) for p in path]
+    usage = file_index.usage(scopes)
+    for entry in usage:
+        entry["size_human"] = get_human_readable_size(entry["size"])
+        entry["rescanned_at"] = datetime.fromtimestamp(entry["rescanned_at"]) if entry["rescanned_at"] else None
+    return {
+        "usage": usage,
+        "indexed_at": datetime.fromtimestamp(file_index.last_refresh) if file_index.last_refresh else None,
+        "indexing": file_index.indexing,
+    }
+
+@app.get("/index/status")
+def file_index_status():
+    index_scope("/")
+    return file_index.status()
+
+def resolve_file(path: str) -> Tuple[Path, os.stat_result]:
+    """Validated regular file below NFS_ROOT and its stat"""
+    path, full_path, stat_info = resolve_path(path.lstrip("/"))
+    if not stat.S_ISREG(stat_info.st_mode):
+        raise HTTPException(status_code=400, detail=f"Specified path is not a file: {path}")
+    return full_path, stat_info
+
+def open_file(full_path: Path, stat_info: os.stat_result):
+    """
+    Open a file resolved by resolve_file for reading. O_NOFOLLOW and the inode check make sure
+    it is still the file that was checked, not a symlink swapped in since.
+    """
+    try:
+        fd = os.open(full_path, os.O_RDONLY | os.O_NOFOLLOW)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="No permission to access file")
+    except OSError:
+        raise HTTPException(status_code=409, detail="File changed while it was being opened")
+    opened = os.fstat(fd)
+    if (opened.st_dev, opened.st_ino) != (stat_info.st_dev, stat_info.st_ino):
+        os.close(fd)
+        raise HTTPException(status_code=409, detail="File changed while it was being opened")
+    return os.fdopen(fd, "rb")
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single "bytes=" range. None means the header is ignored and the
+    whole file is sent (other units, multiple ranges, malformed values); unsatisfiable ranges raise 416.
+    """
+    units, _, spec = header.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":  # suffix range: the last N bytes
+            suffix = int(last)
+            start, end = (max(size - suffix, 0) if suffix > 0 else size), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def if_range_matches(if_range: Optional[str], headers: dict) -> bool:
+    """Whether a Range may be honoured: no If-Range, or one naming the current (strong) ETag or Last-Modified"""
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(('"', 'W/')):  # weak tags never match
+        return if_range == headers["ETag"]
+    return if_range == headers["Last-Modified"]
+
+def read_range(f, start: int, end: int):
+    """The bytes start..end of an open file, DOWNLOAD_CHUNK_SIZE at a time; closes the file when done"""
+    with f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@app.get("/download")
+@fs_executor.offload()
+def download_file(request: Request, path: str = Query(..., description="File to download (relative to NFS root)")):
+    """
+    File contents, streamed in chunks without loading the file into memory.
+    A single-range Range header is answered with 206 Partial Content, for resumed downloads and seeking.
+    With If-Range, the range is only served while the file still has that ETag or Last-Modified;
+    otherwise the whole (changed) file comes back with 200. Chunks are read on the filesystem pool, each within FS_TIMEOUT.
+    """
+    full_path, stat_info = resolve_file(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(full_path.name)}",
+        "Last-Modified": formatdate(stat_info.st_mtime, usegmt=True),
+        "ETag": '"' + hashlib.md5(f"{stat_info.st_mtime}-{stat_info.st_size}".encode()).hexdigest() + '"',
+    }
+    byte_range = None
+    if "range" in request.headers and if_range_matches(request.headers.get("if-range"), headers):
+        byte_range = parse_range(request.headers["range"], stat_info.st_size)
+    if byte_range is None:
+        start, end, status_code = 0, stat_info.st_size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat_info.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        fs_executor.iterate(read_range(open_file(full_path, stat_info), start, end)),
+        status_code=status_code,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+def read_head(f, size: int, lines: int) -> Tuple[List[bytes], bool]:
+    data = f.read(PREVIEW_MAX_BYTES)
+    parts = data.split(b"\n")
+    if len(data) < size:  # the last line was cut off by the byte limit
+        parts = parts[:-1]
+    elif parts and parts[-1] == b"":
+        parts = parts[:-1]
+    return parts[:lines], len(data) < size or len(parts) > lines
+
+def read_tail(f, size: int, lines: int) -> Tuple[List[bytes], bool]:
+    """Read backwards from the end, block by block, until enough lines (or PREVIEW_MAX_BYTES) are in"""
+    data = b""
+    position = size
+    while position > 0 and data.count(b"\n") <= lines and len(data) < PREVIEW_MAX_BYTES:
+        block = min(64 * 1024, position)
+        position -= block
+        f.seek(position)
+        data = f.read(block) + data
+    parts = data.split(b"\n")
+    if parts and parts[-1] == b"":
+        parts = parts[:-1]
+    if position > 0:  # the first line is only partially read
+        parts = parts[1:]
+    return parts[-lines:], position > 0 or len(parts) > lines
+
+@app.get("/preview")
+@fs_executor.offload()
+def preview_file(
+    path: str = Query(..., description="Text file to preview (relative to NFS root)"),
+    mode: str = Query("head", pattern="^(head|tail)$", description="First or last lines"),
+    lines: int = Query(50, ge=1, le=1000)
+):
+    """
+    First or last lines of a text/CSV file, reading at most PREVIEW_MAX_BYTES of it.
+    Tail previews of CSV/TSV files also carry the header row.
+    """
+    full_path, stat_info = resolve_file(path)
+    try:
+        with open_file(full_path, stat_info) as f:
+            if mode == "head":
+                selected, truncated = read_head(f, stat_info.st_size, lines)
+            else:
+                selected, truncated = read_tail(f, stat_info.st_size, lines)
+            header = None
+            if mode == "tail" and full_path.suffix.lower() in (".csv", ".tsv"):
+                f.seek(0)
+                header = f.readline(PREVIEW_MAX_BYTES)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="No permission to access file")
+    
+    if any(b"\0" in line for line in selected):
+        raise HTTPException(status_code=415, detail="File does not look like text")
+    decode = lambda line: line.decode("utf-8", errors="replace").rstrip("\r")
+    return {
+        "path": "/" + path.lstrip("/"),
+        "mode": mode,
+        "size": stat_info.st_size,
+        "size_human": get_human_readable_size(stat_info.st_size),
+        "header": decode(header.rstrip(b"\n")) if header else None,
+        "lines": [decode(line) for line in selected],
+        "truncated": truncated,
+    }
+
 @app.get("/health")
-def health_check():
-    """Health check endpoint"""
-    nfs_accessible = os.path.exists(NFS_ROOT) and os.access(NFS_ROOT, os.R_OK)
+async def health_check():
+    """
+    Health check endpoint. Answers from the last mount probe and never touches the volume itself,
+    so a hung mount cannot make it time out; `filesystem` shows how saturated the filesystem pool is.
+    """
+    probe = mount_probe.status()
     
     return {
-        "status": "healthy" if nfs_accessible else "unhealthy",
+        "status": "healthy" if probe["accessible"] else "unhealthy",
         "nfs_root": NFS_ROOT,
-        "nfs_accessible": nfs_accessible,
+        "nfs_accessible": probe["accessible"],
+        "probe": probe,
+        "filesystem": fs_executor.stats(),
         "timestamp": datetime.now()
     }
 
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+@dataclass
+class CachedResponse:
+    validator: tuple
+    body: bytes
+    etag: str
+    created: float
+
+
+def stat_validator(stat_info: os.stat_result, *extra) -> tuple:
+    """Cheap validator of a path: changes whenever an entry is added, removed or renamed in it"""
+    return (stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns, stat_info.st_size, *extra)
+
+
+def make_entry(validator: tuple, body: bytes) -> CachedResponse:
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    return CachedResponse(validator=validator, body=body, etag=etag, created=time.monotonic())
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional_response(request: Request, entry: CachedResponse, media_type: str = "application/json") -> Response:
+    """304 when the client already has this body, the body with its ETag otherwise"""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=media_type, headers=headers)
+
+
+class ResponseCache:
+    """
+    Small LRU of serialized responses. An entry is served while its validator (taken from one stat
+    of the path) is unchanged and it is younger than `ttl`; the age limit covers what the validator
+    cannot see, such as files rewritten in place or changes deeper in the tree.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, validator: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.validator != validator or time.monotonic() - entry.created > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, entry: CachedResponse):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
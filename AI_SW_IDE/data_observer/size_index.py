@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class DirNode:
+    """Size bookkeeping of one directory, valid as long as its (inode, mtime) do not change"""
+    ino: int
+    mtime_ns: int
+    files_size: int  # files directly inside the directory
+    file_count: int
+    subdirs: List[str] = field(default_factory=list)
+    total: int = 0  # files_size plus the totals of all subdirectories
+    validated: float = 0.0
+
+
+class DirSizeIndex:
+    """
+    Directory sizes kept per directory and keyed by (inode, mtime).
+
+    A directory's mtime changes whenever an entry is added, removed or renamed in it, so
+    on refresh only directories whose key changed are listed again; unchanged ones cost a
+    single stat. Lookups never walk: they answer from the index right away and schedule a
+    background refresh when the entry is missing, changed or older than `ttl`. Writes to
+    existing files do not touch the directory mtime and are picked up on the next re-listing.
+    """
+
+    def __init__(self, state_path: Optional[str] = None, ttl: float = 300, workers: int = 2,
+                 save_interval: float = 60):
+        self.state_path = state_path
+        self.ttl = ttl
+        self.save_interval = save_interval
+        self._nodes: Dict[str, DirNode] = {}
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="size-index")
+        self._last_save = time.monotonic()
+        # Bumped whenever a refresh changes any size, so cached listings can tell they are outdated
+        self.generation = 0
+        self.load()
+
+    def lookup(self, path: str, st: Optional[os.stat_result] = None) -> Tuple[Optional[int], bool]:
+        """
+        Cached total size of a directory and whether it is approximate.
+        A stale or missing entry triggers a background refresh; (None, True) means never computed.
+        """
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None, True
+        node = self._nodes.get(path)
+        fresh = (
+            node is not None
+            and (node.ino, node.mtime_ns) == (st.st_ino, st.st_mtime_ns)
+            and time.time() - node.validated < self.ttl
+        )
+        if fresh and path not in self._pending:
+            return node.total, False
+        self.schedule(path)
+        return (node.total if node else None), True
+
+    def schedule(self, path: str) -> Future:
+        """Refresh a directory in the background (one refresh per path at a time)"""
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                future = self._executor.submit(self._run_refresh, path)
+                self._pending[path] = future
+            return future
+
+    def wait(self, paths: List[str], timeout: float):
+        """Give pending refreshes of `paths` up to `timeout` seconds to finish"""
+        futures = [self._pending[p] for p in paths if p in self._pending]
+        if futures and timeout > 0:
+            wait(futures, timeout=timeout)
+
+    def _run_refresh(self, path: str):
+        try:
+            self.refresh(path)
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+        if time.monotonic() - self._last_save > self.save_interval:
+            self.save()
+
+    def refresh(self, path: str, seen: Optional[set] = None) -> int:
+        """Bring the subtree under `path` up to date, re-listing only directories that changed"""
+        seen = seen if seen is not None else set()
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._drop(path)
+            return 0
+        # A directory reachable twice (bind mounts, loops) is only counted once
+        if (st.st_dev, st.st_ino) in seen:
+            return 0
+        seen.add((st.st_dev, st.st_ino))
+
+        node = self._nodes.get(path)
+        previous_total = node.total if node else None
+        if node is None or (node.ino, node.mtime_ns) != (st.st_ino, st.st_mtime_ns):
+            node = self._scan(path, st)
+            if node is None:
+                return 0
+
+        node.total = node.files_size + sum(
+            self.refresh(os.path.join(path, name), seen) for name in node.subdirs
+        )
+        if node.total != previous_total:
+            self.generation += 1
+        node.validated = time.time()
+        with self._lock:
+            self._nodes[path] = node
+        return node.total
+
+    def _scan(self, path: str, st: os.stat_result) -> Optional[DirNode]:
+        files_size = file_count = 0
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            files_size += entry.stat(follow_symlinks=False).st_size
+                            file_count += 1
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        previous = self._nodes.get(path)
+        if previous is not None:
+            # Forget the subtrees of directories that no longer exist
+            for gone in set(previous.subdirs) - set(subdirs):
+                self._drop(os.path.join(path, gone))
+        return DirNode(ino=st.st_ino, mtime_ns=st.st_mtime_ns, files_size=files_size,
+                       file_count=file_count, subdirs=subdirs)
+
+    def _drop(self, path: str):
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            for key in [k for k in self._nodes if k == path or k.startswith(prefix)]:
+                del self._nodes[key]
+
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                data = json.load(f)
+            self._nodes = {path: DirNode(*values) for path, values in data.items()}
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring unreadable size index {self.state_path}: {e}")
+
+    def save(self):
+        """Write the index atomically, so a crash never leaves a truncated file"""
+        self._last_save = time.monotonic()
+        if not self.state_path:
+            return
+        with self._lock:
+            data = {
+                path: [n.ino, n.mtime_ns, n.files_size, n.file_count, n.subdirs, n.total, n.validated]
+                for path, n in self._nodes.items()
+            }
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Failed to save size index: {e}")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.save()
@@ -0,0 +1,138 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from file_index import file_extension
+
+
+@dataclass
+class WalkResult:
+    size: int = 0
+    files: int = 0
+    directories: int = 0
+    complete: bool = True  # False: the budget ran out (or directories were unreadable), totals are partial
+    elapsed: float = 0.0
+    children: Optional[int] = None  # entries directly in the root, None if it could not be listed
+    extensions: Dict[Optional[str], List[int]] = field(default_factory=dict)  # extension -> [files, bytes]
+    newest_mtime: Optional[float] = None  # of the files counted
+    oldest_mtime: Optional[float] = None
+
+    def add_file(self, extension: Optional[str], size: int, mtime: float, count: int = 1):
+        self.size += size
+        self.files += count
+        totals = self.extensions.setdefault(extension, [0, 0])
+        totals[0] += count
+        totals[1] += size
+        if self.newest_mtime is None or mtime > self.newest_mtime:
+            self.newest_mtime = mtime
+        if self.oldest_mtime is None or mtime < self.oldest_mtime:
+            self.oldest_mtime = mtime
+
+
+@dataclass
+class DirScan:
+    """What one directory contributes: plain files are totalled here, hard-linked ones are left to the caller"""
+    totals: WalkResult = field(default_factory=WalkResult)
+    entries: int = 0
+    subdirs: List[str] = field(default_factory=list)
+    # (st_dev, st_ino, extension, size, mtime) of files with st_nlink > 1
+    linked: List[Tuple[int, int, Optional[str], int, float]] = field(default_factory=list)
+    failed: bool = False
+
+
+def scan_directory(path: str) -> DirScan:
+    """List one directory: one stat per regular file, none for directories; symlinks are not followed"""
+    result = DirScan()
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                result.entries += 1
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        result.subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        extension = file_extension(entry.name)
+                        if st.st_nlink > 1:
+                            result.linked.append((st.st_dev, st.st_ino, extension, st.st_size, st.st_mtime))
+                        else:
+                            result.totals.add_file(extension, st.st_size, st.st_mtime)
+                except OSError:
+                    continue
+    except OSError:
+        result.failed = True
+    return result
+
+
+class TreeWalker:
+    """
+    Walks directory trees with up to `width` directories listed concurrently on a shared pool,
+    so NFS round trips overlap instead of queueing. Each walk has a time budget; when it runs
+    out the totals gathered so far are returned with complete=False and queued directories are
+    dropped. Hard-linked files are counted once per walk, and since symlinks are never followed
+    a link loop cannot trap the walk.
+
+    Besides the totals, the same pass tallies files and bytes per extension and the newest and
+    oldest file mtimes, so callers never need a second walk for statistics.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="walker")
+
+    def walk(self, root: str, budget: float, width: Optional[int] = None) -> WalkResult:
+        started = time.monotonic()
+        deadline = started + budget
+        width = max(1, min(width or self.workers, self.workers))
+        result = WalkResult()
+        seen_links = set()
+        queue = [root]
+        running = {}  # future -> directory
+
+        while queue or running:
+            while queue and len(running) < width:
+                path = queue.pop()
+                running[self._executor.submit(scan_directory, path)] = path
+            remaining = deadline - time.monotonic()
+            done, _ = wait(running, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                scan = future.result()
+                if running.pop(future) == root and not scan.failed:
+                    result.children = scan.entries
+                if scan.failed:
+                    result.complete = False
+                    continue
+                result.directories += 1
+                self._merge(result, scan.totals)
+                for dev, ino, extension, size, mtime in scan.linked:
+                    if (dev, ino) not in seen_links:
+                        seen_links.add((dev, ino))
+                        result.add_file(extension, size, mtime)
+                queue.extend(scan.subdirs)
+            if remaining <= 0 and (queue or running):
+                # Listings already running finish in the background; their results are dropped
+                for future in running:
+                    future.cancel()
+                result.complete = False
+                break
+
+        result.directories = max(result.directories - 1, 0)  # the root itself is not counted
+        result.elapsed = time.monotonic() - started
+        return result
+
+    @staticmethod
+    def _merge(result: WalkResult, scanned: WalkResult):
+        result.size += scanned.size
+        result.files += scanned.files
+        for extension, (files, size) in scanned.extensions.items():
+            totals = result.extensions.setdefault(extension, [0, 0])
+            totals[0] += files
+            totals[1] += size
+        for mtime in (scanned.newest_mtime, scanned.oldest_mtime):
+            if mtime is not None:
+                if result.newest_mtime is None or mtime > result.newest_mtime:
+                    result.newest_mtime = mtime
+                if result.oldest_mtime is None or mtime < result.oldest_mtime:
+                    result.oldest_mtime = mtime
@@ -107,9 +107,21 @@ export default function HardwareSelection() {
         throw new Error(err.detail || "Server creation failed");
       }
   
-      const result = await response.json();
+      // Provisioning runs as a background job; poll it until it finishes
+      let job = await response.json();
+      while (job.status !== "Succeeded" && job.status !== "Failed") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobRes = await fetchWithAuth(`/server/jobs/${job.job_id}`);
+        if (!jobRes.ok) {
+          throw new Error("Failed to fetch provisioning status");
+        }
+        job = await jobRes.json();
+      }
+      if (job.status === "Failed") {
+        throw new Error(job.detail || "Server creation failed");
+      }
       alert("✅ GPU server created successfully!");
-      console.log(result);
+      console.log(job);
       
       // My Server 탭으로 이동
       navigate("/admin/server");